@@ -0,0 +1,205 @@
+import os
+import time
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Priority classes - lower value is served first
+PRIORITY_CLASSES = {
+    "operations": 0,  # Operations console
+    "public": 1,      # Public dashboards / wallboards
+}
+DEFAULT_PRIORITY = "public"
+PRIORITY_HEADER = "X-Priority-Class"
+
+# Maximum time a request may wait for an LLM slot before degrading (seconds)
+PRIORITY_DEADLINES = {
+    "operations": float(os.getenv("ADMISSION_OPERATIONS_DEADLINE", "2.0")),
+    "public": float(os.getenv("ADMISSION_PUBLIC_DEADLINE", "0.25")),
+}
+
+
+class AdmissionTicket:
+    """Outcome of an admission attempt, used to pick the insights path and set headers"""
+
+    def __init__(self, endpoint: str, priority: str, granted: bool,
+                 reason: str = "", waited: float = 0.0):
+        self.endpoint = endpoint
+        self.priority = priority
+        self.granted = granted
+        self.reason = reason
+        self.waited = waited
+
+    @property
+    def degraded(self) -> bool:
+        return not self.granted
+
+    def headers(self) -> Dict[str, str]:
+        """Response headers describing admission and any degradation"""
+        headers = {
+            "X-Admission": "degraded" if self.degraded else "admitted",
+            "X-Priority-Class": self.priority,
+            "X-Queue-Wait-Ms": f"{self.waited * 1000:.0f}",
+        }
+        if self.degraded:
+            headers["X-Degradation"] = "fallback-insights"
+            headers["X-Degradation-Reason"] = self.reason
+        return headers
+
+
+class EndpointLimiter:
+    """
+    Concurrency limiter with a bounded, priority-ordered wait queue
+
+    Slots are handed directly to the highest-priority waiter on release.
+    When the queue is full a new request may displace the lowest-priority
+    waiter, otherwise it is refused immediately.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self.degraded_total = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _prune(self):
+        self._waiters = [entry for entry in self._waiters if not entry[2].done()]
+        heapq.heapify(self._waiters)
+
+    def _make_room(self, rank: int) -> bool:
+        """Evict the lowest-priority waiter if it ranks below the newcomer"""
+        self._prune()
+        if len(self._waiters) < self.max_queue:
+            return True
+        if not self._waiters:
+            return False
+        worst = max(self._waiters)
+        if worst[0] <= rank:
+            return False
+        self._waiters.remove(worst)
+        heapq.heapify(self._waiters)
+        worst[2].set_result(False)
+        return True
+
+    async def acquire(self, priority: str, deadline: float) -> Tuple[bool, str]:
+        """
+        Wait for a slot until the deadline expires
+
+        Returns:
+            (granted, reason) - reason explains why a slot was not granted
+        """
+        if self.active < self.max_concurrent and self.queued() == 0:
+            self.active += 1
+            return True, ""
+
+        rank = PRIORITY_CLASSES.get(priority, PRIORITY_CLASSES[DEFAULT_PRIORITY])
+        if self.max_queue <= 0 or not self._make_room(rank):
+            return False, "queue-full"
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (rank, next(self._sequence), future))
+        try:
+            granted = await asyncio.wait_for(asyncio.shield(future), timeout=deadline)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled() and future.result():
+                # Slot was handed over just as the deadline expired
+                return True, ""
+            future.cancel()
+            return False, "deadline-exceeded"
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.result():
+                self.release()
+            future.cancel()
+            raise
+        return (True, "") if granted else (False, "shed-by-priority")
+
+    def release(self):
+        """Hand the slot to the next live waiter, or free it"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        self.active = max(0, self.active - 1)
+
+    def get_status(self) -> Dict[str, int]:
+        return {
+            "active": self.active,
+            "queued": self.queued(),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "degraded_total": self.degraded_total,
+        }
+
+
+class AdmissionController:
+    """
+    Per-endpoint admission control for expensive LLM work
+
+    Requests that cannot get a slot before their priority deadline are not
+    rejected; they are admitted in degraded mode and served with the
+    rule-based fallback insights instead of waiting on Gemini.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, int]],
+                 deadlines: Optional[Dict[str, float]] = None):
+        self.limiters = {
+            name: EndpointLimiter(name, max_concurrent, max_queue)
+            for name, (max_concurrent, max_queue) in limits.items()
+        }
+        self.deadlines = deadlines or PRIORITY_DEADLINES
+
+    @asynccontextmanager
+    async def admit(self, endpoint: str, priority: str = DEFAULT_PRIORITY):
+        """Yield an AdmissionTicket; the slot is released on exit if granted"""
+        priority = resolve_priority(priority)
+        limiter = self.limiters[endpoint]
+        started = time.perf_counter()
+        granted, reason = await limiter.acquire(priority, self.deadlines[priority])
+        ticket = AdmissionTicket(endpoint, priority, granted, reason, time.perf_counter() - started)
+        if not granted:
+            limiter.degraded_total += 1
+        try:
+            yield ticket
+        finally:
+            if granted:
+                limiter.release()
+
+    def get_status(self) -> Dict[str, Dict[str, int]]:
+        return {name: limiter.get_status() for name, limiter in self.limiters.items()}
+
+
+def resolve_priority(value: Optional[str]) -> str:
+    """Map a client-supplied priority class to a known class"""
+    if value:
+        value = value.strip().lower()
+        if value in PRIORITY_CLASSES:
+            return value
+    return DEFAULT_PRIORITY
+
+
+# Per-endpoint (max concurrent LLM calls, max queued requests)
+ENDPOINT_LIMITS = {
+    "analyze": (
+        int(os.getenv("ADMISSION_ANALYZE_CONCURRENCY", "4")),
+        int(os.getenv("ADMISSION_ANALYZE_QUEUE", "16")),
+    ),
+    "simulate": (
+        int(os.getenv("ADMISSION_SIMULATE_CONCURRENCY", "2")),
+        int(os.getenv("ADMISSION_SIMULATE_QUEUE", "8")),
+    ),
+    "scenarios": (
+        int(os.getenv("ADMISSION_SCENARIOS_CONCURRENCY", "2")),
+        int(os.getenv("ADMISSION_SCENARIOS_QUEUE", "8")),
+    ),
+}
+
+admission_controller = AdmissionController(ENDPOINT_LIMITS)
@@ -1,24 +1,122 @@
 # backend/ai/anomaly_detection.py
 
+import re
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from ai.gemini_reasoning import InsightsCache, call_gemini, circuit_breaker, client_ready
+from rules.engine import get_rules
+from snapshots import as_snapshot, forecast_points
+
+# Explanations are reused for the same situation instead of asking again
+explanation_cache = InsightsCache(max_entries=256, ttl=1800)
+
+URGENCY_PATTERN = re.compile(r"urgency\D{0,20}?(\d{1,2})|(\d{1,2})\s*/\s*10", re.IGNORECASE)
+
+
+def extract_urgency(text: str) -> Optional[int]:
+    """Urgency rating (1-10) from a response such as "Urgency: 7" or "7/10" """
+    match = URGENCY_PATTERN.search(text or "")
+    if not match:
+        return None
+    return max(1, min(10, int(match.group(1) or match.group(2))))
+
+
+def situation_key(*parts: Any) -> str:
+    return hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
 async def detect_anomalies_with_gemini(current_data, historical_pattern):
-    """Use Gemini to detect unusual patterns"""
-    
-    prompt = f"""
+    """
+    Use Gemini to detect unusual patterns
+
+    The same situation is only sent once (answers are cached) and nothing is
+    sent while the client is missing or the circuit breaker is open.
+
+    Returns:
+        Dict with is_anomaly, explanation and urgency (explanation None if Gemini was not reached)
+    """
+    cache_key = situation_key("anomaly", current_data, historical_pattern)
+    text = explanation_cache.get(cache_key)
+    if text is None and client_ready() and circuit_breaker.can_attempt():
+        prompt = f"""
     You are an airport operations expert. Analyze if this situation is anomalous:
-    
+
     Current situation: {current_data}
     Normal pattern for this time: {historical_pattern}
-    
+
     Is this anomalous? Why? What could cause it?
     Rate urgency 1-10.
     """
-    
-    response = model.generate_content(prompt)
-    
-    # Add to alerts
-    if "anomalous" in response.text.lower():
-        return {
-            "is_anomaly": True,
-            "explanation": response.text,
-            "urgency": extract_urgency(response.text)
-        }
\ No newline at end of file
+        text = await call_gemini(prompt)
+        if text:
+            explanation_cache.set(cache_key, text)
+    if not text:
+        return {"is_anomaly": False, "explanation": None, "urgency": None}
+
+    lowered = text.lower()
+    return {
+        "is_anomaly": "anomalous" in lowered and "not anomalous" not in lowered,
+        "explanation": text,
+        "urgency": extract_urgency(text)
+    }
+
+
+def local_incident_explanation(level: str, utilization: float, forecast_data: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Rule-based explanation used when Gemini is unavailable"""
+    rules = get_rules()
+    text = f"Utilization at {utilization:.1f}% puts the zone at {level} risk."
+    description = rules.severity.descriptions.get(rules.severity.level(utilization))
+    if description:
+        text += f" {description}."
+    points = forecast_points(forecast_data) if forecast_data is not None else []
+    if points:
+        peak = max(points, key=lambda p: p.get("predicted_count", 0))
+        text += f" Forecast peak {peak['predicted_count']} passengers at {peak['timestamp']}."
+    actions = rules.get_recommendations(level)[:2]
+    if actions:
+        text += " Recommended: " + "; ".join(actions) + "."
+    return text
+
+
+async def explain_incident(
+    zone: str,
+    level: str,
+    current_data: Dict[str, Any],
+    forecast_data: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, str]:
+    """
+    Short explanation of a newly raised congestion incident
+
+    Situations are cached by zone, level and 5-point utilization band, so a
+    recurring incident reuses its explanation instead of calling Gemini again.
+
+    Returns:
+        Dict with explanation text and its source (gemini, cache or fallback)
+    """
+    snapshot = as_snapshot(current_data)
+    utilization = snapshot.utilization_rate
+    cache_key = situation_key("incident", zone, level, int(utilization // 5))
+    cached = explanation_cache.get(cache_key)
+    if cached:
+        return {"explanation": cached, "source": "cache"}
+
+    text = None
+    if client_ready() and circuit_breaker.can_attempt():
+        points = forecast_points(forecast_data) if forecast_data is not None else []
+        forecast_lines = "\n".join(
+            f"{p['timestamp']} {p['predicted_count']} {p['risk_level']}" for p in points[:12]
+        )
+        text = await call_gemini(f"""
+You are an airport operations analyst. Zone {zone} has just entered {level} congestion risk.
+Current: {snapshot.cctv_count} passengers, capacity {snapshot.terminal_capacity} ({utilization:.1f}%),
+{snapshot.active_flights} active flights, at {snapshot.timestamp}.
+Next 3 hours (time count risk):
+{forecast_lines}
+
+In at most 4 sentences: the likely cause, how long it may last and the single most important action.
+""")
+    if text:
+        explanation_cache.set(cache_key, text.strip())
+        return {"explanation": text.strip(), "source": "gemini"}
+    return {"explanation": local_incident_explanation(level, utilization, forecast_data), "source": "fallback"}
@@ -1,10 +1,20 @@
 import os
 import json
 import time
-from typing import Dict, List, Any
-from google import genai
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 
+from rules.engine import get_rules
+from ai.fallback_renderer import render_fallback_text, build_fallback_report
+from schemas import StructuredInsights, RiskFactor, PeakWindow, PrioritizedAction
+from shared_state import SHARED_STATE_ENABLED, SharedStore
+from snapshots import ForecastSeries, as_snapshot, forecast_counts, forecast_points
+from pydantic import BaseModel, ValidationError
+
 # Circuit Breaker Configuration
 class CircuitBreaker:
     """
@@ -52,39 +62,228 @@ class CircuitBreaker:
     def get_state(self):
         return self.state
 
+class LatencyTracker:
+    """
+    Rolling window of successful Gemini latencies
+    Used to derive percentile-based deadlines for budgeted requests
+    """
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=window)
+    
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def percentile(self, pct: float, default: float) -> float:
+        """Latency at the given percentile, or default until enough samples exist"""
+        if len(self.samples) < 10:
+            return default
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+class InsightsCache:
+    """
+    Small TTL + LRU cache of generated insights keyed by operational state
+    Late Gemini answers are stored here so the next caller gets them
+    """
+    def __init__(self, max_entries=256, ttl=900):
+        self.max_entries = max_entries
+        self.ttl = ttl  # seconds
+        self.entries = OrderedDict()
+    
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.time() - stored_at > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: str, stored_at: Optional[float] = None):
+        self.entries[key] = (stored_at or time.time(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def fetch(self, key: str) -> Optional[str]:
+        """get for use on the event loop"""
+        return self.get(key)
+
+class SharedInsightsCache(InsightsCache):
+    """
+    InsightsCache whose entries are shared with the other workers
+    The in-process LRU stays in front; misses fall through to the SQLite store,
+    so an answer generated by any worker is served by all of them. On the
+    event loop use fetch, which reads the store in a worker thread; writes
+    are queued, so neither blocks the loop.
+    """
+    def __init__(self, store: SharedStore, max_entries=256, ttl=900):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.store = store
+    
+    def get(self, key: str) -> Optional[str]:
+        value = super().get(key)
+        if value is None:
+            shared = self.store.get(key, self.ttl)
+            if shared is not None:
+                stored_at, value = shared
+                super().set(key, value, stored_at)  # keeps the original expiry
+        return value
+    
+    def set(self, key: str, value: str, stored_at: Optional[float] = None):
+        super().set(key, value, stored_at)
+        self.store.set(key, value, self.ttl)
+
+    async def fetch(self, key: str) -> Optional[str]:
+        """In-process hit without I/O; a miss reads the store off the event loop"""
+        value = super().get(key)
+        if value is None:
+            shared = await asyncio.to_thread(self.store.get, key, self.ttl)
+            if shared is not None:
+                stored_at, value = shared
+                super().set(key, value, stored_at)  # keeps the original expiry
+        return value
+
+    def claim(self, key: str, lease: float) -> bool:
+        """Blocking: True if this worker should generate the answer for `key`"""
+        return self.store.claim(key, lease)
+
+    def release(self, key: str):
+        self.store.release(key)
+
+    async def wait_for(self, key: str, timeout: float, interval: float = 0.1) -> Optional[str]:
+        """Poll the store for an answer another worker is generating; None after `timeout` seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            value = await self.fetch(key)
+            if value is not None or time.monotonic() >= deadline:
+                return value
+            await asyncio.sleep(interval)
+
+class RateCap:
+    """Token bucket limiting how many hedged requests may be sent per minute"""
+    def __init__(self, per_minute: float):
+        self.capacity = max(per_minute, 0)
+        self.tokens = self.capacity
+        self.rate = self.capacity / 60.0  # tokens per second
+        self.updated = time.monotonic()
+    
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+# Output mode: "text" (free-form essay) or "structured" (schema-constrained JSON)
+OUTPUT_MODE = os.getenv("GEMINI_OUTPUT_MODE", "text").lower()
+
+# Suggested output-token size per section of the structured response. The
+# model only sees these as prompt text; the API enforces their sum as one
+# max_output_tokens limit, not a limit per section.
+STRUCTURED_TOKEN_BUDGETS = {
+    "assessment": 120,
+    "risk_factors": 160,
+    "peak_windows": 120,
+    "actions": 320,
+}
+
+# Mapping of local-analysis severity and trend onto the structured scales
+SEVERITY_IMPACT = {"LOW": "LOW", "MODERATE": "MEDIUM", "ELEVATED": "MEDIUM", "SEVERE": "HIGH", "CRITICAL": "HIGH"}
+TREND_LIKELIHOOD = {"decreasing": "LOW", "stable": "MEDIUM", "increasing": "HIGH"}
+
+# Latency budget configuration (budgeted mode is off unless a budget is set)
+LATENCY_BUDGET = float(os.getenv("GEMINI_LATENCY_BUDGET", "0"))  # seconds per request
+BUDGET_PERCENTILE = float(os.getenv("GEMINI_BUDGET_PERCENTILE", "95"))
+HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "75"))
+HEDGE_MAX_PER_MINUTE = float(os.getenv("GEMINI_HEDGE_MAX_PER_MINUTE", "0"))  # 0 disables hedging
+MAX_BACKGROUND_CALLS = int(os.getenv("GEMINI_MAX_BACKGROUND_CALLS", "8"))  # outstanding budgeted calls
+
+# Micro-batching of concurrent insight requests (off unless GEMINI_BATCHING=1)
+BATCHING_ENABLED = os.getenv("GEMINI_BATCHING", "0") == "1"
+BATCH_MAX_SIZE = int(os.getenv("GEMINI_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_DELAY = float(os.getenv("GEMINI_BATCH_MAX_DELAY", "0.05"))  # seconds
+BATCH_ITEM_TOKENS = 900  # output-token budget per batched analysis
+
+SHARED_CLAIM_LEASE = float(os.getenv("GEMINI_SHARED_CLAIM_LEASE", "30"))  # seconds a claim blocks other workers
+SHARED_CLAIM_WAIT = float(os.getenv("GEMINI_SHARED_CLAIM_WAIT", "2"))  # seconds to wait for another worker's answer
+
 # Initialize Gemini client and circuit breaker
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
 circuit_breaker = CircuitBreaker(failure_threshold=3, timeout=60)
+latency_tracker = LatencyTracker()
+insights_cache = SharedInsightsCache(SharedStore()) if SHARED_STATE_ENABLED else InsightsCache()
+hedge_rate_cap = RateCap(HEDGE_MAX_PER_MINUTE)
 
-if GEMINI_API_KEY:
-    client = genai.Client(api_key=GEMINI_API_KEY)
-else:
-    client = None
-    print("Warning: GEMINI_API_KEY not found in environment variables")
+# Strong references to LLM calls that outlive the request that started them
+_background_calls = set()
+# Budgeted calls still running, per insights cache key, so identical requests share them
+_inflight_calls: Dict[str, List[asyncio.Task]] = {}
 
-async def generate_gemini_insights(
-    current_data: Dict[str, Any],
-    forecast_data: List[Dict[str, Any]]
-) -> str:
+# The client is built on first use: importing google.genai alone takes
+# several hundred milliseconds and would delay every cold start. Reading the
+# key lazily also picks up values loaded from .env after this module imports
+client = None
+_client_initialized = False
+_client_lock = threading.Lock()
+_client_build = None
+
+def get_client():
     """
-    Generate AI-powered insights using Gemini 3 with Circuit Breaker pattern
+    Gemini client, created on first call (thread-safe)
     
-    Strategy:
-    1. If circuit is OPEN (API failing), immediately use fallback
-    2. If circuit is CLOSED/HALF_OPEN, try Gemini 3 with thinking mode
-    3. On 503 (overload) or repeated failures, open circuit and use fallback
-    4. Fallback provides intelligent local analysis
+    Returns:
+        genai.Client, or None when no API key is configured
+    """
+    global client, _client_initialized
+    if client is None and not _client_initialized:
+        with _client_lock:
+            if not _client_initialized:
+                api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+                if api_key:
+                    from google import genai
+                    client = genai.Client(api_key=api_key)
+                else:
+                    print("Warning: GEMINI_API_KEY not found in environment variables")
+                _client_initialized = True
+    return client
+
+def client_ready():
     """
+    Client if it has already been built, else None - never blocks the event loop
     
-    # Check if we should even attempt the API call
-    if not client or not circuit_breaker.can_attempt():
-        print(f"🔌 Circuit breaker {circuit_breaker.get_state()} - Using local analysis")
-        return generate_fallback_insights(current_data, forecast_data)
+    Building the client imports the SDK and takes the client lock, so it must
+    not happen on the loop. Until the lifespan warm-up (or, with
+    GEMINI_WARM_UP=0, the background build started by the first call here)
+    has finished, callers get None and use the fallback.
+    """
+    global _client_build
+    if client is not None or _client_initialized:
+        return client
+    if _client_build is None:
+        _client_build = threading.Thread(target=get_client, name="gemini-client-build", daemon=True)
+        _client_build.start()
+    return None
+
+async def warm_up_client() -> bool:
+    """Build the client in a worker thread so the first request does not pay for it"""
+    started = time.perf_counter()
+    ready = await asyncio.to_thread(get_client) is not None
+    print(f" Gemini client warm-up finished in {(time.perf_counter() - started) * 1000:.0f} ms (ready={ready})")
+    return ready
+
+def build_insights_prompt(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]]
+) -> str:
+    """Build the operational analysis prompt for Gemini"""
+    utilization = as_snapshot(current_data).utilization_rate
     
-    try:
-        utilization = (current_data.get('cctv_count', 0) / current_data.get('terminal_capacity', 1)) * 100
-        
-        prompt = f"""
+    return f"""
 You are an expert airport operations AI analyst with deep knowledge of passenger flow dynamics, security operations, and resource optimization.
 
 CURRENT OPERATIONAL DATA:
@@ -95,7 +294,7 @@ CURRENT OPERATIONAL DATA:
 - Timestamp: {current_data.get('timestamp', 'N/A')}
 
 FORECAST DATA (Next 6 hours):
-{json.dumps(forecast_data, indent=2)}
+{json.dumps(forecast_points(forecast_data), indent=2)}
 
 ANALYSIS REQUIRED:
 Provide a comprehensive operational analysis including:
@@ -124,14 +323,33 @@ Provide a comprehensive operational analysis including:
 
 Focus on actionable, specific recommendations that airport operations can implement immediately.
 """
-        
+
+async def call_gemini(prompt: str, config: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Send a prompt to Gemini and record the outcome on the circuit breaker
+    
+    Args:
+        prompt: Prompt text
+        config: Generation config, defaults to the free-form analysis settings
+    
+    Returns:
+        Response text, or None if the call failed or returned nothing
+    """
+    gemini = client_ready()
+    if gemini is None:
+        return None
+    started = time.perf_counter()
+    try:
         # Try Gemini 3 Flash with extended thinking for better insights
         print(" Calling Gemini 3 Flash Preview with deep reasoning...")
         
-        response = client.models.generate_content(
+        # The SDK call is blocking - run it off the event loop so /health and
+        # degraded requests are not stuck behind the LLM round-trip
+        response = await asyncio.to_thread(
+            gemini.models.generate_content,
             model='gemini-3-flash-preview',
             contents=prompt,
-            config={
+            config=config or {
                 'temperature': 0.3,  # Lower temperature for more consistent operational advice
                 'top_p': 0.95,
                 'top_k': 40,
@@ -140,12 +358,13 @@ Focus on actionable, specific recommendations that airport operations can implem
         
         if response and hasattr(response, 'text') and response.text:
             circuit_breaker.call_succeeded()
+            latency_tracker.record(time.perf_counter() - started)
             print(" Gemini 3 analysis completed successfully")
             return response.text
         
         # No response text - treat as failure
         circuit_breaker.call_failed()
-        return generate_fallback_insights(current_data, forecast_data)
+        return None
     
     except Exception as e:
         error_msg = str(e)
@@ -165,190 +384,492 @@ Focus on actionable, specific recommendations that airport operations can implem
             # Generic error
             circuit_breaker.call_failed()
         
-        return generate_fallback_insights(current_data, forecast_data)
+        return None
 
-def generate_fallback_insights(
+class BatchItem(BaseModel):
+    id: str
+    analysis: str
+
+class BatchInsights(BaseModel):
+    items: List[BatchItem]
+
+def build_batch_prompt(items: List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]) -> str:
+    """
+    Build one prompt covering several independent operational states
+    Each state is sent compactly (hourly forecast) and tagged with its id
+    """
+    sections = []
+    for item_id, current_data, forecast_data in items:
+        utilization = as_snapshot(current_data).utilization_rate
+        hourly = " ".join(
+            f"{str(p.get('timestamp'))[11:16]}={p.get('predicted_count')}/{p.get('risk_level', '')}"
+            for p in forecast_points(forecast_data)[::4]
+        )
+        sections.append(
+            f"[{item_id}] count={current_data.get('cctv_count', 'N/A')} capacity={current_data.get('terminal_capacity', 'N/A')} "
+            f"utilization={utilization:.1f}% active_flights={current_data.get('active_flights', 'N/A')} "
+            f"time={current_data.get('timestamp', 'N/A')}\n    forecast: {hourly}"
+        )
+    states = "\n".join(sections)
+    
+    return f"""
+You are an expert airport operations AI analyst. Analyse each terminal state below independently.
+
+STATES:
+{states}
+
+For every state return one item with its id and an analysis covering: situation assessment,
+risk analysis, peak congestion windows, prioritized operational recommendations (immediate,
+next 2 hours, 2-6 hours) and resource allocation. Respond only with JSON matching the schema.
+"""
+
+class MicroBatcher:
+    """
+    Collects concurrent insight requests and sends them as one Gemini call
+    
+    A batch is flushed when it reaches `max_size` items or `max_delay` seconds
+    after its first item, whichever comes first. Parsed answers are routed
+    back to each waiting caller by id; callers whose item is missing or
+    invalid receive None and use the local fallback.
+    """
+    def __init__(self, max_size: int = BATCH_MAX_SIZE, max_delay: float = BATCH_MAX_DELAY):
+        self.max_size = max(1, max_size)
+        self.max_delay = max_delay
+        self.pending = []  # (current_data, forecast_data, future)
+        self._timer = None
+        self.batches_sent = 0
+    
+    async def submit(self, current_data: Dict[str, Any], forecast_data: List[Dict[str, Any]]) -> Optional[str]:
+        """Queue one request and wait for its share of the batched answer"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((current_data, forecast_data, future))
+        if len(self.pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+    
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        _background_calls.add(task)
+        task.add_done_callback(_background_calls.discard)
+    
+    async def _send(self, batch):
+        self.batches_sent += 1
+        answers = {}
+        try:
+            if len(batch) == 1:
+                current_data, forecast_data, _ = batch[0]
+                answers["0"] = await call_gemini(build_insights_prompt(current_data, forecast_data))
+            else:
+                answers = await self._send_many(batch)
+        finally:
+            for i, (_, _, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(answers.get(str(i)))
+    
+    async def _send_many(self, batch) -> Dict[str, str]:
+        print(f" Sending {len(batch)} insight requests as one batched Gemini call")
+        config = {
+            'temperature': 0.3,
+            'top_p': 0.95,
+            'max_output_tokens': BATCH_ITEM_TOKENS * len(batch),
+            'response_mime_type': 'application/json',
+            'response_schema': BatchInsights,
+        }
+        raw = await call_gemini(
+            build_batch_prompt([(str(i), current, forecast) for i, (current, forecast, _) in enumerate(batch)]),
+            config=config
+        )
+        if not raw:
+            return {}
+        try:
+            parsed = BatchInsights.model_validate_json(raw)
+        except ValidationError as e:
+            print(f" Batched Gemini response did not match the schema ({e.error_count()} errors) - using local analysis")
+            return {}
+        answers = {item.id.strip("[] "): item.analysis for item in parsed.items if item.analysis.strip()}
+        missing = len(batch) - sum(1 for i in range(len(batch)) if str(i) in answers)
+        if missing:
+            print(f" Batched Gemini response is missing {missing} of {len(batch)} items - using local analysis for those")
+        return answers
+
+insights_batcher = MicroBatcher()
+
+async def generate_gemini_insights(
     current_data: Dict[str, Any],
     forecast_data: List[Dict[str, Any]]
 ) -> str:
     """
-    Generate intelligent local analysis when Gemini API is unavailable
-    Uses rule-based expert system for airport operations
+    Generate AI-powered insights using Gemini 3 with Circuit Breaker pattern
+    
+    Strategy:
+    1. If circuit is OPEN (API failing), immediately use fallback
+    2. If circuit is CLOSED/HALF_OPEN, try Gemini 3 with thinking mode
+       (micro-batched with concurrent requests when GEMINI_BATCHING=1)
+    3. On 503 (overload) or repeated failures, open circuit and use fallback
+    4. Fallback provides intelligent local analysis
+    
+    With shared state enabled, answers go through the cross-worker insights
+    cache and the first worker to miss claims the situation: the others wait
+    up to SHARED_CLAIM_WAIT seconds for its answer and then use the local
+    analysis, so a situation is sent to Gemini by one worker at a time. A
+    worker that fails releases its claim; one that dies holds it until the
+    lease runs out.
     """
+    cache_key = insights_cache_key(current_data, forecast_data) if SHARED_STATE_ENABLED else None
+    if cache_key:
+        cached = await insights_cache.fetch(cache_key)
+        if cached:
+            return cached
     
-    # Calculate key metrics
-    cctv_count = current_data.get('cctv_count', 0)
-    capacity = current_data.get('terminal_capacity', 1)
-    utilization = (cctv_count / capacity) * 100
-    active_flights = current_data.get('active_flights', 0)
-    
-    # Analyze forecast trend
-    trend = analyze_congestion_trend(forecast_data)
-    peak_periods = identify_peak_periods(forecast_data)
-    
-    # Determine risk level
-    if utilization > 95:
-        risk_level = "CRITICAL"
-        risk_desc = "Terminal at maximum capacity - immediate intervention required"
-    elif utilization > 85:
-        risk_level = "SEVERE"
-        risk_desc = "Terminal approaching capacity limits - proactive measures needed"
-    elif utilization > 70:
-        risk_level = "ELEVATED"
-        risk_desc = "Terminal experiencing high volume - enhanced monitoring required"
-    elif utilization > 50:
-        risk_level = "MODERATE"
-        risk_desc = "Terminal operating normally with moderate passenger flow"
-    else:
-        risk_level = "LOW"
-        risk_desc = "Terminal operating well below capacity"
-    
-    # Build comprehensive analysis
-    insights = f"""
-═══════════════════════════════════════════════════════════════
- AIRPORT OPERATIONS ANALYSIS - LOCAL INTELLIGENCE MODE
-═══════════════════════════════════════════════════════════════
-
- SITUATION ASSESSMENT
-Current terminal utilization is at {utilization:.1f}% ({cctv_count:,} passengers / {capacity:,} capacity).
-Based on ARIMA forecasting models and historical patterns, we anticipate a {trend} congestion trend over the next 6 hours.
-{risk_desc}
-
-!!! RISK ANALYSIS
-Risk Level: {risk_level}
-"""
+    # Check if we should even attempt the API call
+    if not client_ready() or not circuit_breaker.can_attempt():
+        print(f"🔌 Circuit breaker {circuit_breaker.get_state()} - Using local analysis")
+        return generate_fallback_insights(current_data, forecast_data)
     
-    # Add specific risk factors
-    risk_factors = []
-    if utilization > 80:
-        risk_factors.append(f"• Critical capacity utilization at {utilization:.1f}%")
-    if trend == "increasing":
-        risk_factors.append(f"• Upward trend forecasted - passenger volumes expected to rise")
-    if len(peak_periods) > 0:
-        risk_factors.append(f"• {len(peak_periods)} peak congestion periods identified in forecast window")
-    if active_flights > 20:
-        risk_factors.append(f"• High flight activity with {active_flights} active operations")
-    
-    if risk_factors:
-        insights += "\n".join(risk_factors) + "\n"
-    else:
-        insights += "• No significant risk factors identified at current utilization levels\n"
+    if cache_key and not await asyncio.to_thread(insights_cache.claim, cache_key, SHARED_CLAIM_LEASE):
+        shared = await insights_cache.wait_for(cache_key, SHARED_CLAIM_WAIT)
+        return shared or generate_fallback_insights(current_data, forecast_data)
     
-    # Peak congestion forecast
-    insights += "\n PEAK CONGESTION FORECAST\n"
-    if peak_periods:
-        for i, period in enumerate(peak_periods, 1):
-            insights += f"{i}. {period}\n"
-    else:
-        insights += "• No significant peaks forecasted in the next 6 hours\n"
-    
-    # Operational recommendations (prioritized)
-    insights += "\n OPERATIONAL RECOMMENDATIONS\n\n"
-    
-    # Immediate actions (next 30 minutes)
-    insights += " IMMEDIATE ACTIONS (Next 30 minutes):\n"
-    if utilization > 85:
-        insights += "• Deploy all available security personnel to active checkpoints\n"
-        insights += "• Activate emergency overflow processing lanes\n"
-        insights += "• Initiate crowd control protocols at high-density zones\n"
-    elif utilization > 70:
-        insights += "• Position standby staff near peak-volume checkpoints\n"
-        insights += "• Verify all processing lanes are operational\n"
-    else:
-        insights += "• Maintain standard operational posture\n"
-        insights += "• Continue routine monitoring of passenger flow\n"
-    
-    # Short-term actions (next 2 hours)
-    insights += "\n  SHORT-TERM ACTIONS (Next 2 hours):\n"
-    if trend == "increasing" or utilization > 70:
-        insights += "• Prepare additional staff for anticipated peak periods\n"
-        insights += "• Pre-position mobile customer service units\n"
-        insights += "• Brief airline partners on expected congestion\n"
-    else:
-        insights += "• Optimize staff rotation schedules\n"
-        insights += "• Conduct routine equipment checks during low-volume windows\n"
-    
-    # Medium-term preparations (2-6 hours)
-    insights += "\n MEDIUM-TERM PREPARATIONS (2-6 hours):\n"
-    if peak_periods:
-        insights += f"• Schedule reinforcement teams for peak windows: {', '.join(peak_periods[:2])}\n"
-    insights += "• Coordinate with ground transportation providers\n"
-    insights += "• Update digital signage with wait time estimates\n"
-    insights += "• Ensure backup systems are ready for high-volume periods\n"
-    
-    # Resource allocation strategy
-    insights += "\n RESOURCE ALLOCATION STRATEGY\n"
-    
-    if utilization > 85:
-        insights += "• Security Personnel: Deploy 100% of available staff immediately\n"
-        insights += "• Processing Lanes: All lanes must be operational\n"
-        insights += "• Customer Service: Position roaming agents in congested areas\n"
-        insights += "• Contingency: Activate overflow protocols and emergency procedures\n"
-    elif utilization > 70:
-        insights += "• Security Personnel: Increase to 85% staffing levels\n"
-        insights += "• Processing Lanes: Open additional lanes proactively\n"
-        insights += "• Customer Service: Enhanced presence at information desks\n"
-        insights += "• Contingency: Standby teams on 15-minute alert\n"
+    if BATCHING_ENABLED:
+        insights = await insights_batcher.submit(current_data, forecast_data)
     else:
-        insights += "• Security Personnel: Maintain standard staffing (65-75%)\n"
-        insights += "• Processing Lanes: Operate core lanes with flex capacity available\n"
-        insights += "• Customer Service: Standard service level\n"
-        insights += "• Contingency: Regular protocols in place\n"
-    
-    insights += f"""
-═══════════════════════════════════════════════════════════════
- Analysis Mode: Local Intelligence (Rule-Based Expert System)
- Generated: {current_data.get('timestamp', 'N/A')}
- Forecast Window: 6 hours | Data Points: {len(forecast_data)}
-═══════════════════════════════════════════════════════════════
-
-Note: This analysis uses advanced rule-based algorithms and ARIMA forecasting.
-For enhanced AI-powered insights with deep reasoning, Gemini 3 integration 
-is available when API services are operational.
+        insights = await call_gemini(build_insights_prompt(current_data, forecast_data))
+    if insights:
+        if cache_key:
+            insights_cache.set(cache_key, insights)
+        return insights
+    if cache_key:
+        insights_cache.release(cache_key)
+    return generate_fallback_insights(current_data, forecast_data)
+
+def build_structured_prompt(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]]
+) -> str:
+    """
+    Build a compact prompt for schema-constrained output
+    The forecast is sent as one line per point instead of indented JSON;
+    section sizes are stated as guidance only (see STRUCTURED_TOKEN_BUDGETS)
+    """
+    utilization = as_snapshot(current_data).utilization_rate
+    forecast_lines = "\n".join(
+        f"{p.get('timestamp')} {p.get('predicted_count')} {p.get('risk_level', '')}"
+        for p in forecast_points(forecast_data)
+    )
+    budgets = STRUCTURED_TOKEN_BUDGETS
+    
+    return f"""
+You are an airport operations analyst. Respond only with JSON matching the schema.
+
+CURRENT: count={current_data.get('cctv_count', 'N/A')} capacity={current_data.get('terminal_capacity', 'N/A')} utilization={utilization:.1f}% active_flights={current_data.get('active_flights', 'N/A')} time={current_data.get('timestamp', 'N/A')}
+
+FORECAST (timestamp predicted_count risk_level, 15-minute steps):
+{forecast_lines}
+
+LIMITS:
+- assessment: at most 2 sentences (~{budgets['assessment']} tokens)
+- risk_factors: at most 4 items (~{budgets['risk_factors']} tokens)
+- peak_windows: at most 3 items (~{budgets['peak_windows']} tokens)
+- actions: at most 6 items ordered by priority, horizon one of immediate, short_term, medium_term (~{budgets['actions']} tokens)
 """
+
+def render_structured_insights(insights: StructuredInsights) -> str:
+    """Plain-text rendering of structured insights for the gemini_insights field"""
+    lines = ["SITUATION ASSESSMENT", insights.assessment, "", "RISK FACTORS"]
+    lines.extend(f"• {r.factor} (likelihood {r.likelihood}, impact {r.impact})" for r in insights.risk_factors)
+    lines.extend(["", "PEAK WINDOWS"])
+    for window in insights.peak_windows:
+        span = f"{window.start} - {window.end}" if window.end else window.start
+        count = f", ~{window.expected_count:,} passengers" if window.expected_count is not None else ""
+        lines.append(f"• {span} ({window.risk_level}{count})")
+    if not insights.peak_windows:
+        lines.append("• No significant peaks forecasted")
+    lines.extend(["", "PRIORITIZED ACTIONS"])
+    for action in sorted(insights.actions, key=lambda a: a.priority):
+        lines.append(f"{action.priority}. [{action.horizon.upper()}] {action.action}")
+    return "\n".join(lines)
+
+def fallback_structured_insights(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]]
+) -> StructuredInsights:
+    """Structured insights from the local rule-based report"""
+    report = generate_fallback_report(current_data, forecast_data)
+    situation = report["situation"]
+    by_timestamp = {p.get('timestamp'): p for p in forecast_points(forecast_data)}
+    
+    peak_windows = []
+    for timestamp in report["peak_periods"]:
+        point = by_timestamp.get(timestamp, {})
+        peak_windows.append(PeakWindow(
+            start=timestamp,
+            expected_count=point.get('predicted_count'),
+            risk_level=point.get('risk_level', report["risk_level"]),
+        ))
     
-    return insights.strip()
+    actions = []
+    for horizon in ("immediate", "short_term", "medium_term"):
+        for action in report["actions"][horizon]:
+            actions.append(PrioritizedAction(priority=len(actions) + 1, horizon=horizon, action=action))
+    
+    likelihood = TREND_LIKELIHOOD.get(situation["trend"], "MEDIUM")
+    impact = SEVERITY_IMPACT.get(report["risk_level"], "MEDIUM")
+    return StructuredInsights(
+        assessment=(
+            f"Terminal utilization is {situation['utilization_rate']:.1f}% with a {situation['trend']} trend. "
+            f"{situation['description']}."
+        ),
+        risk_factors=[
+            RiskFactor(factor=factor, likelihood=likelihood, impact=impact)
+            for factor in report["risk_factors"]
+        ],
+        peak_windows=peak_windows,
+        actions=actions,
+        source="fallback",
+    )
 
-def analyze_congestion_trend(forecast_data: List[Dict[str, Any]]) -> str:
+async def generate_structured_insights(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]]
+) -> StructuredInsights:
     """
-    Analyze trend from forecast data with sophisticated logic
+    Generate schema-constrained insights with bounded output length
+    
+    Only the total length is enforced: max_output_tokens is the sum of the
+    per-section budgets, which the prompt merely asks the model to respect,
+    so one long section can use up another's share. A response cut off at
+    the limit fails validation and falls back like any other bad response.
+    Falls back to the structured local report when the circuit is open,
+    the call fails, or the response does not match the schema.
+    """
+    if not client_ready() or not circuit_breaker.can_attempt():
+        print(f"🔌 Circuit breaker {circuit_breaker.get_state()} - Using local analysis")
+        return fallback_structured_insights(current_data, forecast_data)
+    
+    config = {
+        'temperature': 0.3,
+        'top_p': 0.95,
+        'top_k': 40,
+        'response_mime_type': 'application/json',
+        'response_schema': StructuredInsights,
+        'max_output_tokens': sum(STRUCTURED_TOKEN_BUDGETS.values()),
+    }
+    text = await call_gemini(build_structured_prompt(current_data, forecast_data), config)
+    if text:
+        try:
+            insights = StructuredInsights.model_validate_json(text)
+            insights.source = "gemini"
+            return insights
+        except ValidationError as e:
+            print(f" Structured Gemini output did not match schema: {e.error_count()} errors")
+    return fallback_structured_insights(current_data, forecast_data)
+
+def insights_cache_key(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]]
+) -> str:
+    """
+    Cache key for an operational situation
+    Built from the current state, its 15-minute slot and the forecast risk path
+    (readings taken "now" within the same slot share a key)
     """
-    if not forecast_data or len(forecast_data) < 2:
+    parts = [
+        str(current_data.get('cctv_count')),
+        str(current_data.get('terminal_capacity')),
+        str(current_data.get('active_flights')),
+        _time_slot(current_data.get('timestamp')),
+        ",".join(
+            forecast_data.risk_levels.tolist() if isinstance(forecast_data, ForecastSeries)
+            else (str(point.get('risk_level', '')) for point in forecast_data)
+        ),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+def _time_slot(timestamp: Any) -> str:
+    """Timestamp floored to its 15-minute slot (unparseable values are kept as-is)"""
+    try:
+        moment = datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return str(timestamp)
+    return moment.replace(minute=moment.minute - moment.minute % 15, second=0, microsecond=0).isoformat()
+
+def _start_background_call(prompt: str, cache_key: str) -> asyncio.Task:
+    """
+    Start a Gemini call that fills the insights cache whenever it finishes
+    The task is registered as in flight for its cache key until every call for the key is done
+    """
+    task = asyncio.create_task(call_gemini(prompt))
+    _background_calls.add(task)
+    _inflight_calls.setdefault(cache_key, []).append(task)
+    
+    def _on_done(done: asyncio.Task):
+        _background_calls.discard(done)
+        tasks = _inflight_calls.get(cache_key)
+        if tasks is not None and all(t.done() for t in tasks):
+            del _inflight_calls[cache_key]
+        if not done.cancelled() and done.exception() is None and done.result():
+            insights_cache.set(cache_key, done.result())
+    
+    task.add_done_callback(_on_done)
+    return task
+
+async def _first_answer(tasks: List[asyncio.Task], timeout: float) -> Optional[str]:
+    """Wait until any task returns text, all tasks fail, or the timeout expires"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    pending = set(tasks)
+    while pending:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return None
+        done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None and task.result():
+                return task.result()
+    return None
+
+async def generate_budgeted_insights(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]],
+    budget: Optional[float] = None
+) -> Tuple[str, str]:
+    """
+    Generate insights within a latency budget
+    
+    Strategy:
+    1. Serve cached insights for a known situation
+    2. Call Gemini, waiting at most until the budget percentile of recent latencies
+    3. Optionally hedge with a second request at the hedge percentile (rate capped)
+    4. On deadline, return the rule-based fallback while the call finishes in the
+       background and fills the cache for the next caller
+    
+    Requests for a situation whose call is still running wait on that call
+    instead of starting another. At most GEMINI_MAX_BACKGROUND_CALLS calls
+    are outstanding; beyond that new situations get the fallback at once.
+    
+    Returns:
+        (insights, source) - source is one of cache, gemini, fallback
+    """
+    budget = budget if budget is not None else LATENCY_BUDGET
+    cache_key = insights_cache_key(current_data, forecast_data)
+    
+    cached = await insights_cache.fetch(cache_key)
+    if cached:
+        return cached, "cache"
+    
+    if not client_ready() or not circuit_breaker.can_attempt():
+        print(f"🔌 Circuit breaker {circuit_breaker.get_state()} - Using local analysis")
+        return generate_fallback_insights(current_data, forecast_data), "fallback"
+    
+    deadline = min(budget, latency_tracker.percentile(BUDGET_PERCENTILE, default=budget))
+    hedge_after = min(deadline, latency_tracker.percentile(HEDGE_PERCENTILE, default=deadline))
+    
+    prompt = build_insights_prompt(current_data, forecast_data)
+    tasks = _inflight_calls.get(cache_key)
+    if tasks is None:
+        if len(_background_calls) >= MAX_BACKGROUND_CALLS:
+            print(f" {len(_background_calls)} Gemini calls outstanding - Using local analysis")
+            return generate_fallback_insights(current_data, forecast_data), "fallback"
+        _start_background_call(prompt, cache_key)
+        tasks = _inflight_calls[cache_key]
+    
+    # asyncio.wait never cancels the shared tasks when this request gives up
+    insights = await _first_answer(list(tasks), hedge_after)
+    if insights is None and hedge_after < deadline and not all(task.done() for task in tasks):
+        if len(tasks) == 1 and len(_background_calls) < MAX_BACKGROUND_CALLS and hedge_rate_cap.try_acquire():
+            print(" Gemini slow - sending hedged request")
+            _start_background_call(prompt, cache_key)
+        insights = await _first_answer(list(tasks), deadline - hedge_after)
+    
+    if insights:
+        return insights, "gemini"
+    
+    print(f" Gemini exceeded {deadline:.2f}s budget - Using local analysis")
+    return generate_fallback_insights(current_data, forecast_data), "fallback"
+
+def generate_fallback_insights(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]]
+) -> str:
+    """
+    Generate intelligent local analysis when Gemini API is unavailable
+    Uses rule-based expert system for airport operations
+    """
+    counts = _forecast_counts(forecast_data)
+    trend = _trend_from_counts(counts)
+    peak_periods = _peaks_from_counts(counts, forecast_data)
+    return render_fallback_text(current_data, forecast_data, trend, peak_periods)
+
+def generate_fallback_report(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Structured version of the local analysis for programmatic consumers
+    """
+    counts = _forecast_counts(forecast_data)
+    trend = _trend_from_counts(counts)
+    peak_periods = _peaks_from_counts(counts, forecast_data)
+    return build_fallback_report(current_data, forecast_data, trend, peak_periods)
+
+def _forecast_counts(forecast_data: List[Dict[str, Any]]) -> List[int]:
+    return forecast_counts(forecast_data)
+
+def _trend_from_counts(counts: List[int]) -> str:
+    if len(counts) < 2:
         return "stable"
     
     # Use multiple data points for better trend analysis
-    first_third = forecast_data[:len(forecast_data)//3] if len(forecast_data) >= 3 else [forecast_data[0]]
-    last_third = forecast_data[-len(forecast_data)//3:] if len(forecast_data) >= 3 else [forecast_data[-1]]
+    first_third = counts[:len(counts)//3] if len(counts) >= 3 else [counts[0]]
+    last_third = counts[-len(counts)//3:] if len(counts) >= 3 else [counts[-1]]
     
-    avg_early = sum(d.get('predicted_count', 0) for d in first_third) / len(first_third)
-    avg_late = sum(d.get('predicted_count', 0) for d in last_third) / len(last_third)
+    avg_early = sum(first_third) / len(first_third)
+    avg_late = sum(last_third) / len(last_third)
     
     change_pct = ((avg_late - avg_early) / avg_early * 100) if avg_early > 0 else 0
     
-    if change_pct > 15:
-        return "increasing"
-    elif change_pct < -15:
-        return "decreasing"
-    else:
-        return "stable"
+    return get_rules().trend(change_pct)
 
-def identify_peak_periods(forecast_data: List[Dict[str, Any]]) -> List[str]:
-    """
-    Identify peak congestion periods from forecast with intelligent thresholds
-    """
-    peaks = []
-    if not forecast_data:
-        return peaks
+def _peaks_from_counts(counts: List[int], forecast_data: List[Dict[str, Any]]) -> List[str]:
+    if not counts:
+        return []
     
     # Calculate dynamic threshold (1.3x average for better peak detection)
-    avg_count = sum(d.get('predicted_count', 0) for d in forecast_data) / len(forecast_data)
-    threshold = avg_count * 1.3
+    threshold = sum(counts) / len(counts) * 1.3
     
-    for item in forecast_data:
-        if item.get('predicted_count', 0) > threshold:
-            peaks.append(item.get('timestamp', 'Unknown time'))
+    if isinstance(forecast_data, ForecastSeries):
+        # Timestamps are only formatted for the (at most 3) peak slots
+        peak_slots = [i for i, count in enumerate(counts) if count > threshold][:3]
+        return [forecast_data.timestamp(i) for i in peak_slots]
     
-    return peaks[:3]  # Return top 3 peaks
+    peaks = []
+    for count, item in zip(counts, forecast_data):
+        if count > threshold:
+            peaks.append(item.get('timestamp', 'Unknown time'))
+            if len(peaks) == 3:  # Return top 3 peaks
+                break
+    return peaks
+
+def analyze_congestion_trend(forecast_data: List[Dict[str, Any]]) -> str:
+    """
+    Analyze trend from forecast data with sophisticated logic
+    """
+    return _trend_from_counts(_forecast_counts(forecast_data))
+
+def identify_peak_periods(forecast_data: List[Dict[str, Any]]) -> List[str]:
+    """
+    Identify peak congestion periods from forecast with intelligent thresholds
+    """
+    return _peaks_from_counts(_forecast_counts(forecast_data), forecast_data)
 
 def get_circuit_breaker_status() -> Dict[str, Any]:
     """
@@ -0,0 +1,387 @@
+import os
+import time
+import asyncio
+import itertools
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ai.anomaly_detection import explain_incident
+from rules.engine import get_rules
+from snapshots import ForecastSeries, as_snapshot, forecast_points
+
+# Alerting configuration
+ALERT_LEVEL = os.getenv("ALERT_LEVEL", "HIGH")                       # risk level that opens an incident
+ALERT_HYSTERESIS = float(os.getenv("ALERT_HYSTERESIS", "5"))         # utilization points below a threshold to step down
+ALERT_DEBOUNCE = int(os.getenv("ALERT_DEBOUNCE", "2"))               # consecutive readings before a level change counts
+ALERT_DEDUPE_WINDOW = float(os.getenv("ALERT_DEDUPE_WINDOW", "300"))  # seconds
+ALERT_ESCALATION = os.getenv("ALERT_ESCALATION", "1") == "1"         # explain new incidents with Gemini
+ALERT_MAX_ZONES = int(os.getenv("ALERT_MAX_ZONES", "256"))           # zones tracked at once
+ALERT_HISTORY = 200
+SUBSCRIBER_QUEUE_SIZE = 100
+
+DEFAULT_ZONE = "MAIN"
+
+# Alerts that announce a new confirmed level for the zone
+LEVEL_KINDS = ("raised", "reopened", "escalated", "deescalated", "resolved", "changed")
+
+
+@dataclass
+class Alert:
+    """
+    One alert event
+
+    kind is raised / reopened / escalated / deescalated / resolved (incident lifecycle),
+    changed (a crossing below the alert level), predicted (the forecast
+    reaches the alert level) or explanation (the escalation result).
+    """
+    id: int
+    zone: str
+    kind: str
+    level: str
+    previous_level: Optional[str]
+    utilization_rate: float
+    timestamp: str
+    incident_id: Optional[int] = None
+    detail: Optional[str] = None
+    source: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class Incident:
+    """A period a zone spends at or above the alert level"""
+    id: int
+    zone: str
+    level: str
+    opened_at: float
+    closed_at: Optional[float] = None
+    explanation: Optional[str] = None
+    explanation_source: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class Subscription:
+    """Bounded alert queue of one subscriber; the oldest alert is dropped when it overflows"""
+    def __init__(self, zones: Optional[Iterable[str]] = None, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.zones = set(zones) if zones else None
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, alert: Alert) -> bool:
+        return self.zones is None or alert.zone in self.zones
+
+    def offer(self, alert: Alert):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(alert)
+
+    async def get(self) -> Alert:
+        return await self.queue.get()
+
+
+class AlertBus:
+    """
+    In-process pub/sub for alerts
+
+    publish never blocks: every matching subscriber gets the alert on its own
+    bounded queue, so a slow consumer only loses its own oldest alerts. Must
+    be used from the event loop thread.
+    """
+    def __init__(self, history: int = ALERT_HISTORY):
+        self.subscribers: List[Subscription] = []
+        self.history = deque(maxlen=history)
+        self.published = 0
+
+    def subscribe(self, zones: Optional[Iterable[str]] = None, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> Subscription:
+        subscription = Subscription(zones, maxsize)
+        self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+
+    def publish(self, alert: Alert):
+        self.history.append(alert)
+        self.published += 1
+        for subscription in self.subscribers:
+            if subscription.wants(alert):
+                subscription.offer(alert)
+
+    def recent(self, zone: Optional[str] = None, limit: int = 50) -> List[Alert]:
+        """Latest alerts, newest first"""
+        alerts = [alert for alert in reversed(self.history) if zone is None or alert.zone == zone]
+        return alerts[:limit]
+
+
+@dataclass
+class _ZoneState:
+    code: int = 0
+    pending_code: Optional[int] = None
+    pending_count: int = 0
+    incident: Optional[Incident] = None
+    last_incident: Optional[Incident] = None
+    predicted_code: Optional[int] = None
+    published_level: Optional[str] = None
+    last_sent: Dict[Tuple[str, str], float] = field(default_factory=dict)
+
+
+Explainer = Callable[[str, str, Mapping[str, Any], Any], Awaitable[Dict[str, str]]]
+
+
+class AlertEngine:
+    """
+    Risk-transition detection per zone
+
+    Each reading is classified on the active risk scale. A zone steps up as
+    soon as utilization passes a threshold, but only steps down once it is
+    `hysteresis` points below it; either change must hold for `debounce`
+    consecutive readings (a rise is confirmed at the lowest level seen during
+    the run). Reaching the alert level opens an incident, which is explained
+    once - by Gemini when available - in the background; escalations and
+    repeats within the incident reuse that explanation. An incident re-raised
+    within `dedupe_window` of being resolved is reopened (same id, no new
+    escalation) and announced as such. Every confirmed level change is
+    published; only alerts repeating what subscribers already know (the
+    zone's last published level, or the same predicted breach within the
+    window) are suppressed. At most `max_zones` zones are tracked; beyond
+    that the least recently observed zone without an open incident (or the
+    least recently observed one) is forgotten.
+
+    Args:
+        bus: Where alerts are published
+        alert_level: Risk level that opens an incident
+        hysteresis: Utilization points below a threshold needed to step down
+        debounce: Consecutive readings a level change must hold
+        dedupe_window: Seconds during which repeated alerts are suppressed
+        explain: Async explainer for new incidents; None disables escalation
+        max_zones: Zones tracked at once
+    """
+    def __init__(
+        self,
+        bus: AlertBus,
+        alert_level: str = ALERT_LEVEL,
+        hysteresis: float = ALERT_HYSTERESIS,
+        debounce: int = ALERT_DEBOUNCE,
+        dedupe_window: float = ALERT_DEDUPE_WINDOW,
+        explain: Optional[Explainer] = explain_incident,
+        max_zones: int = ALERT_MAX_ZONES
+    ):
+        if alert_level not in get_rules().risk.rank:
+            raise ValueError(f"Unknown alert level: {alert_level}")
+        self.bus = bus
+        self.alert_level = alert_level
+        self.hysteresis = hysteresis
+        self.debounce = max(1, debounce)
+        self.dedupe_window = dedupe_window
+        self.explain = explain
+        self.max_zones = max(1, max_zones)
+        self.zones: "OrderedDict[str, _ZoneState]" = OrderedDict()
+        self.evicted = 0
+        self.readings = 0
+        self.suppressed = 0
+        self.escalations = 0
+        self._ids = itertools.count(1)
+        self._incident_ids = itertools.count(1)
+        self._tasks = set()
+
+    def _zone(self, zone: str) -> _ZoneState:
+        """State of a zone, marked as most recently observed"""
+        state = self.zones.get(zone)
+        if state is None:
+            while len(self.zones) >= self.max_zones:
+                idle = next((name for name, s in self.zones.items() if s.incident is None), None)
+                self.zones.pop(idle if idle is not None else next(iter(self.zones)))
+                self.evicted += 1
+            state = self.zones[zone] = _ZoneState()
+        self.zones.move_to_end(zone)
+        return state
+
+    def _candidate(self, state: _ZoneState, utilization: float) -> int:
+        """Level the reading points to, with hysteresis on the way down"""
+        risk = get_rules().risk
+        code = risk.rank[risk.level(utilization)]
+        if code > state.code:
+            return code
+        return min(state.code, risk.rank[risk.level(utilization + self.hysteresis)])
+
+    def _debounced(self, state: _ZoneState, candidate: int) -> Optional[int]:
+        """Confirmed new level, or None while the change has not held long enough"""
+        if candidate == state.code:
+            state.pending_code, state.pending_count = None, 0
+            return None
+        rising = candidate > state.code
+        if state.pending_code is None or (state.pending_code > state.code) != rising:
+            state.pending_code, state.pending_count = candidate, 1
+        else:
+            state.pending_code = min(state.pending_code, candidate) if rising else max(state.pending_code, candidate)
+            state.pending_count += 1
+        if state.pending_count < self.debounce:
+            return None
+        confirmed = state.pending_code
+        state.pending_code, state.pending_count = None, 0
+        return confirmed
+
+    def observe(
+        self,
+        current_data: Mapping[str, Any],
+        forecast_data: Any = None,
+        zone: str = DEFAULT_ZONE
+    ) -> List[Alert]:
+        """
+        Feed one reading (and optionally its forecast) for a zone
+
+        Cheap and synchronous; any Gemini escalation runs as a background task
+        when called from the event loop.
+
+        Returns:
+            Alerts published for this reading
+        """
+        risk = get_rules().risk
+        snapshot = as_snapshot(current_data)
+        state = self._zone(zone)
+        self.readings += 1
+        alert_code = risk.rank[self.alert_level]
+        alerts = []
+
+        previous = state.code
+        confirmed = self._debounced(state, self._candidate(state, snapshot.utilization_rate))
+        if confirmed is not None:
+            state.code = confirmed
+            alerts.extend(self._transition(state, zone, snapshot, forecast_data, previous, confirmed, alert_code))
+
+        if forecast_data is not None:
+            alert = self._forecast_alert(state, zone, snapshot, forecast_data, alert_code)
+            if alert:
+                alerts.append(alert)
+        return [alert for alert in alerts if alert is not None]
+
+    def _transition(self, state, zone, snapshot, forecast_data, previous: int, code: int, alert_code: int):
+        levels = get_rules().risk.levels
+        level, previous_level = str(levels[code]), str(levels[previous])
+        if previous < alert_code <= code:
+            reopen = state.last_incident
+            if reopen and time.time() - reopen.closed_at < self.dedupe_window:
+                reopen.closed_at, reopen.level = None, level
+                state.incident, state.last_incident = reopen, None
+                return [self._emit(state, zone, "reopened", level, previous_level, snapshot)]
+            state.incident = Incident(next(self._incident_ids), zone, level, time.time())
+            state.predicted_code = None
+            self._escalate(state.incident, snapshot, forecast_data)
+            return [self._emit(state, zone, "raised", level, previous_level, snapshot)]
+        if code < alert_code <= previous:
+            incident = state.incident
+            alert = self._emit(state, zone, "resolved", level, previous_level, snapshot)
+            if incident:
+                incident.closed_at = time.time()
+                state.incident, state.last_incident = None, incident
+            return [alert]
+        if code >= alert_code:
+            if state.incident:
+                state.incident.level = level if code > previous else state.incident.level
+            return [self._emit(state, zone, "escalated" if code > previous else "deescalated",
+                               level, previous_level, snapshot)]
+        return [self._emit(state, zone, "changed", level, previous_level, snapshot)]
+
+    def _forecast_alert(self, state, zone, snapshot, forecast_data, alert_code: int) -> Optional[Alert]:
+        """One predicted alert per forecast breach (or worse breach) while no incident is open"""
+        risk = get_rules().risk
+        if isinstance(forecast_data, ForecastSeries):
+            codes = forecast_data.risk_codes
+        else:
+            codes = np.array([risk.rank.get(point.get("risk_level"), 0) for point in forecast_points(forecast_data)])
+        breaches = np.flatnonzero(codes >= alert_code)
+        if not breaches.shape[0]:
+            state.predicted_code = None
+            return None
+        peak = int(codes.max())
+        if state.incident or (state.predicted_code is not None and peak <= state.predicted_code):
+            return None
+        state.predicted_code = peak
+        first = forecast_data[int(breaches[0])]
+        return self._emit(state, zone, "predicted", str(risk.levels[peak]), None, snapshot,
+                          detail=f"{first['risk_level']} expected from {first['timestamp']}")
+
+    def _emit(self, state, zone, kind, level, previous_level, snapshot, detail=None, source=None,
+              incident: Optional[Incident] = None) -> Optional[Alert]:
+        """
+        Publish unless it only repeats what subscribers already know
+
+        Level alerts are suppressed only when the level equals the zone's last
+        published level; predicted alerts when the same breach level was sent
+        within the dedupe window. Explanations are always published.
+        """
+        now = time.time()
+        if kind in LEVEL_KINDS:
+            if level == state.published_level:
+                self.suppressed += 1
+                return None
+            state.published_level = level
+        elif kind == "predicted":
+            key = (kind, level)
+            if now - state.last_sent.get(key, float("-inf")) < self.dedupe_window:
+                self.suppressed += 1
+                return None
+            state.last_sent[key] = now
+        incident = incident or state.incident
+        alert = Alert(next(self._ids), zone, kind, level, previous_level, round(snapshot.utilization_rate, 2),
+                      str(snapshot.timestamp), incident.id if incident else None, detail, source, now)
+        self.bus.publish(alert)
+        return alert
+
+    def _escalate(self, incident: Incident, snapshot, forecast_data):
+        """Explain a new incident once, in the background"""
+        if self.explain is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.escalations += 1
+        task = loop.create_task(self._explain(incident, snapshot, forecast_data))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, incident: Incident, snapshot, forecast_data):
+        try:
+            result = await self.explain(incident.zone, incident.level, snapshot, forecast_data)
+        except Exception as e:
+            print(f" Incident explanation failed: {e}")
+            return
+        incident.explanation, incident.explanation_source = result["explanation"], result["source"]
+        state = self.zones.get(incident.zone)
+        if state is not None:
+            self._emit(state, incident.zone, "explanation", incident.level, None, snapshot,
+                       detail=incident.explanation, source=incident.explanation_source, incident=incident)
+
+    def open_incidents(self) -> List[Incident]:
+        return [state.incident for state in self.zones.values() if state.incident]
+
+    def get_status(self) -> Dict[str, Any]:
+        levels = get_rules().risk.levels
+        return {
+            "alert_level": self.alert_level,
+            "hysteresis": self.hysteresis,
+            "debounce": self.debounce,
+            "dedupe_window": self.dedupe_window,
+            "readings": self.readings,
+            "published": self.bus.published,
+            "suppressed": self.suppressed,
+            "escalations": self.escalations,
+            "evicted": self.evicted,
+            "subscribers": len(self.bus.subscribers),
+            "zones": {zone: str(levels[state.code]) for zone, state in self.zones.items()},
+        }
+
+
+alert_bus = AlertBus()
+alert_engine = AlertEngine(alert_bus, explain=explain_incident if ALERT_ESCALATION else None)
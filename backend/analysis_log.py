@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, List, Mapping, Optional
+
+# Append-only store of every analysis served by /analyze and /simulate
+ANALYSIS_LOG_ENABLED = os.getenv("ANALYSIS_LOG", "1") == "1"
+ANALYSIS_DB_PATH = os.getenv("ANALYSIS_DB_PATH", os.path.join(os.path.dirname(__file__), "analysis_log.sqlite3"))
+QUEUE_SIZE = int(os.getenv("ANALYSIS_LOG_QUEUE_SIZE", "1000"))
+BATCH_SIZE = int(os.getenv("ANALYSIS_LOG_BATCH_SIZE", "100"))
+FLUSH_INTERVAL = float(os.getenv("ANALYSIS_LOG_FLUSH_INTERVAL", "0.5"))  # seconds
+
+DEFAULT_TERMINAL = "MAIN"
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS analyses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        logged_at REAL NOT NULL,
+        terminal_id TEXT NOT NULL,
+        state_time TEXT NOT NULL,
+        endpoint TEXT NOT NULL,
+        risk_level TEXT,
+        utilization_rate REAL,
+        insights_source TEXT,
+        response TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_analyses_terminal_time ON analyses (terminal_id, state_time)",
+    "CREATE INDEX IF NOT EXISTS idx_analyses_time ON analyses (state_time)",
+)
+INSERT = (
+    "INSERT INTO analyses (logged_at, terminal_id, state_time, endpoint, risk_level, "
+    "utilization_rate, insights_source, response) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SUMMARY_COLUMNS = ("id", "logged_at", "terminal_id", "state_time", "endpoint", "risk_level",
+                   "utilization_rate", "insights_source")
+
+_STOP = object()
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Connection in WAL mode so readers never block the writer (or each other)"""
+    connection = sqlite3.connect(path, timeout=5.0)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class AnalysisLog:
+    """
+    Write-behind analysis log backed by SQLite
+
+    Request handlers call `record`, which only puts a row on a bounded
+    in-memory queue and never touches the disk; when the queue is full the
+    row is dropped and counted rather than making the request wait. A single
+    background thread drains the queue and commits rows in batched
+    transactions (up to `batch_size` rows or `flush_interval` seconds).
+
+    Args:
+        path: SQLite database file
+        queue_size: Maximum rows waiting to be written
+        batch_size: Maximum rows per transaction
+        flush_interval: Longest a row waits for its batch to fill
+    """
+    def __init__(self, path: str = ANALYSIS_DB_PATH, queue_size: int = QUEUE_SIZE,
+                 batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Create the schema and start the writer thread (idempotent)"""
+        with self._lock:
+            if self.running:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = connect(self.path)
+            try:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+                connection.commit()
+            finally:
+                connection.close()
+            self.thread = threading.Thread(target=self._run, name="analysis-log-writer", daemon=True)
+            self.thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def stop(self, timeout: float = 5.0):
+        """Flush queued rows and stop the writer thread"""
+        if not self.running:
+            return
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+
+    def record(
+        self,
+        endpoint: str,
+        current_data: Mapping[str, Any],
+        risk_level: str,
+        response: bytes,
+        terminal_id: Optional[str] = None,
+        insights_source: Optional[str] = None
+    ) -> bool:
+        """
+        Queue one served analysis for writing
+
+        Args:
+            endpoint: Endpoint that produced the response
+            current_data: Operational state the analysis was run on
+            risk_level: Overall risk level of the response
+            response: Encoded JSON response body, stored as-is
+            terminal_id: Terminal the analysis belongs to
+            insights_source: Where the insights came from (gemini, cache, fallback...)
+
+        Returns:
+            False if the row was not queued (writer not running or queue full)
+        """
+        if not self.running:
+            return False
+        row = (
+            time.time(),
+            terminal_id or DEFAULT_TERMINAL,
+            str(current_data.get("timestamp")),
+            endpoint,
+            risk_level,
+            current_data.get("utilization_rate"),
+            insights_source,
+            response.decode("utf-8") if isinstance(response, bytes) else response,
+        )
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def _next_batch(self) -> List[Any]:
+        """Block for the first row, then collect more until the batch is full or the interval passes"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        connection = connect(self.path)
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                rows = [row for row in batch if row is not _STOP]
+                if rows:
+                    try:
+                        with connection:  # one transaction per batch
+                            connection.executemany(INSERT, rows)
+                        self.written += len(rows)
+                        self.batches += 1
+                    except sqlite3.Error as e:
+                        self.errors += 1
+                        print(f" Analysis log write failed ({len(rows)} rows dropped): {e}")
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def query(
+        self,
+        terminal_id: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        limit: int = 50,
+        include_response: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Logged analyses, newest state first
+
+        `start` / `end` bound the state timestamp (ISO strings compare in
+        time order). Rows still waiting in the queue are not visible yet.
+        """
+        columns = SUMMARY_COLUMNS + (("response",) if include_response else ())
+        clauses, params = [], []
+        for clause, value in (("terminal_id = ?", terminal_id), ("state_time >= ?", start),
+                              ("state_time <= ?", end), ("risk_level = ?", risk_level),
+                              ("endpoint = ?", endpoint)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        sql = f"SELECT {', '.join(columns)} FROM analyses"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY state_time DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        if not os.path.exists(self.path):
+            return []
+        connection = connect(self.path)
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+        results = []
+        for row in rows:
+            entry = dict(zip(columns, row))
+            if include_response:
+                entry["response"] = json.loads(entry["response"])
+            results.append(entry)
+        return results
+
+    def get_response(self, analysis_id: int) -> Optional[str]:
+        """Stored response body of one analysis, exactly as it was served"""
+        if not os.path.exists(self.path):
+            return None
+        connection = connect(self.path)
+        try:
+            row = connection.execute("SELECT response FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        finally:
+            connection.close()
+        return row[0] if row else None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "enabled": ANALYSIS_LOG_ENABLED,
+            "running": self.running,
+            "queued": self.queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+analysis_log = AnalysisLog()
@@ -1,20 +1,63 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
 
 from data_ingestion.cctv import get_cctv_data
 from data_ingestion.aodb import get_aodb_data
 from data_ingestion.capacity import get_capacity_data
-from fusion.merge import merge_data
-from forecasting.arima import forecast_congestion
-from ai.gemini_reasoning import generate_gemini_insights
+from fusion.merge import merge_snapshot
+from forecasting.arima import forecast_series, calculate_trend
+from forecasting.incremental import incremental_forecaster, DEFAULT_ZONE
+from forecasting.probabilistic import probabilistic_forecast, parse_quantiles
+from forecasting.queueing import zone_queue_forecasts
+from ai.gemini_reasoning import (
+    generate_gemini_insights,
+    generate_fallback_insights,
+    generate_budgeted_insights,
+    generate_structured_insights,
+    fallback_structured_insights,
+    render_structured_insights,
+    call_gemini,
+    warm_up_client,
+    LATENCY_BUDGET,
+    OUTPUT_MODE,
+)
+from admission import admission_controller
+from alerting import alert_bus, alert_engine, DEFAULT_ZONE as ALERT_DEFAULT_ZONE
+from analysis_log import analysis_log, ANALYSIS_LOG_ENABLED
+from heatmap import heatmap_payload, payload_tag, state_version
+from rules.engine import get_rules
+from scenarios import evaluate_scenarios, build_summary_prompt, local_summary
+from schemas import ForecastResponse, ProbabilisticForecast, ScenarioRequest
+from serialization import FastJSONResponse, ResponseOptions, forecast_json_response
+from shared_state import shared_state, SHARED_STATE_ENABLED
+from snapshots import as_snapshot
 
 load_dotenv()
 
-app = FastAPI(title="Airport Congestion Prediction API")
+# Build the Gemini client in the background after startup; /health is served
+# immediately and the first insight request does not pay for the import
+WARM_UP_CLIENT = os.getenv("GEMINI_WARM_UP", "1") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up = asyncio.create_task(warm_up_client()) if WARM_UP_CLIENT else None
+    if ANALYSIS_LOG_ENABLED:
+        analysis_log.start()
+    yield
+    if warm_up and not warm_up.done():
+        warm_up.cancel()
+    # Flush analyses still waiting in the write-behind queue
+    await asyncio.to_thread(analysis_log.stop)
+
+app = FastAPI(title="Airport Congestion Prediction API", lifespan=lifespan)
 origins = [
     "https://airflow-ai.onrender.com",
     "http://localhost:5173",
@@ -35,13 +78,7 @@ class ManualDataInput(BaseModel):
     terminal_capacity: int
     flight_schedule: Dict[str, Any]
     timestamp: str
-
-class ForecastResponse(BaseModel):
-    current_metrics: Dict[str, Any]
-    forecast: List[Dict[str, Any]]
-    gemini_insights: str
-    risk_level: str
-    recommendations: List[str]
+    terminal_id: Optional[str] = None
 
 @app.get("/")
 async def root():
@@ -51,8 +88,72 @@ async def root():
 async def health_check():
     return {"status": "healthy", "gemini_configured": bool(os.getenv("GEMINI_API_KEY"))}
 
-@app.post("/analyze", response_model=ForecastResponse)
-async def analyze_congestion(data: ManualDataInput):
+@app.get("/admission")
+async def admission_status():
+    """Current concurrency and queue depth per endpoint"""
+    return admission_controller.get_status()
+
+async def admitted_insights(endpoint: str, priority: Optional[str],
+                            merged_data: Dict[str, Any], forecast_result: List[Dict[str, Any]]):
+    """
+    Generate insights through admission control
+
+    When the endpoint is saturated the request degrades to the rule-based
+    fallback instead of queueing for Gemini. With GEMINI_LATENCY_BUDGET set,
+    admitted requests use the latency-budgeted mode; with
+    GEMINI_OUTPUT_MODE=structured they get schema-constrained insights.
+
+    Returns:
+        (insights text, structured insights or None, response headers)
+    """
+    source = None
+    structured = None
+    async with admission_controller.admit(endpoint, priority) as ticket:
+        if OUTPUT_MODE == "structured":
+            if ticket.granted:
+                structured = await generate_structured_insights(merged_data, forecast_result)
+            else:
+                structured = fallback_structured_insights(merged_data, forecast_result)
+            insights = render_structured_insights(structured)
+            source = structured.source
+        elif not ticket.granted:
+            insights = generate_fallback_insights(merged_data, forecast_result)
+        elif LATENCY_BUDGET > 0:
+            insights, source = await generate_budgeted_insights(merged_data, forecast_result)
+        else:
+            insights = await generate_gemini_insights(merged_data, forecast_result)
+    headers = ticket.headers()
+    if source:
+        headers["X-Insights-Source"] = source
+    return insights, structured, headers
+
+def response_options(
+    fields: Optional[str] = Query(default=None, description="e.g. forecast,risk_level or forecast.timestamp,forecast.risk_level"),
+    horizon: Optional[str] = Query(default=None, description="Forecast horizon, e.g. 2h or 90m (default 6h)"),
+    step: Optional[str] = Query(default=None, description="Forecast resolution, e.g. 30m or 1h (default 15m)"),
+    include_insights: bool = Query(default=True, description="false skips insight generation entirely")
+) -> ResponseOptions:
+    """Field projection and resolution query parameters shared by /analyze and /simulate"""
+    try:
+        return ResponseOptions.from_query(fields, horizon, step, include_insights)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def requested_insights(options: ResponseOptions, endpoint: str, priority: Optional[str],
+                             merged_data: Dict[str, Any], forecast_result: List[Dict[str, Any]]):
+    """admitted_insights, or nothing at all (no LLM call) when the client does not want insights"""
+    if not options.wants_insights:
+        return None, None, {"X-Insights-Source": "skipped"}
+    return await admitted_insights(endpoint, priority, merged_data, forecast_result)
+
+def structured_recommendations(structured) -> List[str]:
+    """Recommendations taken from the prioritized structured actions"""
+    return [action.action for action in sorted(structured.actions, key=lambda a: a.priority)]
+
+@app.post("/analyze", response_model=ForecastResponse, response_class=FastJSONResponse)
+async def analyze_congestion(data: ManualDataInput,
+                             options: ResponseOptions = Depends(response_options),
+                             x_priority_class: Optional[str] = Header(default=None)):
     """
     Main endpoint to analyze congestion with manual data input
     """
@@ -63,38 +164,52 @@ async def analyze_congestion(data: ManualDataInput):
         capacity_data = {"terminal_capacity": data.terminal_capacity}
 
         # Step 2: Merge data
-        merged_data = merge_data(cctv_data, aodb_data, capacity_data)
+        merged_data = merge_snapshot(cctv_data, aodb_data, capacity_data)
 
         # Step 3: Generate forecast
-        forecast_result = forecast_congestion(merged_data)
+        forecast_result = forecast_series(merged_data, steps=options.horizon_slots)
 
-        # Step 4: Get Gemini AI insights
-        gemini_insights = await generate_gemini_insights(merged_data, forecast_result)
+        # Step 4: Get Gemini AI insights (degrades to local analysis under load)
+        gemini_insights, structured, headers = await requested_insights(
+            options, "analyze", x_priority_class, merged_data, forecast_result
+        )
 
         # Step 5: Calculate risk level
         risk_level = calculate_risk_level(merged_data, forecast_result)
 
         # Step 6: Generate recommendations
-        recommendations = generate_recommendations(risk_level, forecast_result)
-
-        return ForecastResponse(
-            current_metrics={
-                "cctv_count": data.cctv_count,
-                "terminal_capacity": data.terminal_capacity,
-                "utilization_rate": (data.cctv_count / data.terminal_capacity) * 100,
-                "timestamp": data.timestamp
-            },
-            forecast=forecast_result,
+        if structured:
+            recommendations = structured_recommendations(structured)
+        else:
+            recommendations = generate_recommendations(risk_level, forecast_result)
+
+        response = forecast_json_response(
+            current_metrics=merged_data,
+            forecast=forecast_result.resample(options.step_slots),
             gemini_insights=gemini_insights,
             risk_level=risk_level,
-            recommendations=recommendations
+            recommendations=recommendations,
+            structured_insights=structured.model_dump() if structured else None,
+            headers=headers,
+            fields=options.fields,
+            point_fields=options.point_fields
         )
+        # Latest state for every worker (one small memory copy, no I/O)
+        shared_state.publish(merged_data, forecast_result)
+        # Risk-transition alerts (Gemini is only asked for new incidents)
+        alert_engine.observe(merged_data, forecast_result, data.terminal_id or ALERT_DEFAULT_ZONE)
+        # Write-behind: only queues the encoded body, never waits on disk
+        analysis_log.record("analyze", merged_data, risk_level, response.body,
+                            data.terminal_id, headers.get("X-Insights-Source"))
+        return response
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/simulate")
-async def get_simulated_data():
+@app.get("/simulate", response_model=ForecastResponse, response_class=FastJSONResponse)
+async def get_simulated_data(terminal_id: Optional[str] = None,
+                             options: ResponseOptions = Depends(response_options),
+                             x_priority_class: Optional[str] = Header(default=None)):
     """
     Endpoint to get simulated data for demo purposes
     """
@@ -105,68 +220,298 @@ async def get_simulated_data():
         capacity_data = get_capacity_data()
 
         # Merge
-        merged_data = merge_data(cctv_data, aodb_data, capacity_data)
+        merged_data = merge_snapshot(cctv_data, aodb_data, capacity_data)
 
         # Forecast
-        forecast_result = forecast_congestion(merged_data)
+        forecast_result = forecast_series(merged_data, steps=options.horizon_slots)
 
-        # Gemini insights
-        gemini_insights = await generate_gemini_insights(merged_data, forecast_result)
+        # Gemini insights (degrades to local analysis under load)
+        gemini_insights, structured, headers = await requested_insights(
+            options, "simulate", x_priority_class, merged_data, forecast_result
+        )
 
         risk_level = calculate_risk_level(merged_data, forecast_result)
-        recommendations = generate_recommendations(risk_level, forecast_result)
+        if structured:
+            recommendations = structured_recommendations(structured)
+        else:
+            recommendations = generate_recommendations(risk_level, forecast_result)
 
-        return ForecastResponse(
+        response = forecast_json_response(
             current_metrics=merged_data,
-            forecast=forecast_result,
+            forecast=forecast_result.resample(options.step_slots),
             gemini_insights=gemini_insights,
             risk_level=risk_level,
-            recommendations=recommendations
+            recommendations=recommendations,
+            structured_insights=structured.model_dump() if structured else None,
+            headers=headers,
+            fields=options.fields,
+            point_fields=options.point_fields
+        )
+        # Latest state for every worker (one small memory copy, no I/O)
+        shared_state.publish(merged_data, forecast_result)
+        # Write-behind: only queues the encoded body, never waits on disk
+        analysis_log.record("simulate", merged_data, risk_level, response.body,
+                            terminal_id, headers.get("X-Insights-Source"))
+        return response
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/state")
+async def latest_state(since: Optional[int] = Query(default=None, description="Version already held by the client"),
+                       if_none_match: Optional[str] = Header(default=None)):
+    """
+    Latest fused snapshot and forecast published by any worker
+    Reads are lock-free; the ETag is the state version, so pollers get 304 until it changes
+    """
+    version = shared_state.version
+    tag = f'"state-{version}"'
+    if version and (if_none_match == tag or since == version):
+        return Response(status_code=304, headers={"ETag": tag})
+    reading = shared_state.read()
+    if reading is None:
+        raise HTTPException(status_code=404, detail="No state published yet")
+    return FastJSONResponse(content={
+        "version": reading.version,
+        "updated_at": reading.updated_at,
+        "writer_pid": reading.writer_pid,
+        "shared": SHARED_STATE_ENABLED,
+        "current_metrics": reading.snapshot.to_dict(),
+        "forecast": reading.forecast.to_points(),
+        "risk_level": reading.snapshot.congestion_level,
+    }, headers={"ETag": f'"state-{reading.version}"'})
+
+@app.post("/forecast/probabilistic", response_model=ProbabilisticForecast, response_class=FastJSONResponse)
+async def forecast_probabilistic(
+    data: ManualDataInput,
+    paths: int = Query(default=5000, ge=100, le=100000),
+    seed: Optional[int] = None,
+    quantiles: Optional[str] = Query(default=None, description="e.g. 10,50,90")
+):
+    """
+    Monte Carlo forecast with quantile bands and risk exceedance probabilities
+    Identical input (and seed) always yields identical bands
+    """
+    try:
+        quantile_list = parse_quantiles(quantiles)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        merged_data = merge_snapshot(
+            {"count": data.cctv_count, "timestamp": data.timestamp},
+            data.flight_schedule,
+            {"terminal_capacity": data.terminal_capacity}
+        )
+        return FastJSONResponse(content=probabilistic_forecast(
+            merged_data, n_paths=paths, quantiles=quantile_list, seed=seed
+        ))
+
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/forecast/incremental")
+async def forecast_incremental(data: ManualDataInput, include_forecast: bool = False):
+    """
+    Fold a new reading into the zone's rolling forecast (zone = terminal_id)
+    Returns only what changed since the zone's previous reading: shifted-out slots,
+    changed and added points and risk transitions; include_forecast adds the full horizon
+    """
+    try:
+        merged_data = merge_snapshot(
+            {"count": data.cctv_count, "timestamp": data.timestamp},
+            data.flight_schedule,
+            {"terminal_capacity": data.terminal_capacity}
         )
+        forecast_result, diff = incremental_forecaster.update(merged_data, data.terminal_id or DEFAULT_ZONE)
+        alerts = alert_engine.observe(merged_data, forecast_result, diff.zone)
+        return FastJSONResponse(content={
+            "zone": diff.zone,
+            "version": diff.version,
+            "risk_level": calculate_risk_level(merged_data, forecast_result),
+            "diff": diff.to_dict(),
+            "alerts": [alert.to_dict() for alert in alerts],
+            "forecast": forecast_result.to_points() if include_forecast or diff.full else None,
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/alerts")
+async def list_alerts(zone: Optional[str] = None, limit: int = Query(default=50, ge=1, le=200)):
+    """Recent alerts (newest first), open incidents and detector counters"""
+    return FastJSONResponse(content={
+        "alerts": [alert.to_dict() for alert in alert_bus.recent(zone, limit)],
+        "incidents": [incident.to_dict() for incident in alert_engine.open_incidents()
+                      if zone is None or incident.zone == zone],
+        "status": alert_engine.get_status(),
+    })
+
+@app.get("/alerts/stream")
+async def stream_alerts(request: Request, zone: Optional[str] = None):
+    """
+    Server-sent events: one `alert` event per published alert
+    Subscribers have bounded queues; a slow client loses its oldest alerts, never blocks detection
+    """
+    subscription = alert_bus.subscribe([zone] if zone else None)
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    alert = await asyncio.wait_for(subscription.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: alert\nid: {alert.id}\ndata: {json.dumps(alert.to_dict())}\n\n"
+        finally:
+            alert_bus.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/analyses")
+async def list_analyses(
+    terminal_id: Optional[str] = None,
+    start: Optional[str] = Query(default=None, description="ISO timestamp, inclusive"),
+    end: Optional[str] = Query(default=None, description="ISO timestamp, inclusive"),
+    risk_level: Optional[str] = None,
+    endpoint: Optional[str] = Query(default=None, pattern="^(analyze|simulate)$"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    include_response: bool = False
+):
+    """
+    Past analyses from the append-only log, newest first
+    Filter by terminal and state time range; include_response adds the full stored responses
+    """
+    try:
+        analyses = await asyncio.to_thread(
+            analysis_log.query, terminal_id, start, end, risk_level, endpoint, limit, include_response
+        )
+        return FastJSONResponse(content={"count": len(analyses), "analyses": analyses})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analyses/status")
+async def analysis_log_status():
+    """Write-behind queue depth and writer counters"""
+    return analysis_log.get_status()
+
+@app.get("/analyses/{analysis_id}")
+async def get_analysis(analysis_id: int):
+    """One logged analysis, returned exactly as it was served"""
+    body = await asyncio.to_thread(analysis_log.get_response, analysis_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return Response(content=body, media_type="application/json")
+
+@app.post("/heatmap")
+async def congestion_heatmap(
+    data: ManualDataInput,
+    format: str = Query(default="binary", pattern="^(binary|json)$"),
+    hours: int = Query(default=6, ge=1, le=24),
+    step: int = Query(default=15, ge=15, le=360, description="Minutes per column, multiple of 15"),
+    agg: str = Query(default="max", pattern="^(max|mean)$"),
+    level: str = Query(default="HIGH"),
+    paths: int = Query(default=2000, ge=100, le=20000),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    Zone x time utilization, risk code and exceedance matrices
+    Binary responses are typed-array payloads (see heatmap.encode_binary); results are cached per state version
+    """
+    options = {"hours": hours, "step_minutes": step, "agg": agg, "level": level, "n_paths": paths}
+    try:
+        merged_data = merge_snapshot(
+            {"count": data.cctv_count, "timestamp": data.timestamp},
+            data.flight_schedule,
+            {"terminal_capacity": data.terminal_capacity}
+        )
+        tag = payload_tag(state_version(merged_data), format, options)
+        if if_none_match == tag:
+            return Response(status_code=304, headers={"ETag": tag})
+        tag, payload = heatmap_payload(merged_data, format, **options)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = {"ETag": tag}
+    if format == "json":
+        return FastJSONResponse(content=payload, headers=headers)
+    return Response(content=payload, media_type="application/octet-stream", headers=headers)
+
+@app.get("/simulate/queues")
+async def simulate_security_queues(
+    mode: str = Query(default="analytic", pattern="^(analytic|discrete)$"),
+    zones: int = Query(default=1, ge=1, le=50),
+    replications: int = Query(default=200, ge=10, le=2000),
+    seed: Optional[int] = None,
+    workers: int = Query(default=1, ge=1, le=8, description="Threads for discrete replications")
+):
+    """
+    Predicted security queue lengths and wait times per 15-minute slot
+    Uses simulated data and active lane counts for each zone; the queue
+    model runs in a worker thread so the event loop stays responsive
+    """
+    try:
+        zone_forecasts = []
+        zone_capacities = []
+        for _ in range(zones):
+            capacity_data = get_capacity_data()
+            merged_data = merge_snapshot(get_cctv_data(), get_aodb_data(), capacity_data)
+            zone_forecasts.append(forecast_series(merged_data))
+            zone_capacities.append(capacity_data)
+
+        options = {"replications": replications, "seed": seed, "workers": workers} if mode == "discrete" else {}
+        queues = await asyncio.to_thread(zone_queue_forecasts, zone_forecasts, zone_capacities, mode=mode, **options)
+        return FastJSONResponse(content={
+            "mode": mode,
+            "zones": [
+                {"zone": f"Z{i + 1}", "security_lanes_active": capacity["security_lanes_active"], "slots": slots}
+                for i, (capacity, slots) in enumerate(zip(zone_capacities, queues))
+            ]
+        })
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/scenarios")
+async def compare_scenarios(request: ScenarioRequest,
+                            x_priority_class: Optional[str] = Header(default=None)):
+    """
+    Evaluate what-if lane, capacity, delay and count scenarios in one batch
+    Scenarios are ranked without the LLM; include_summary adds one Gemini summary of the best options
+    """
+    try:
+        comparison = await asyncio.to_thread(
+            evaluate_scenarios, request.base, request.scenarios, seed=request.seed
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = None
+    if request.include_summary:
+        summary = None
+        async with admission_controller.admit("scenarios", x_priority_class) as ticket:
+            if ticket.granted:
+                summary = await call_gemini(build_summary_prompt(comparison))
+        comparison["summary"] = summary.strip() if summary else local_summary(comparison)
+        comparison["summary_source"] = "gemini" if summary else "fallback"
+        headers = ticket.headers()
+
+    return FastJSONResponse(content=comparison, headers=headers)
+
 def calculate_risk_level(current_data: Dict, forecast: List[Dict]) -> str:
     """Calculate risk level based on current and forecasted data"""
-    utilization = (current_data.get("cctv_count", 0) /
-                   current_data.get("terminal_capacity", 1)) * 100
-
-    if utilization > 90:
-        return "CRITICAL"
-    elif utilization > 75:
-        return "HIGH"
-    elif utilization > 50:
-        return "MEDIUM"
-    else:
-        return "LOW"
+    return as_snapshot(current_data).congestion_level
 
 def generate_recommendations(risk_level: str, forecast: List[Dict]) -> List[str]:
-    """Generate actionable recommendations based on risk level"""
-    recommendations = []
-
-    if risk_level == "CRITICAL":
-        recommendations.extend([
-            "Immediately activate overflow protocols",
-            "Deploy additional security personnel",
-            "Consider flight gate reassignments",
-            "Implement crowd control measures"
-        ])
-    elif risk_level == "HIGH":
-        recommendations.extend([
-            "Alert staff to prepare for increased passenger flow",
-            "Monitor queues closely at security checkpoints",
-            "Prepare backup resources"
-        ])
-    elif risk_level == "MEDIUM":
-        recommendations.extend([
-            "Continue standard monitoring procedures",
-            "Be prepared to scale up resources if needed"
-        ])
-    else:
-        recommendations.append("Normal operations - continue monitoring")
-
-    return recommendations
+    """Generate actionable recommendations based on risk level and forecast trend"""
+    return get_rules().get_recommendations(risk_level, calculate_trend(forecast))
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,194 @@
+"""
+Benchmark outage-mode insights throughput
+
+During a Gemini outage generate_fallback_insights is the whole insights
+path, so its per-call cost bounds /analyze throughput. Compares the
+previous renderer (string concatenation on every call, kept below as
+legacy_fallback_insights) with the memoized templates in
+ai/fallback_renderer.py.
+
+Usage (from backend/):
+    python benchmarks/bench_fallback_insights.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import timeit
+
+from typing import Any, Dict, List
+
+from fusion.merge import merge_data
+from forecasting.arima import forecast_congestion
+from rules.engine import get_rules
+from ai.gemini_reasoning import generate_fallback_insights, generate_fallback_report
+
+
+def legacy_fallback_insights(
+    current_data: Dict[str, Any],
+    forecast_data: List[Dict[str, Any]]
+) -> str:
+    """Pre-template renderer (string concatenation per call), kept as the baseline"""
+    
+    # Calculate key metrics
+    cctv_count = current_data.get('cctv_count', 0)
+    capacity = current_data.get('terminal_capacity', 1)
+    utilization = (cctv_count / capacity) * 100
+    active_flights = current_data.get('active_flights', 0)
+    
+    # Analyze forecast trend
+    trend = legacy_congestion_trend(forecast_data)
+    peak_periods = legacy_peak_periods(forecast_data)
+    
+    # Determine risk level
+    rules = get_rules()
+    risk_level = rules.severity.level(utilization)
+    risk_desc = rules.severity.descriptions.get(risk_level, "")
+    
+    # Build comprehensive analysis
+    insights = f"""
+═══════════════════════════════════════════════════════════════
+ AIRPORT OPERATIONS ANALYSIS - LOCAL INTELLIGENCE MODE
+═══════════════════════════════════════════════════════════════
+
+ SITUATION ASSESSMENT
+Current terminal utilization is at {utilization:.1f}% ({cctv_count:,} passengers / {capacity:,} capacity).
+Based on ARIMA forecasting models and historical patterns, we anticipate a {trend} congestion trend over the next 6 hours.
+{risk_desc}
+
+!!! RISK ANALYSIS
+Risk Level: {risk_level}
+"""
+    
+    # Add specific risk factors
+    risk_factors = []
+    if utilization > 80:
+        risk_factors.append(f"• Critical capacity utilization at {utilization:.1f}%")
+    if trend == "increasing":
+        risk_factors.append(f"• Upward trend forecasted - passenger volumes expected to rise")
+    if len(peak_periods) > 0:
+        risk_factors.append(f"• {len(peak_periods)} peak congestion periods identified in forecast window")
+    if active_flights > 20:
+        risk_factors.append(f"• High flight activity with {active_flights} active operations")
+    
+    if risk_factors:
+        insights += "\n".join(risk_factors) + "\n"
+    else:
+        insights += "• No significant risk factors identified at current utilization levels\n"
+    
+    # Peak congestion forecast
+    insights += "\n PEAK CONGESTION FORECAST\n"
+    if peak_periods:
+        for i, period in enumerate(peak_periods, 1):
+            insights += f"{i}. {period}\n"
+    else:
+        insights += "• No significant peaks forecasted in the next 6 hours\n"
+    
+    # Operational recommendations (prioritized)
+    insights += "\n OPERATIONAL RECOMMENDATIONS\n\n"
+    
+    # Immediate actions (next 30 minutes)
+    insights += " IMMEDIATE ACTIONS (Next 30 minutes):\n"
+    for action in rules.get_protocol("immediate", risk_level, trend):
+        insights += f"• {action}\n"
+    
+    # Short-term actions (next 2 hours)
+    insights += "\n  SHORT-TERM ACTIONS (Next 2 hours):\n"
+    for action in rules.get_protocol("short_term", risk_level, trend):
+        insights += f"• {action}\n"
+    
+    # Medium-term preparations (2-6 hours)
+    insights += "\n MEDIUM-TERM PREPARATIONS (2-6 hours):\n"
+    if peak_periods:
+        insights += f"• Schedule reinforcement teams for peak windows: {', '.join(peak_periods[:2])}\n"
+    for action in rules.get_protocol("medium_term", risk_level, trend):
+        insights += f"• {action}\n"
+    
+    # Resource allocation strategy
+    insights += "\n RESOURCE ALLOCATION STRATEGY\n"
+    
+    for action in rules.get_protocol("resource_allocation", risk_level, trend):
+        insights += f"• {action}\n"
+    
+    insights += f"""
+═══════════════════════════════════════════════════════════════
+ Analysis Mode: Local Intelligence (Rule-Based Expert System)
+ Generated: {current_data.get('timestamp', 'N/A')}
+ Forecast Window: 6 hours | Data Points: {len(forecast_data)}
+═══════════════════════════════════════════════════════════════
+
+Note: This analysis uses advanced rule-based algorithms and ARIMA forecasting.
+For enhanced AI-powered insights with deep reasoning, Gemini 3 integration 
+is available when API services are operational.
+"""
+    
+    return insights.strip()
+
+
+def legacy_congestion_trend(forecast_data: List[Dict[str, Any]]) -> str:
+    """Pre-template trend detection"""
+    if not forecast_data or len(forecast_data) < 2:
+        return "stable"
+    
+    # Use multiple data points for better trend analysis
+    first_third = forecast_data[:len(forecast_data)//3] if len(forecast_data) >= 3 else [forecast_data[0]]
+    last_third = forecast_data[-len(forecast_data)//3:] if len(forecast_data) >= 3 else [forecast_data[-1]]
+    
+    avg_early = sum(d.get('predicted_count', 0) for d in first_third) / len(first_third)
+    avg_late = sum(d.get('predicted_count', 0) for d in last_third) / len(last_third)
+    
+    change_pct = ((avg_late - avg_early) / avg_early * 100) if avg_early > 0 else 0
+    
+    return get_rules().trend(change_pct)
+
+
+def legacy_peak_periods(forecast_data: List[Dict[str, Any]]) -> List[str]:
+    """Pre-template peak detection"""
+    peaks = []
+    if not forecast_data:
+        return peaks
+    
+    # Calculate dynamic threshold (1.3x average for better peak detection)
+    avg_count = sum(d.get('predicted_count', 0) for d in forecast_data) / len(forecast_data)
+    threshold = avg_count * 1.3
+    
+    for item in forecast_data:
+        if item.get('predicted_count', 0) > threshold:
+            peaks.append(item.get('timestamp', 'Unknown time'))
+    
+    return peaks[:3]  # Return top 3 peaks
+
+
+def build_inputs():
+    inputs = []
+    for count in (150, 560, 740, 880, 990):
+        merged = merge_data(
+            {"count": count, "timestamp": "2024-02-05T16:30:00"},
+            {"active_flights": 25, "arriving_flights": 15, "departing_flights": 10},
+            {"terminal_capacity": 1000},
+        )
+        inputs.append((merged, forecast_congestion(merged)))
+    return inputs
+
+
+def main(number: int = 4000) -> None:
+    inputs = build_inputs()
+    for current, forecast in inputs:
+        assert legacy_fallback_insights(current, forecast) == generate_fallback_insights(current, forecast)
+
+    def timed(render):
+        def run():
+            for current, forecast in inputs:
+                render(current, forecast)
+        return min(timeit.repeat(run, number=number // len(inputs), repeat=5)) / number
+
+    legacy = timed(legacy_fallback_insights)
+    text = timed(generate_fallback_insights)
+    report = timed(generate_fallback_report)
+    print(f"  legacy: {legacy * 1e6:8.1f} µs/call  ({1 / legacy:,.0f} calls/s)")
+    print(f"    text: {text * 1e6:8.1f} µs/call  ({1 / text:,.0f} calls/s, {legacy / text:.2f}x)")
+    print(f"  report: {report * 1e6:8.1f} µs/call  ({1 / report:,.0f} calls/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark full forecast recompute + point serialization vs incremental updates
+
+The full path re-runs forecast_congestion for every reading and hands all
+points downstream. The incremental path shifts the zone's kept horizon,
+draws only the new slots and serializes only the diff; a new level is
+sent as a scale factor plus the slots whose risk level changed.
+
+Usage (from backend/):
+    python benchmarks/bench_incremental.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from forecasting.arima import forecast_congestion
+from forecasting.incremental import IncrementalForecaster
+
+START = datetime(2024, 2, 5, 6, 0)
+
+
+def readings(count: int, level_changes: bool):
+    """15-minute readings, either at a steady level or with a new level every time"""
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        level = int(rng.integers(300, 900)) if level_changes else 600
+        yield {"cctv_count": level, "terminal_capacity": 1000,
+               "timestamp": (START + timedelta(minutes=15 * i)).isoformat()}
+
+
+def main(count: int = 2000) -> None:
+    for label, level_changes in (("steady level", False), ("new level", True)):
+        states = list(readings(count, level_changes))
+
+        started = time.perf_counter()
+        for state in states:
+            forecast_congestion(state)
+        full = (time.perf_counter() - started) / count
+
+        forecaster = IncrementalForecaster(rng=np.random.default_rng(0))
+        started = time.perf_counter()
+        changed = 0
+        for state in states:
+            diff = forecaster.update(state)[1]
+            changed += len(diff.changed) + len(diff.added) + len(diff.transitions)
+            diff.to_dict()
+        incremental = (time.perf_counter() - started) / count
+
+        print(f"{label:>13}: full {full * 1e6:6.1f} µs -> incremental {incremental * 1e6:6.1f} µs/reading "
+              f"({full / incremental:.1f}x), {forecaster.points_drawn / count:.1f} points drawn and "
+              f"{changed / count:.1f} points or transitions emitted per reading (full: 24)")
+
+
+if __name__ == "__main__":
+    main()
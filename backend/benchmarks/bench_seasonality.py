@@ -0,0 +1,60 @@
+"""
+Benchmark per-point datetime branching vs hour-of-week lookup arrays
+
+The legacy path builds one datetime per 15-minute slot, branches on `hour`
+and formats every timestamp with isoformat. The grid path builds an epoch
+microsecond grid, gathers the profile with one integer index and formats
+timestamps only when asked to.
+
+Usage (from backend/):
+    python benchmarks/bench_seasonality.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import timeit
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from forecasting.seasonality import format_times, get_profile, time_grid
+
+START = datetime(2024, 2, 5, 10, 30)
+
+
+def legacy_factors(start: datetime, steps: int):
+    mean, std = [], []
+    for i in range(steps):
+        hour = (start + timedelta(minutes=15 * i)).hour
+        if 6 <= hour <= 9:
+            mean.append(1.3); std.append(0.1)
+        elif 16 <= hour <= 19:
+            mean.append(1.4); std.append(0.1)
+        elif 22 <= hour or hour <= 5:
+            mean.append(0.5); std.append(0.05)
+        else:
+            mean.append(1.0); std.append(0.08)
+    return np.array(mean), np.array(std)
+
+
+def legacy_timestamps(start: datetime, steps: int):
+    return [(start + timedelta(minutes=15 * i)).isoformat() for i in range(steps)]
+
+
+def grid_factors(start: datetime, steps: int):
+    return get_profile().lookup(time_grid(start, steps))
+
+
+def main(number: int = 200) -> None:
+    for label, steps in (("6h forecast", 24), ("14-day history", 14 * 96)):
+        legacy = min(timeit.repeat(lambda: legacy_factors(START, steps), number=number, repeat=5)) / number
+        grid = min(timeit.repeat(lambda: grid_factors(START, steps), number=number, repeat=5)) / number
+        legacy_fmt = min(timeit.repeat(lambda: legacy_timestamps(START, steps), number=number, repeat=5)) / number
+        grid_fmt = min(timeit.repeat(lambda: format_times(time_grid(START, steps)), number=number, repeat=5)) / number
+        print(f"{label:>15}: factors {legacy * 1e6:8.1f} -> {grid * 1e6:7.1f} µs ({legacy / grid:4.1f}x)  "
+              f"timestamps {legacy_fmt * 1e6:8.1f} -> {grid_fmt * 1e6:7.1f} µs ({legacy_fmt / grid_fmt:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
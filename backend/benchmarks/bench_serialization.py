@@ -0,0 +1,74 @@
+"""
+Benchmark forecast response serialization cost per response
+
+Compares the previous path (generic Dict[str, Any] model, validated and
+passed through FastAPI's jsonable_encoder) with the typed fast path in
+serialization.py.
+
+Usage (from backend/):
+    python benchmarks/bench_serialization.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import timeit
+from typing import Any, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from fusion.merge import merge_data
+from forecasting.arima import forecast_congestion
+from ai.gemini_reasoning import generate_fallback_insights
+from serialization import forecast_json_response
+
+
+class LegacyForecastResponse(BaseModel):
+    current_metrics: Dict[str, Any]
+    forecast: List[Dict[str, Any]]
+    gemini_insights: str
+    risk_level: str
+    recommendations: List[str]
+
+
+def build_payload() -> Dict[str, Any]:
+    merged = merge_data(
+        {"count": 640, "timestamp": "2024-02-05T10:30:00"},
+        {"active_flights": 25, "arriving_flights": 15, "departing_flights": 10},
+        {"terminal_capacity": 1000},
+    )
+    forecast = forecast_congestion(merged)
+    return {
+        "current_metrics": merged,
+        "forecast": forecast,
+        "gemini_insights": generate_fallback_insights(merged, forecast),
+        "risk_level": "MEDIUM",
+        "recommendations": [
+            "Continue standard monitoring procedures",
+            "Be prepared to scale up resources if needed",
+        ],
+    }
+
+
+def legacy_path(payload: Dict[str, Any]) -> bytes:
+    model = LegacyForecastResponse(**payload)
+    validated = LegacyForecastResponse.model_validate(model.model_dump())
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+def fast_path(payload: Dict[str, Any]) -> bytes:
+    return forecast_json_response(**payload).body
+
+
+def main(number: int = 2000) -> None:
+    payload = build_payload()
+    for name, func in (("legacy", legacy_path), ("fast", fast_path)):
+        seconds = min(timeit.repeat(lambda: func(payload), number=number, repeat=5))
+        size = len(func(payload))
+        print(f"{name:>8}: {seconds / number * 1e6:8.1f} µs/response  ({size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark per-request pipeline cost with dict vs typed snapshot stages
+
+The dict path is the previous pipeline: merge_data builds a dict,
+forecast_congestion emits 24 point dicts and risk/utilization are re-derived
+from `.get` lookups. The typed path passes an OperationalSnapshot and an
+array-backed ForecastSeries from merge to the response encoder.
+
+Reports time per request, memory retained by the intermediate pipeline state
+(snapshot + forecast) and the allocation peak of a whole request.
+
+Usage (from backend/):
+    python benchmarks/bench_snapshots.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import timeit
+import tracemalloc
+from typing import Any, Dict
+
+import numpy as np
+
+from fusion.merge import merge_data, merge_snapshot
+from forecasting.arima import forecast_congestion, forecast_series, calculate_trend
+from ai.gemini_reasoning import generate_fallback_insights
+from rules.engine import get_rules
+from serialization import build_forecast_response, dumps
+
+CCTV = {"count": 640, "timestamp": "2024-02-05T10:30:00"}
+AODB = {"active_flights": 25, "arriving_flights": 15, "departing_flights": 10}
+CAPACITY = {"terminal_capacity": 1000}
+
+
+def dict_state():
+    merged = merge_data(CCTV, AODB, CAPACITY)
+    return merged, forecast_congestion(merged, rng=np.random.default_rng(0))
+
+
+def typed_state():
+    snapshot = merge_snapshot(CCTV, AODB, CAPACITY)
+    return snapshot, forecast_series(snapshot, rng=np.random.default_rng(0))
+
+
+def dict_request() -> bytes:
+    merged, forecast = dict_state()
+    utilization = (merged.get("cctv_count", 0) / merged.get("terminal_capacity", 1)) * 100
+    risk_level = get_rules().risk.level(utilization)
+    recommendations = get_rules().get_recommendations(risk_level, calculate_trend(forecast))
+    current = {
+        "cctv_count": merged["cctv_count"],
+        "terminal_capacity": merged["terminal_capacity"],
+        "utilization_rate": (merged["cctv_count"] / merged["terminal_capacity"]) * 100,
+        "timestamp": merged["timestamp"],
+    }
+    return dumps(build_forecast_response(
+        current, forecast, generate_fallback_insights(merged, forecast), risk_level, recommendations
+    ))
+
+
+def typed_request() -> bytes:
+    snapshot, forecast = typed_state()
+    risk_level = snapshot.congestion_level
+    recommendations = get_rules().get_recommendations(risk_level, calculate_trend(forecast))
+    return dumps(build_forecast_response(
+        snapshot, forecast, generate_fallback_insights(snapshot, forecast), risk_level, recommendations
+    ))
+
+
+def retained_bytes(build, copies: int = 200) -> float:
+    """Average traced memory held per live pipeline state"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    states = [build() for _ in range(copies)]
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del states
+    return held / copies
+
+
+def request_peak(request) -> int:
+    tracemalloc.start()
+    request()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main(number: int = 2000) -> None:
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, state, request in (("dict", dict_state, dict_request), ("typed", typed_state, typed_request)):
+        request()  # warm caches
+        seconds = min(timeit.repeat(request, number=number, repeat=5))
+        results[name] = {
+            "us": seconds / number * 1e6,
+            "retained": retained_bytes(state),
+            "peak": request_peak(request),
+        }
+        r = results[name]
+        print(f"{name:>6}: {r['us']:8.1f} µs/request  state {r['retained'] / 1024:6.1f} KiB  "
+              f"request peak {r['peak'] / 1024:6.1f} KiB")
+
+    print(f"state memory reduction: {1 - results['typed']['retained'] / results['dict']['retained']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
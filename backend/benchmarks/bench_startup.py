@@ -0,0 +1,71 @@
+"""
+Benchmark cold start: app import time and time to the first /health response
+
+Each run starts a fresh interpreter so module caches do not hide import
+cost. Exits non-zero when the median exceeds the import-time budget or
+when google.genai is imported eagerly.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [runs]
+
+Environment:
+    STARTUP_BUDGET_MS: Budget for import + first /health (default 1500)
+"""
+import sys
+import os
+import json
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+PROBE = """
+import time
+started = time.perf_counter()
+import sys, json
+import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+response = TestClient(app.app).get("/health")
+answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "health_ms": (answered - started) * 1000,
+    "status": response.status_code,
+    "genai_loaded": "google.genai" in sys.modules,
+}))
+"""
+
+
+def run_probe() -> dict:
+    env = dict(os.environ, GEMINI_WARM_UP="0")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    run_probe()  # populate __pycache__ so every measured run is comparable
+    results = [run_probe() for _ in range(runs)]
+
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    health_ms = statistics.median(r["health_ms"] for r in results)
+    genai_loaded = any(r["genai_loaded"] for r in results)
+
+    print(f"Cold start over {runs} runs (median)")
+    print(f"  import app:          {import_ms:8.1f} ms")
+    print(f"  first /health:       {health_ms:8.1f} ms")
+    print(f"  google.genai loaded: {genai_loaded}")
+    print(f"  budget:              {BUDGET_MS:8.1f} ms")
+
+    if genai_loaded or health_ms > BUDGET_MS:
+        print("FAILED startup budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark the vectorized synthetic generator against its target size
+
+Generates a month of minute-level readings for 50 camera zones across two
+terminals with surges and incidents, then streams every record kind to
+JSON lines in a temporary directory. Fails if generation exceeds
+GENERATE_BUDGET_S.
+
+Usage (from backend/):
+    python benchmarks/bench_synthetic.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import tempfile
+
+from data_ingestion.synthetic import generate
+
+GENERATE_BUDGET_S = 5.0
+
+
+def main() -> None:
+    started = time.perf_counter()
+    dataset = generate(days=30, zones=50, terminals=2, step_minutes=1, seed=0,
+                       surges_per_day=1, incidents_per_day=0.5)
+    generate_s = time.perf_counter() - started
+    sizes = dataset.sizes()
+    print(f"generate: {generate_s:6.2f} s  {sizes}  ({len(dataset.events)} events)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        dataset.write_jsonl(directory)
+        write_s = time.perf_counter() - started
+        megabytes = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory)) / 2 ** 20
+    rows = sum(sizes.values())
+    print(f"   jsonl: {write_s:6.2f} s  {megabytes:.0f} MiB  {rows / write_s / 1e6:.2f} M records/s")
+
+    if generate_s > GENERATE_BUDGET_S:
+        print(f"FAIL: generation over the {GENERATE_BUDGET_S:.0f} s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,44 @@
 from datetime import datetime, timedelta
 import random
+from typing import Optional
 
-def get_aodb_data():
+from forecasting.seasonality import hourly_table
+
+# (arriving low, arriving high, departing low, departing high) by hour of day:
+# morning peak, afternoon/evening peak, night
+FLIGHT_RANGES = hourly_table((8, 15, 6, 12), [
+    ((6, 10), (15, 25, 12, 20)),
+    ((14, 18), (18, 28, 15, 25)),
+    ((22, 5), (2, 5, 1, 4)),
+])
+
+def get_aodb_data(seed: Optional[int] = None):
     """
     Simulate Airport Operations Database (AODB) data - flight schedules
     
     Returns:
         Dict with flight information
     """
-    
-    current_hour = datetime.now().hour
+    rng = random.Random(seed) if seed is not None else random
     
     # Simulate flight activity based on time of day
-    if 6 <= current_hour <= 10:  # Morning peak
-        arriving = random.randint(15, 25)
-        departing = random.randint(12, 20)
-    elif 14 <= current_hour <= 18:  # Afternoon/Evening peak
-        arriving = random.randint(18, 28)
-        departing = random.randint(15, 25)
-    elif 22 <= current_hour or current_hour <= 5:  # Night
-        arriving = random.randint(2, 5)
-        departing = random.randint(1, 4)
-    else:
-        arriving = random.randint(8, 15)
-        departing = random.randint(6, 12)
+    arriving_low, arriving_high, departing_low, departing_high = FLIGHT_RANGES[datetime.now().hour].tolist()
+    arriving = rng.randint(arriving_low, arriving_high)
+    departing = rng.randint(departing_low, departing_high)
     
     return {
         "timestamp": datetime.now().isoformat(),
         "active_flights": arriving + departing,
         "arriving_flights": arriving,
         "departing_flights": departing,
-        "delayed_flights": random.randint(0, 3),
-        "cancelled_flights": random.randint(0, 1),
-        "gates_occupied": random.randint(8, 24),
+        "delayed_flights": rng.randint(0, 3),
+        "cancelled_flights": rng.randint(0, 1),
+        "gates_occupied": rng.randint(8, 24),
         "total_gates": 30,
         "source": "AODB_SYSTEM"
     }
 
-def get_flight_schedule(hours_ahead: int = 6):
+def get_flight_schedule(hours_ahead: int = 6, seed: Optional[int] = None):
     """
     Get simulated flight schedule for upcoming hours
     
@@ -47,19 +48,20 @@ def get_flight_schedule(hours_ahead: int = 6):
     Returns:
         List of scheduled flights
     """
+    rng = random.Random(seed) if seed is not None else random
     flights = []
     
     for i in range(hours_ahead * 2):  # 2 flights per hour average
         scheduled_time = datetime.now() + timedelta(minutes=30 * i)
-        flight_type = random.choice(["arrival", "departure"])
+        flight_type = rng.choice(["arrival", "departure"])
         
         flight = {
-            "flight_number": f"FL{random.randint(1000, 9999)}",
+            "flight_number": f"FL{rng.randint(1000, 9999)}",
             "type": flight_type,
             "scheduled_time": scheduled_time.isoformat(),
-            "gate": f"G{random.randint(1, 30)}",
-            "status": random.choice(["on_time", "on_time", "on_time", "delayed"]),
-            "passenger_capacity": random.randint(150, 350)
+            "gate": f"G{rng.randint(1, 30)}",
+            "status": rng.choice(["on_time", "on_time", "on_time", "delayed"]),
+            "passenger_capacity": rng.randint(150, 350)
         }
         
         flights.append(flight)
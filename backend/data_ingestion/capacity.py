@@ -1,25 +1,27 @@
 import random
+from typing import Optional
 
-def get_capacity_data():
+def get_capacity_data(seed: Optional[int] = None):
     """
     Get terminal capacity information
     
     Returns:
         Dict with capacity metrics
     """
+    rng = random.Random(seed) if seed is not None else random
     
     # Simulate terminal capacity data
     terminal_capacity = 1000  # Base capacity
     
     # Simulate varying operational capacity based on factors
-    operational_capacity = terminal_capacity * random.uniform(0.85, 1.0)
+    operational_capacity = terminal_capacity * rng.uniform(0.85, 1.0)
     
     return {
         "terminal_capacity": int(terminal_capacity),
         "operational_capacity": int(operational_capacity),
-        "security_lanes_active": random.randint(8, 12),
+        "security_lanes_active": rng.randint(8, 12),
         "security_lanes_total": 12,
-        "check_in_counters_active": random.randint(15, 25),
+        "check_in_counters_active": rng.randint(15, 25),
         "check_in_counters_total": 30,
         "waiting_areas": {
             "departure_lounge": 500,
@@ -27,22 +29,23 @@ def get_capacity_data():
             "security_queue": 200
         },
         "accessibility_status": "normal",
-        "maintenance_areas": random.randint(0, 2)
+        "maintenance_areas": rng.randint(0, 2)
     }
 
-def get_capacity_constraints():
+def get_capacity_constraints(seed: Optional[int] = None):
     """
     Get current capacity constraints and limitations
     
     Returns:
         Dict with constraint information
     """
+    rng = random.Random(seed) if seed is not None else random
     
     constraints = {
         "max_hourly_throughput": 850,
-        "security_bottleneck": random.choice([True, False]),
-        "check_in_bottleneck": random.choice([True, False]),
-        "parking_availability": random.randint(60, 95),  # percentage
+        "security_bottleneck": rng.choice([True, False]),
+        "check_in_bottleneck": rng.choice([True, False]),
+        "parking_availability": rng.randint(60, 95),  # percentage
         "current_restrictions": []
     }
     
@@ -53,9 +56,9 @@ def get_capacity_constraints():
         "Baggage system running at reduced capacity"
     ]
     
-    if random.random() > 0.7:
+    if rng.random() > 0.7:
         constraints["current_restrictions"].append(
-            random.choice(possible_restrictions)
+            rng.choice(possible_restrictions)
         )
     
     return constraints
\ No newline at end of file
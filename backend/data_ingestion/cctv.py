@@ -1,63 +1,52 @@
 from datetime import datetime, timedelta
 import random
+from typing import Optional
 
-def get_cctv_data():
+import numpy as np
+
+from forecasting.seasonality import format_times, hour_of_day, hourly_table, time_grid
+
+# (low, high) passenger count by hour of day: morning rush, evening rush, night
+COUNT_RANGES = hourly_table((200, 400), [((6, 9), (400, 700)), ((16, 19), (450, 750)), ((22, 5), (50, 150))])
+
+def get_cctv_data(seed: Optional[int] = None):
     """
     Simulate CCTV passenger counting data
     
     Returns:
         Dict with passenger count and timestamp
     """
+    rng = random.Random(seed) if seed is not None else random
     
     # Simulate passenger count based on time of day
-    current_hour = datetime.now().hour
-    
-    # Base passenger count varies by time
-    if 6 <= current_hour <= 9:  # Morning rush
-        base_count = random.randint(400, 700)
-    elif 16 <= current_hour <= 19:  # Evening rush
-        base_count = random.randint(450, 750)
-    elif 22 <= current_hour or current_hour <= 5:  # Night
-        base_count = random.randint(50, 150)
-    else:  # Regular hours
-        base_count = random.randint(200, 400)
+    low, high = COUNT_RANGES[datetime.now().hour].tolist()
+    base_count = rng.randint(low, high)
     
     return {
         "count": base_count,
         "timestamp": datetime.now().isoformat(),
         "source": "CCTV_SYSTEM",
         "camera_ids": ["CAM_001", "CAM_002", "CAM_003", "CAM_004"],
-        "confidence": round(random.uniform(0.85, 0.98), 2)
+        "confidence": round(rng.uniform(0.85, 0.98), 2)
     }
 
-def get_historical_cctv_data(hours: int = 24):
+def get_historical_cctv_data(hours: int = 24, seed: Optional[int] = None):
     """
     Generate historical CCTV data for training/analysis
     
     Args:
         hours: Number of hours of historical data
+        seed: Seed for reproducible counts
     
     Returns:
         List of historical data points
     """
-    historical_data = []
-    
-    for i in range(hours):
-        timestamp = datetime.now() - timedelta(hours=hours - i)
-        hour = timestamp.hour
-        
-        if 6 <= hour <= 9:
-            count = random.randint(400, 700)
-        elif 16 <= hour <= 19:
-            count = random.randint(450, 750)
-        elif 22 <= hour or hour <= 5:
-            count = random.randint(50, 150)
-        else:
-            count = random.randint(200, 400)
-        
-        historical_data.append({
-            "count": count,
-            "timestamp": timestamp.isoformat()
-        })
-    
-    return historical_data
\ No newline at end of file
+    # Hourly epoch grid ending one hour before now; ranges are gathered per hour
+    grid = time_grid(datetime.now() - timedelta(hours=hours), hours, step_minutes=60)
+    ranges = COUNT_RANGES[hour_of_day(grid)]
+    counts = np.random.default_rng(seed).integers(ranges[:, 0], ranges[:, 1] + 1)
+    
+    return [
+        {"count": count, "timestamp": timestamp}
+        for count, timestamp in zip(counts.tolist(), format_times(grid))
+    ]
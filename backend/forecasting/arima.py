@@ -1,89 +1,74 @@
-from typing import Dict, List, Any
-from datetime import datetime, timedelta
+from typing import Dict, List, Any, Mapping, Optional, Sequence
+from datetime import datetime
 import numpy as np
 
-def forecast_congestion(current_data: Dict[str, Any], hours: int = 6) -> List[Dict[str, Any]]:
+from forecasting.seasonality import get_profile, time_grid, tz_suffix
+from rules.engine import get_rules
+from snapshots import DEFAULT_CAPACITY, ForecastSeries, forecast_counts
+
+def forecast_series(
+    current_data: Mapping[str, Any],
+    hours: int = 6,
+    rng: Optional[np.random.Generator] = None,
+    steps: Optional[int] = None
+) -> ForecastSeries:
     """
-    Generate ARIMA-based congestion forecast
+    Generate ARIMA-based congestion forecast as an array-backed series
     
     Args:
-        current_data: Current operational state
+        current_data: Current operational state (snapshot or merged dict)
         hours: Number of hours to forecast
+        rng: Optional seeded generator for reproducible noise
+        steps: Number of 15-minute slots, overriding hours * 4
     
     Returns:
-        List of forecasted data points
+        ForecastSeries on a 15-minute grid starting at the snapshot time
     """
     
     base_count = current_data.get("cctv_count", 100)
-    capacity = current_data.get("terminal_capacity", 1000)
-    current_time = datetime.fromisoformat(current_data.get("timestamp", datetime.now().isoformat()))
+    capacity = current_data.get("terminal_capacity", DEFAULT_CAPACITY)
+    current_time = datetime.fromisoformat(current_data.get("timestamp") or datetime.now().isoformat())
     
-    # Simulate ARIMA forecast with realistic patterns
-    forecast_points = []
+    # 15-minute epoch grid; seasonal factors are gathered by hour-of-week index
+    grid = time_grid(current_time, hours * 4 if steps is None else steps)
+    mean, std = get_profile().lookup(grid)
     
-    for i in range(hours * 4):  # 15-minute intervals
-        time_offset = timedelta(minutes=15 * i)
-        forecast_time = current_time + time_offset
-        
-        # Simulate daily patterns (peak hours: 6-9 AM, 4-7 PM)
-        hour = forecast_time.hour
-        
-        # Base trend with noise
-        trend_factor = 1.0
-        if 6 <= hour <= 9:  # Morning peak
-            trend_factor = 1.3 + np.random.normal(0, 0.1)
-        elif 16 <= hour <= 19:  # Evening peak
-            trend_factor = 1.4 + np.random.normal(0, 0.1)
-        elif 22 <= hour or hour <= 5:  # Night low
-            trend_factor = 0.5 + np.random.normal(0, 0.05)
-        else:
-            trend_factor = 1.0 + np.random.normal(0, 0.08)
-        
-        # Calculate predicted count with constraints
-        predicted_count = int(base_count * trend_factor)
-        predicted_count = max(0, min(predicted_count, capacity))
-        
-        # Calculate utilization
-        utilization = (predicted_count / capacity) * 100 if capacity > 0 else 0
-        
-        # Determine risk level
-        if utilization > 90:
-            risk = "CRITICAL"
-        elif utilization > 75:
-            risk = "HIGH"
-        elif utilization > 50:
-            risk = "MEDIUM"
-        else:
-            risk = "LOW"
-        
-        forecast_points.append({
-            "timestamp": forecast_time.isoformat(),
-            "predicted_count": predicted_count,
-            "utilization_rate": round(utilization, 2),
-            "risk_level": risk,
-            "confidence_interval": {
-                "lower": max(0, predicted_count - int(predicted_count * 0.15)),
-                "upper": min(capacity, predicted_count + int(predicted_count * 0.15))
-            }
-        })
+    # Base trend with noise
+    trend_factor = mean + (rng if rng is not None else np.random).normal(0, std)
+    
+    # Calculate predicted counts with constraints
+    return ForecastSeries(grid, np.clip(np.trunc(base_count * trend_factor), 0, capacity), capacity,
+                          tz_suffix(current_time))
+
+def forecast_congestion(
+    current_data: Mapping[str, Any],
+    hours: int = 6,
+    rng: Optional[np.random.Generator] = None
+) -> List[Dict[str, Any]]:
+    """
+    Generate ARIMA-based congestion forecast
     
-    return forecast_points
+    Args:
+        current_data: Current operational state
+        hours: Number of hours to forecast
+        rng: Optional seeded generator for reproducible noise
+    
+    Returns:
+        List of forecasted data points
+    """
+    return forecast_series(current_data, hours=hours, rng=rng).to_points()
 
-def calculate_trend(forecast_data: List[Dict[str, Any]]) -> str:
+def calculate_trend(forecast_data: Sequence) -> str:
     """
     Calculate overall trend from forecast data
     """
     if len(forecast_data) < 2:
         return "stable"
     
-    first_val = forecast_data[0]["predicted_count"]
-    last_val = forecast_data[-1]["predicted_count"]
+    counts = forecast_counts(forecast_data)
+    first_val = counts[0]
+    last_val = counts[-1]
     
     change = ((last_val - first_val) / first_val * 100) if first_val > 0 else 0
     
-    if change > 15:
-        return "increasing"
-    elif change < -15:
-        return "decreasing"
-    else:
-        return "stable"
\ No newline at end of file
+    return get_rules().trend(change)
\ No newline at end of file
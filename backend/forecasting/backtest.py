@@ -0,0 +1,303 @@
+"""
+Rolling-origin backtesting for congestion forecasters
+
+Replays a historical count series through each forecaster variant at many
+rolling origins and scores every horizon step against what actually
+happened.
+
+Usage (from backend/):
+    python -m forecasting.backtest --days 14 --workers 2
+    python -m forecasting.backtest --data counts.csv --variants arima,persistence
+"""
+import os
+import csv
+import json
+import time
+import argparse
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from forecasting.arima import forecast_congestion
+from forecasting.seasonality import get_profile, time_grid
+from forecasting.probabilistic import probabilistic_forecast, quantile_label
+from rules.engine import get_rules
+
+STEP = timedelta(minutes=15)
+STEPS_PER_DAY = 96
+QUANTILES = (0.1, 0.5, 0.9)
+MEMORY_SAMPLES = 10  # forecasts per chunk measured with tracemalloc
+
+
+# Variant signature: (history timestamps, history counts, capacity, steps, rng)
+# -> {quantile: predicted counts}; 0.5 is the point forecast
+Forecaster = Callable[[List[datetime], np.ndarray, int, int, np.random.Generator], Dict[float, np.ndarray]]
+
+
+def _snapshot(times: List[datetime], counts: np.ndarray, capacity: int) -> Dict[str, Any]:
+    return {
+        "timestamp": times[-1].isoformat(),
+        "cctv_count": int(counts[-1]),
+        "terminal_capacity": capacity,
+    }
+
+
+def arima_variant(times, counts, capacity, steps, rng):
+    """forecast_congestion; its +/-15% confidence band is scored as p10/p90"""
+    points = forecast_congestion(_snapshot(times, counts, capacity), hours=steps // 4, rng=rng)
+    return {
+        0.1: np.array([p["confidence_interval"]["lower"] for p in points], dtype=float),
+        0.5: np.array([p["predicted_count"] for p in points], dtype=float),
+        0.9: np.array([p["confidence_interval"]["upper"] for p in points], dtype=float),
+    }
+
+
+def monte_carlo_variant(times, counts, capacity, steps, rng):
+    """probabilistic_forecast quantile bands (500 paths)"""
+    result = probabilistic_forecast(
+        _snapshot(times, counts, capacity), hours=steps // 4, n_paths=500,
+        quantiles=QUANTILES, seed=int(rng.integers(2 ** 32))
+    )
+    return {q: np.array([p[quantile_label(q)] for p in result["points"]], dtype=float) for q in QUANTILES}
+
+
+def persistence_variant(times, counts, capacity, steps, rng):
+    """Naive baseline: the last observed count stays flat"""
+    return {0.5: np.full(steps, float(counts[-1]))}
+
+
+def seasonal_naive_variant(times, counts, capacity, steps, rng):
+    """Baseline: the same time of day yesterday (falls back to persistence)"""
+    if counts.shape[0] < STEPS_PER_DAY:
+        return persistence_variant(times, counts, capacity, steps, rng)
+    start = counts.shape[0] - STEPS_PER_DAY - 1
+    return {0.5: counts[start:start + steps].astype(float)}
+
+
+VARIANTS: Dict[str, Forecaster] = {
+    "arima": arima_variant,
+    "monte_carlo": monte_carlo_variant,
+    "persistence": persistence_variant,
+    "seasonal_naive": seasonal_naive_variant,
+}
+
+
+def synthetic_series(days: int = 14, capacity: int = 1000, seed: int = 0,
+                     start: Optional[datetime] = None) -> Tuple[List[datetime], np.ndarray]:
+    """
+    15-minute terminal counts following the active seasonal profile
+
+    The base level drifts as a slow random walk and every slot gets noise
+    from the same hour-of-week spread the forecaster assumes.
+    """
+    rng = np.random.default_rng(seed)
+    start = start or datetime(2024, 1, 1)
+    n = days * STEPS_PER_DAY
+    times = [start + STEP * i for i in range(n)]
+    mean, std = get_profile().lookup(time_grid(start, n))
+    level = 450 + np.cumsum(rng.normal(0, 3, n))
+    counts = np.clip(np.round(level * (mean + rng.standard_normal(n) * std)), 0, capacity)
+    return times, counts
+
+
+def load_series(path: str) -> Tuple[List[datetime], np.ndarray]:
+    """Archived counts from CSV (timestamp,count columns) or JSON lines"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    rows.sort(key=lambda r: r["timestamp"])
+    times = [datetime.fromisoformat(r["timestamp"]) for r in rows]
+    return times, np.array([float(r["count"]) for r in rows])
+
+
+def _run_chunk(variant: str, times: List[datetime], counts: np.ndarray, capacity: int,
+               origins: Sequence[int], steps: int, seed: int) -> Dict[str, Any]:
+    """
+    Forecast every origin in a chunk with one variant
+
+    Each origin gets its own generator spawned from (seed, origin), so results
+    do not depend on how origins are split across processes. Wall-clock time
+    is measured for every forecast; memory on the first few, since
+    tracemalloc slows allocation-heavy code down.
+    """
+    forecaster = VARIANTS[variant]
+    predictions = {}
+    seconds = np.empty(len(origins))
+    peaks = []
+    for i, origin in enumerate(origins):
+        rng = np.random.default_rng(np.random.SeedSequence([seed, origin]))
+        history = slice(0, origin + 1)
+        started = time.perf_counter()
+        result = forecaster(times[history], counts[history], capacity, steps, rng)
+        seconds[i] = time.perf_counter() - started
+        for q, values in result.items():
+            predictions.setdefault(q, np.empty((len(origins), steps)))[i] = values[:steps]
+
+    for origin in origins[:MEMORY_SAMPLES]:
+        rng = np.random.default_rng(np.random.SeedSequence([seed, origin]))
+        tracemalloc.start()
+        forecaster(times[:origin + 1], counts[:origin + 1], capacity, steps, rng)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {"predictions": predictions, "seconds": seconds, "peak_bytes": peaks}
+
+
+def pinball_loss(actual: np.ndarray, predicted: np.ndarray, q: float) -> np.ndarray:
+    """Quantile (pinball) loss per element"""
+    diff = actual - predicted
+    return np.maximum(q * diff, (q - 1) * diff)
+
+
+def score(actual: np.ndarray, predictions: Dict[float, np.ndarray], capacity: int) -> Dict[str, List[float]]:
+    """
+    Per-horizon accuracy metrics over all origins
+
+    Args:
+        actual: Observed counts, shape (origins, steps)
+        predictions: {quantile: (origins, steps)}; 0.5 is the point forecast
+        capacity: Terminal capacity used for risk levels
+
+    Returns:
+        Lists indexed by horizon step: mae, mape, pinball, risk_hit_rate
+    """
+    point = predictions[0.5]
+    error = np.abs(point - actual)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.where(actual > 0, error / actual * 100, np.nan)
+    pinball = np.mean([pinball_loss(actual, values, q) for q, values in predictions.items()], axis=0)
+
+    risk = get_rules().risk
+    hits = risk.codes(point / capacity * 100) == risk.codes(actual / capacity * 100)
+    return {
+        "mae": error.mean(axis=0).tolist(),
+        "mape": np.nanmean(ape, axis=0).tolist(),
+        "pinball": pinball.mean(axis=0).tolist(),
+        "risk_hit_rate": hits.mean(axis=0).tolist(),
+    }
+
+
+def backtest(
+    times: List[datetime],
+    counts: np.ndarray,
+    capacity: int = 1000,
+    variants: Sequence[str] = ("arima", "persistence", "seasonal_naive"),
+    hours: int = 6,
+    stride: int = 4,
+    min_history: int = STEPS_PER_DAY,
+    workers: int = 1,
+    seed: int = 0,
+    chunk_size: int = 64
+) -> Dict[str, Any]:
+    """
+    Rolling-origin evaluation of forecaster variants
+
+    Origins start after `min_history` slots and advance by `stride` slots.
+    Horizon step h of a forecast issued at origin o is compared with the
+    observed count at o + h (step 0 is the nowcast at the origin itself).
+
+    Args:
+        times, counts: 15-minute history, oldest first
+        capacity: Terminal capacity
+        variants: Names from VARIANTS to compare
+        hours: Forecast horizon
+        stride: Slots between consecutive origins
+        min_history: Slots of history required before the first origin
+        workers: Processes used to evaluate origin chunks (1 = in-process)
+        seed: Base seed for forecaster noise
+        chunk_size: Origins per task
+
+    Returns:
+        Dict with origin count and, per variant, per-horizon metrics and a summary
+    """
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        raise ValueError(f"Unknown forecaster variants: {', '.join(unknown)}")
+
+    counts = np.asarray(counts, dtype=float)
+    steps = hours * 4
+    origins = list(range(min_history, counts.shape[0] - steps + 1, stride))
+    if not origins:
+        raise ValueError("Series is too short for the requested history and horizon")
+    actual = np.stack([counts[o:o + steps] for o in origins])
+
+    chunks = [origins[i:i + chunk_size] for i in range(0, len(origins), chunk_size)]
+    tasks = [(name, chunk) for name in variants for chunk in chunks]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_chunk, name, times, counts, capacity, chunk, steps, seed)
+                       for name, chunk in tasks]
+            outputs = [future.result() for future in futures]
+    else:
+        outputs = [_run_chunk(name, times, counts, capacity, chunk, steps, seed) for name, chunk in tasks]
+
+    report = {"origins": len(origins), "horizon_steps": steps, "variants": {}}
+    for name in variants:
+        parts = [output for (variant, _), output in zip(tasks, outputs) if variant == name]
+        predictions = {q: np.concatenate([p["predictions"][q] for p in parts]) for q in parts[0]["predictions"]}
+        seconds = np.concatenate([p["seconds"] for p in parts])
+        peaks = [peak for p in parts for peak in p["peak_bytes"]]
+
+        horizon = score(actual, predictions, capacity)
+        report["variants"][name] = {
+            "horizon": horizon,
+            "summary": {
+                "mae": float(np.mean(horizon["mae"])),
+                "mape": float(np.nanmean(horizon["mape"])),
+                "pinball": float(np.mean(horizon["pinball"])),
+                "risk_hit_rate": float(np.mean(horizon["risk_hit_rate"])),
+                "ms_per_forecast": float(np.median(seconds) * 1000),
+                "p95_ms_per_forecast": float(np.percentile(seconds, 95) * 1000),
+                "peak_kib_per_forecast": float(np.max(peaks) / 1024) if peaks else 0.0,
+                "quantiles": sorted(predictions),
+            },
+        }
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Side-by-side comparison table of variant summaries"""
+    header = f"{'variant':<16}{'MAE':>9}{'MAPE %':>9}{'pinball':>9}{'risk hit':>10}{'ms/fc':>9}{'p95 ms':>9}{'KiB/fc':>9}"
+    lines = [
+        f"Rolling-origin backtest: {report['origins']} origins x {report['horizon_steps']} steps",
+        header,
+        "-" * len(header),
+    ]
+    for name, result in sorted(report["variants"].items(), key=lambda item: item[1]["summary"]["mae"]):
+        s = result["summary"]
+        lines.append(
+            f"{name:<16}{s['mae']:>9.1f}{s['mape']:>9.1f}{s['pinball']:>9.1f}{s['risk_hit_rate']:>10.1%}"
+            f"{s['ms_per_forecast']:>9.3f}{s['p95_ms_per_forecast']:>9.3f}{s['peak_kib_per_forecast']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin forecaster backtest")
+    parser.add_argument("--data", help="CSV or JSONL with timestamp,count (synthetic when omitted)")
+    parser.add_argument("--days", type=int, default=14, help="Days of synthetic history")
+    parser.add_argument("--capacity", type=int, default=1000)
+    parser.add_argument("--variants", default="arima,persistence,seasonal_naive")
+    parser.add_argument("--hours", type=int, default=6)
+    parser.add_argument("--stride", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the full report to this path")
+    args = parser.parse_args()
+
+    times, counts = load_series(args.data) if args.data else synthetic_series(args.days, args.capacity, args.seed)
+    report = backtest(times, counts, capacity=args.capacity, variants=args.variants.split(","),
+                      hours=args.hours, stride=args.stride, workers=args.workers, seed=args.seed)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Incremental rolling forecasts per zone
+
+Consecutive readings of a zone share most of their horizon, so the kept
+slots reuse their seasonal draws and only the slots entering the window
+are drawn; consumers receive a ForecastDiff instead of the whole series.
+When the level is steady only the new tail is computed and emitted. When
+a reading moves the level every kept count is rescaled by the same
+factor, so the diff carries that factor and the risk transitions instead
+of a point per slot (point dicts are built only for slots beyond an
+explicit count tolerance); see benchmarks/bench_incremental.py.
+
+Zones are keyed by client-supplied terminal ids, so the forecaster keeps
+at most `max_zones` of them and forgets the least recently updated.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from forecasting.seasonality import format_times, get_profile, time_grid, tz_suffix
+from rules.engine import get_rules
+from snapshots import DEFAULT_CAPACITY, ForecastSeries
+
+SLOT_US = 15 * 60_000_000  # one 15-minute slot in epoch microseconds
+DEFAULT_STEPS = 24
+DEFAULT_ZONE = "MAIN"
+MAX_ZONES = 256
+
+
+@dataclass
+class ForecastDiff:
+    """
+    What changed between two consecutive forecasts of one zone
+
+    `added` lists the points that entered at the end of the horizon and
+    `transitions` every overlapping point whose risk level changed. When the
+    level or capacity moved, every kept count was rescaled: `rescaled` is
+    set and `scale` gives the level ratio; only with a count tolerance does
+    `changed` list the points whose count moved by more than it. `full` is set when there was nothing to diff against
+    (first observation, gap, time jump or model change).
+    """
+    zone: str
+    version: int
+    full: bool
+    shift: int = 0
+    dropped: List[str] = field(default_factory=list)
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+    added: List[Dict[str, Any]] = field(default_factory=list)
+    transitions: List[Dict[str, Any]] = field(default_factory=list)
+    rescaled: bool = False
+    scale: Optional[float] = None
+
+    @property
+    def empty(self) -> bool:
+        """True when consumers have nothing to react to (a rescale without risk changes counts as nothing)"""
+        return not (self.full or self.changed or self.added or self.transitions)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "zone": self.zone, "version": self.version, "full": self.full, "shift": self.shift,
+            "dropped": self.dropped, "changed": self.changed, "added": self.added, "transitions": self.transitions,
+            "rescaled": self.rescaled, "scale": self.scale,
+        }
+
+
+@dataclass
+class _Horizon:
+    """Model state kept per zone between observations"""
+    grid: np.ndarray
+    factors: np.ndarray
+    level: float
+    capacity: int
+    tz_suffix: str
+    profile: Any
+    series: ForecastSeries
+    version: int = 0
+    times: Optional[List[str]] = None  # formatted grid, kept with the slots like the factors
+
+
+class IncrementalForecaster:
+    """
+    Rolling per-zone forecast that reuses the previous horizon
+
+    The seasonal trend factor of each slot (profile mean plus its noise draw)
+    is drawn once, when the slot enters the horizon, and kept until it
+    leaves. A new observation shifts the window by the whole slots elapsed
+    since its start, draws factors only for the slots added at the end and
+    updates the level; counts are rescaled from the kept factors only when
+    the level or capacity actually moved. The first observation of a zone
+    gives exactly what forecast_series gives for the same generator.
+
+    Args:
+        steps: Horizon length in 15-minute slots
+        rng: Generator for the noise draws (np.random when omitted)
+        smoothing: Weight of a new reading in the level (1.0 = latest reading)
+        tolerance: On a rescale, list points whose count moved by more than this
+                   as changed; None (default) reports only scale and transitions
+        max_zones: Zones kept; the least recently updated is forgotten beyond this
+    """
+    def __init__(self, steps: int = DEFAULT_STEPS, rng: Optional[np.random.Generator] = None,
+                 smoothing: float = 1.0, tolerance: Optional[int] = None, max_zones: int = MAX_ZONES):
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1]")
+        self.steps = steps
+        self.rng = rng if rng is not None else np.random
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.max_zones = max_zones
+        self.horizons: "OrderedDict[str, _Horizon]" = OrderedDict()
+        self.evicted = 0
+        self.full_updates = 0
+        self.incremental_updates = 0
+        self.points_drawn = 0
+
+    def horizon(self, zone: str = DEFAULT_ZONE) -> Optional[ForecastSeries]:
+        """Current forecast of a zone, if it has been observed"""
+        state = self.horizons.get(zone)
+        return state.series if state else None
+
+    def reset(self, zone: Optional[str] = None):
+        """Forget one zone (or all), so its next observation starts a full forecast"""
+        if zone is None:
+            self.horizons.clear()
+        else:
+            self.horizons.pop(zone, None)
+
+    def _keep(self, zone: str, state: _Horizon):
+        self.horizons[zone] = state
+        self.horizons.move_to_end(zone)
+        while len(self.horizons) > self.max_zones:
+            self.horizons.popitem(last=False)
+            self.evicted += 1
+
+    def _draw(self, grid: np.ndarray) -> np.ndarray:
+        mean, std = get_profile().lookup(grid)
+        self.points_drawn += grid.shape[0]
+        return mean + self.rng.normal(0, std)
+
+    @staticmethod
+    def _counts(level: float, factors: np.ndarray, capacity: int) -> np.ndarray:
+        return np.clip(np.trunc(level * factors), 0, capacity)
+
+    def update(self, current_data: Mapping[str, Any], zone: str = DEFAULT_ZONE) -> Tuple[ForecastSeries, ForecastDiff]:
+        """
+        Fold a new observation into a zone's forecast
+
+        Args:
+            current_data: Current operational state (snapshot or merged dict)
+            zone: Zone (or terminal) the observation belongs to
+
+        Returns:
+            (forecast series, diff against the zone's previous forecast)
+        """
+        reading = current_data.get("cctv_count", 100)
+        capacity = current_data.get("terminal_capacity", DEFAULT_CAPACITY)
+        current_time = datetime.fromisoformat(current_data.get("timestamp") or datetime.now().isoformat())
+        suffix = tz_suffix(current_time)
+        previous = self.horizons.get(zone)
+
+        shift = None
+        if previous is not None and previous.tz_suffix == suffix and previous.profile is get_profile():
+            elapsed = time_grid(current_time, 1)[0] - previous.grid[0]
+            if 0 <= elapsed < self.steps * SLOT_US:
+                shift = int(elapsed // SLOT_US)
+
+        if shift is None:
+            grid = time_grid(current_time, self.steps)
+            state = _Horizon(grid, self._draw(grid), reading, capacity, suffix, get_profile(), None,
+                             previous.version + 1 if previous else 1)
+            state.series = ForecastSeries(grid, self._counts(reading, state.factors, capacity), capacity, suffix)
+            state.times = format_times(grid, suffix)
+            self._keep(zone, state)
+            self.full_updates += 1
+            return state.series, ForecastDiff(zone, state.version, full=True)
+
+        # Shift the window: kept slots reuse their factors, only the new tail is drawn
+        kept = self.steps - shift
+        grid = previous.grid[shift:]
+        factors = previous.factors[shift:]
+        times = previous.times[shift:]
+        if shift:
+            tail = previous.grid[-1] + np.arange(1, shift + 1, dtype=np.int64) * SLOT_US
+            grid = np.concatenate([grid, tail])
+            factors = np.concatenate([factors, self._draw(tail)])
+            times = times + format_times(tail, suffix)
+
+        level = self.smoothing * reading + (1 - self.smoothing) * previous.level
+        rescaled = level != previous.level or capacity != previous.capacity
+        if rescaled:
+            counts = self._counts(level, factors, capacity)
+        else:
+            counts = np.concatenate([previous.series.counts[shift:], self._counts(level, factors[kept:], capacity)])
+
+        series = ForecastSeries(grid, counts, capacity, suffix)
+        state = _Horizon(grid, factors, level, capacity, suffix, previous.profile, series, previous.version + 1, times)
+        self._keep(zone, state)
+        self.incremental_updates += 1
+        return series, self._diff(zone, state, previous, shift, rescaled)
+
+    def _diff(self, zone: str, state: _Horizon, previous: _Horizon, shift: int, rescaled: bool) -> ForecastDiff:
+        kept = self.steps - shift
+        new, old = state.series, previous.series
+        levels = get_rules().risk.levels.tolist()
+        moved = np.flatnonzero(new.risk_codes[:kept] != old.risk_codes[shift:])
+        if not rescaled or self.tolerance is None:
+            changed = moved[:0]  # reused as they were, or summarised by scale and transitions
+        else:
+            changed = np.flatnonzero(np.abs(new.counts[:kept] - old.counts[shift:]) > self.tolerance)
+
+        changed_points = new.points_at(changed, state.times) if changed.shape[0] else []
+        for point, count, code in zip(changed_points, old.counts[shift + changed].tolist(),
+                                      old.risk_codes[shift + changed].tolist()):
+            point["previous_count"] = count
+            point["previous_risk_level"] = levels[code]
+        transitions = [
+            {"timestamp": state.times[i], "from": levels[before], "to": levels[after]}
+            for i, before, after in zip(moved.tolist(), old.risk_codes[shift + moved].tolist(),
+                                        new.risk_codes[moved].tolist())
+        ]
+        return ForecastDiff(
+            zone, state.version, full=False, shift=shift,
+            dropped=previous.times[:shift],
+            changed=changed_points,
+            added=new.points_at(np.arange(kept, self.steps), state.times),
+            transitions=transitions,
+            rescaled=rescaled,
+            scale=round(state.level / previous.level, 6) if rescaled and previous.level else None,
+        )
+
+
+incremental_forecaster = IncrementalForecaster()
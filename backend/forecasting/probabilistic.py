@@ -0,0 +1,173 @@
+from typing import Dict, List, Any, Optional, Sequence
+from datetime import datetime
+import zlib
+import numpy as np
+
+from forecasting.seasonality import format_times, get_profile, time_grid, tz_suffix
+from rules.engine import get_rules
+
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+DEFAULT_PATHS = 5000
+CHUNK_SIZE = 1024   # sample paths simulated per chunk
+MAX_BINS = 4096     # histogram bins per interval
+
+
+def default_seed(current_data: Dict[str, Any]) -> int:
+    """Stable seed derived from the operational state, so identical inputs give identical bands"""
+    key = "|".join(str(current_data.get(field)) for field in ("cctv_count", "terminal_capacity", "timestamp"))
+    return zlib.crc32(key.encode("utf-8"))
+
+
+def simulate_paths(
+    current_data: Dict[str, Any],
+    threshold_counts: np.ndarray,
+    hours: int = 6,
+    n_paths: int = DEFAULT_PATHS,
+    seed: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Simulate sample paths in chunks and fold them into per-interval statistics
+
+    Sample paths are drawn in chunks of `chunk_size` with one vectorized NumPy
+    call each. Predicted counts are integers in [0, capacity], so every chunk
+    is folded into a per-interval histogram; quantiles read from the
+    histogram are exact to within bin_width (one passenger up to MAX_BINS
+    counts) while memory stays bounded by chunk_size x horizon.
+
+    Args:
+        current_data: Current operational state (merged snapshot)
+        threshold_counts: Passenger counts whose exceedance is counted, shape (K,)
+        hours: Number of hours to forecast
+        n_paths: Number of simulated sample paths
+        seed: Generator seed; derived from current_data when omitted
+        chunk_size: Paths simulated per chunk
+
+    Returns:
+        Dict with the time grid, histogram (steps x bins), bin_width,
+        expected counts (steps,) and exceedance probabilities (steps x K)
+    """
+    base_count = current_data.get("cctv_count", 100)
+    capacity = current_data.get("terminal_capacity", 1000)
+    if capacity < 0:
+        raise ValueError("terminal_capacity cannot be negative")
+    current_time = datetime.fromisoformat(current_data.get("timestamp", datetime.now().isoformat()))
+    seed = default_seed(current_data) if seed is None else seed
+    rng = np.random.default_rng(seed)
+
+    steps = hours * 4  # 15-minute intervals
+    grid = time_grid(current_time, steps)
+    mean, std = get_profile().lookup(grid)
+
+    # Histogram layout: counts 0..capacity, grouped into at most MAX_BINS bins
+    bin_width = max(1, -(-(capacity + 1) // MAX_BINS))
+    n_bins = capacity // bin_width + 1
+    offsets = np.arange(steps) * n_bins
+    histogram = np.zeros(steps * n_bins, dtype=np.int64)
+
+    threshold_counts = np.asarray(threshold_counts, dtype=float)
+    exceed = np.zeros((steps, len(threshold_counts)), dtype=np.int64)
+    total = np.zeros(steps, dtype=np.float64)
+
+    remaining = n_paths
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        remaining -= size
+        factors = mean + rng.standard_normal((size, steps)) * std
+        counts = np.clip(np.trunc(base_count * factors), 0, capacity)
+
+        total += counts.sum(axis=0)
+        exceed += (counts[:, :, None] > threshold_counts).sum(axis=0)
+        bins = (counts // bin_width).astype(np.int64) + offsets
+        histogram += np.bincount(bins.ravel(), minlength=steps * n_bins)
+
+    return {
+        "seed": seed,
+        "grid": grid,
+        "tz_suffix": tz_suffix(current_time),
+        "capacity": capacity,
+        "histogram": histogram.reshape(steps, n_bins),
+        "bin_width": bin_width,
+        "expected": total / max(n_paths, 1),
+        "exceedance": exceed / max(n_paths, 1),
+    }
+
+
+def probabilistic_forecast(
+    current_data: Dict[str, Any],
+    hours: int = 6,
+    n_paths: int = DEFAULT_PATHS,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    seed: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Monte Carlo congestion forecast with quantile bands and exceedance probabilities
+
+    Args:
+        current_data: Current operational state (merged snapshot)
+        hours: Number of hours to forecast
+        n_paths: Number of simulated sample paths
+        quantiles: Quantiles to report, e.g. (0.1, 0.5, 0.9)
+        seed: Generator seed; derived from current_data when omitted
+        chunk_size: Paths simulated per chunk
+
+    Returns:
+        Dict with per-interval quantiles and risk-threshold exceedance probabilities
+    """
+    # Risk thresholds converted from utilization (%) to passenger counts
+    risk = get_rules().risk
+    capacity = current_data.get("terminal_capacity", 1000)
+    paths = simulate_paths(current_data, risk.thresholds * capacity / 100, hours, n_paths, seed, chunk_size)
+    bin_width = paths["bin_width"]
+
+    # Quantiles from the cumulative histogram (inverted CDF)
+    cdf = np.cumsum(paths["histogram"], axis=1)
+    quantile_values = {}
+    for q in quantiles:
+        bin_index = np.argmax(cdf >= max(q * n_paths, 1), axis=1)
+        quantile_values[q] = np.minimum(bin_index * bin_width, capacity)
+
+    exceedance = paths["exceedance"]
+    expected = paths["expected"]
+    exceedance_levels = list(risk.levels[1:])
+
+    points = []
+    for i, timestamp in enumerate(format_times(paths["grid"], paths["tz_suffix"])):
+        point = {
+            "timestamp": timestamp,
+            "expected_count": round(float(expected[i]), 1),
+        }
+        for q in quantiles:
+            point[quantile_label(q)] = int(quantile_values[q][i])
+        point["exceedance_probability"] = {
+            level: round(float(p), 4) for level, p in zip(exceedance_levels, exceedance[i])
+        }
+        points.append(point)
+
+    return {
+        "n_paths": n_paths,
+        "seed": paths["seed"],
+        "quantiles": [quantile_label(q) for q in quantiles],
+        "points": points,
+    }
+
+
+def quantile_label(q: float) -> str:
+    """0.1 -> "p10", 0.975 -> "p97.5" """
+    value = q * 100
+    return f"p{value:g}"
+
+
+def parse_quantiles(value: Optional[str]) -> List[float]:
+    """Parse a comma separated list such as "10,50,90" or "0.1,0.5,0.9" """
+    if not value:
+        return list(DEFAULT_QUANTILES)
+    quantiles = []
+    for part in value.split(","):
+        q = float(part)
+        q = q / 100 if q > 1 else q
+        if not 0 < q < 1:
+            raise ValueError(f"Quantile out of range: {part}")
+        quantiles.append(q)
+    return sorted(set(quantiles))
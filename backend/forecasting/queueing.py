@@ -0,0 +1,255 @@
+from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from snapshots import forecast_counts
+
+SLOT_MINUTES = 15
+SERVICE_RATE = 2.5    # passengers per minute per security lane (150/hour)
+DWELL_MINUTES = 60.0  # average time a counted passenger spends landside before security
+ZONE_BLOCK = 8        # zones simulated together by one generator in discrete mode
+
+
+def forecast_to_arrivals(forecast_points: List[Dict[str, Any]], dwell_minutes: float = DWELL_MINUTES) -> np.ndarray:
+    """
+    Convert forecast terminal counts into security arrival rates
+
+    A passenger counted in the terminal reaches security within roughly
+    `dwell_minutes`, so the arrival rate is count / dwell (passengers/minute).
+    """
+    return np.asarray(forecast_counts(forecast_points), dtype=float) / dwell_minutes
+
+
+def _broadcast(arrivals, lanes):
+    arrivals = np.atleast_2d(np.asarray(arrivals, dtype=float))
+    lanes = np.asarray(lanes, dtype=np.int64)
+    if lanes.ndim == 0:
+        lanes = np.full(arrivals.shape, int(lanes))
+    elif lanes.ndim == 1 and lanes.shape[0] == arrivals.shape[0] and arrivals.shape[0] > 1:
+        lanes = np.repeat(lanes[:, None], arrivals.shape[1], axis=1)
+    lanes = np.broadcast_to(np.atleast_2d(lanes), arrivals.shape)
+    return arrivals, np.maximum(lanes, 0)
+
+
+def erlang_c(arrivals: np.ndarray, lanes: np.ndarray, service_rate: float) -> np.ndarray:
+    """
+    Probability an arriving passenger has to wait in an M/M/c queue
+
+    Uses the Erlang B recursion vectorized over every (zone, slot) cell.
+    Cells with rho >= 1 (or no lanes) return 1.
+    """
+    offered = arrivals / service_rate  # offered load in Erlangs
+    blocking = np.ones_like(offered)
+    for k in range(1, int(lanes.max(initial=0)) + 1):
+        updated = offered * blocking / (k + offered * blocking)
+        blocking = np.where(k <= lanes, updated, blocking)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho = np.where(lanes > 0, offered / np.maximum(lanes, 1), np.inf)
+        wait_probability = blocking / (1 - rho * (1 - blocking))
+    return np.where(rho < 1, wait_probability, 1.0)
+
+
+def analytic_queues(arrivals, lanes, service_rate: float = SERVICE_RATE) -> Dict[str, np.ndarray]:
+    """
+    Pointwise-stationary M/M/c queue with fluid carry-over between slots
+
+    Stable slots use the Erlang C steady state. Any excess demand in an
+    overloaded slot (rho >= 1) is carried into the next slots as a backlog
+    that drains at the spare service capacity.
+
+    Args:
+        arrivals: Arrival rate per slot, shape (zones, slots) or (slots,), passengers/minute
+        lanes: Active lanes - scalar, per zone (zones,) or time-varying (zones, slots)
+        service_rate: Passengers per minute per lane
+
+    Returns:
+        Dict of (zones, slots) arrays: queue_length, wait_minutes, utilization
+    """
+    arrivals, lanes = _broadcast(arrivals, lanes)
+    capacity = lanes * service_rate
+    wait_probability = erlang_c(arrivals, lanes, service_rate)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steady_wait = np.where(
+            arrivals < capacity, wait_probability / (capacity - arrivals), 0.0
+        )
+    steady_queue = arrivals * steady_wait
+
+    # Fluid backlog: excess demand carried across slots, averaged over each slot
+    backlog = np.zeros(arrivals.shape[0])
+    backlog_mean = np.empty_like(arrivals)
+    for t in range(arrivals.shape[1]):
+        drift = arrivals[:, t] - capacity[:, t]  # passengers/minute
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drain_minutes = np.where(drift < 0, backlog / -drift, np.inf)
+            backlog_mean[:, t] = np.where(
+                drain_minutes >= SLOT_MINUTES,
+                backlog + drift * SLOT_MINUTES / 2,
+                backlog * drain_minutes / 2 / SLOT_MINUTES,
+            )
+        backlog = np.maximum(0.0, backlog + drift * SLOT_MINUTES)
+
+    queue_length = steady_queue + backlog_mean
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wait_minutes = np.where(
+            capacity > 0,
+            steady_wait + backlog_mean / np.where(capacity > 0, capacity, 1),
+            np.where(arrivals > 0, np.inf, 0.0),
+        )
+        utilization = np.where(capacity > 0, arrivals / np.where(capacity > 0, capacity, 1), np.inf)
+
+    return {
+        "queue_length": queue_length,
+        "wait_minutes": wait_minutes,
+        "utilization": utilization,
+    }
+
+
+def _simulate_block(
+    arrivals: np.ndarray,
+    lanes: np.ndarray,
+    service_rate: float,
+    replications: int,
+    step_minutes: float,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Mean queue length per (replication, zone, slot) for one block of zones"""
+    zones, slots = arrivals.shape
+    steps_per_slot = max(1, int(round(SLOT_MINUTES / step_minutes)))
+    
+    in_system = np.zeros((replications, zones))
+    mean_queue = np.empty((replications, zones, slots))
+    for t in range(slots):
+        lam = arrivals[:, t] * step_minutes
+        servers = lanes[:, t]
+        queue_sum = np.zeros((replications, zones))
+        for _ in range(steps_per_slot):
+            # Queue is sampled after arrivals and after departures to
+            # cancel the ordering bias of a fixed time step
+            in_system += rng.poisson(lam, size=(replications, zones))
+            queue_sum += np.maximum(in_system - servers, 0)
+            busy = np.minimum(in_system, servers)
+            in_system -= np.minimum(rng.poisson(busy * service_rate * step_minutes), in_system)
+            queue_sum += np.maximum(in_system - servers, 0)
+        mean_queue[:, :, t] = queue_sum / (2 * steps_per_slot)
+    return mean_queue
+
+def discrete_queues(
+    arrivals,
+    lanes,
+    service_rate: float = SERVICE_RATE,
+    replications: int = 200,
+    seed: Optional[int] = None,
+    step_minutes: float = 0.5,
+    workers: int = 1
+) -> Dict[str, np.ndarray]:
+    """
+    Stochastic queue simulation vectorized across replications and zones
+
+    Time advances in `step_minutes` steps. Each step draws Poisson arrivals
+    and Poisson service completions (busy lanes x rate, capped by the number
+    in system) for every (replication, zone) cell in one NumPy call.
+    Zones are split into fixed blocks with independent child generators, so
+    blocks can run on a thread pool (NumPy releases the GIL while sampling)
+    and results do not depend on the number of workers.
+
+    Returns:
+        Dict of (zones, slots) arrays: queue_length (mean), wait_minutes (mean),
+        wait_p90_minutes, utilization
+    """
+    arrivals, lanes = _broadcast(arrivals, lanes)
+    zones = arrivals.shape[0]
+    starts = list(range(0, zones, ZONE_BLOCK))
+    generators = [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(len(starts))]
+
+    def run(block):
+        start, rng = block
+        stop = start + ZONE_BLOCK
+        return _simulate_block(arrivals[start:stop], lanes[start:stop], service_rate,
+                               replications, step_minutes, rng)
+
+    blocks = list(zip(starts, generators))
+    if workers > 1 and len(blocks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run, blocks))
+    else:
+        results = [run(block) for block in blocks]
+    mean_queue = np.concatenate(results, axis=1)
+
+    capacity = lanes * service_rate
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Little's law per replication: Wq = Lq / lambda
+        waits = np.where(arrivals > 0, mean_queue / np.where(arrivals > 0, arrivals, 1), 0.0)
+        utilization = np.where(capacity > 0, arrivals / np.where(capacity > 0, capacity, 1), np.inf)
+
+    return {
+        "queue_length": mean_queue.mean(axis=0),
+        "wait_minutes": waits.mean(axis=0),
+        "wait_p90_minutes": np.percentile(waits, 90, axis=0),
+        "utilization": utilization,
+    }
+
+
+def simulate_queues(arrivals, lanes, mode: str = "analytic", **kwargs) -> Dict[str, np.ndarray]:
+    """Dispatch to the analytic or discrete queue engine"""
+    if mode == "analytic":
+        return analytic_queues(arrivals, lanes, **kwargs)
+    if mode == "discrete":
+        return discrete_queues(arrivals, lanes, **kwargs)
+    raise ValueError(f"Unknown queue mode: {mode}")
+
+
+def zone_queue_forecasts(
+    zone_forecasts: List[List[Dict[str, Any]]],
+    zone_capacities: List[Dict[str, Any]],
+    mode: str = "analytic",
+    **kwargs
+) -> List[List[Dict[str, Any]]]:
+    """
+    Predicted security queues per forecast slot for several zones at once
+
+    Args:
+        zone_forecasts: One forecast_congestion output per zone (same horizon)
+        zone_capacities: One capacity dict per zone with security_lanes_active
+        mode: "analytic" (M/M/c) or "discrete" (replicated simulation)
+
+    Returns:
+        Per zone, a list of per-slot queue predictions aligned with the forecast
+    """
+    arrivals = np.vstack([forecast_to_arrivals(points) for points in zone_forecasts])
+    lanes = np.array([
+        capacity.get("security_lanes_active", capacity.get("security_lanes_total", 1))
+        for capacity in zone_capacities
+    ])
+    arrivals, lane_matrix = _broadcast(arrivals, lanes[:, None])
+    result = simulate_queues(arrivals, lane_matrix, mode=mode, **kwargs)
+
+    columns = {name: np.round(values, 1).tolist() for name, values in result.items() if name != "utilization"}
+    utilization = np.round(result["utilization"], 3).tolist()
+    arrival_rates = np.round(arrivals, 2).tolist()
+    lane_counts = lane_matrix.tolist()
+
+    zones = []
+    for z, points in enumerate(zone_forecasts):
+        slots = []
+        for i, point in enumerate(points):
+            slot = {
+                "timestamp": point.get("timestamp"),
+                "arrivals_per_minute": arrival_rates[z][i],
+                "lanes_active": lane_counts[z][i],
+                "lane_utilization": utilization[z][i],
+            }
+            for name, values in columns.items():
+                slot[name] = values[z][i]
+            slots.append(slot)
+        zones.append(slots)
+    return zones
+
+def queue_forecast(
+    forecast_points: List[Dict[str, Any]],
+    capacity_data: Dict[str, Any],
+    mode: str = "analytic",
+    **kwargs
+) -> List[Dict[str, Any]]:
+    """Predicted security queue per forecast slot for one zone"""
+    return zone_queue_forecasts([forecast_points], [capacity_data], mode=mode, **kwargs)[0]
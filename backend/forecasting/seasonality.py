@@ -0,0 +1,206 @@
+import os
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+HOURS_PER_WEEK = 168
+US_PER_HOUR = 3_600_000_000
+US_PER_DAY = 24 * US_PER_HOUR
+EPOCH = datetime(1970, 1, 1)
+EPOCH_WEEKDAY = EPOCH.weekday()  # 1970-01-01 was a Thursday
+
+PROFILE_PATH = os.getenv("AIRFLOW_SEASONALITY_PATH")
+
+
+def to_epoch_us(moment: datetime) -> int:
+    """Wall-clock time as integer microseconds since 1970-01-01 (timezone offset ignored)"""
+    delta = moment.replace(tzinfo=None) - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def time_grid(start: datetime, steps: int, step_minutes: float = 15) -> np.ndarray:
+    """Regular grid of `steps` wall-clock times (epoch microseconds) starting at `start`"""
+    return to_epoch_us(start) + np.arange(steps, dtype=np.int64) * int(step_minutes * 60_000_000)
+
+
+def hour_of_day(grid: np.ndarray) -> np.ndarray:
+    return (grid // US_PER_HOUR) % 24
+
+
+def hour_of_week(grid: np.ndarray) -> np.ndarray:
+    """Monday 00:00 = 0 ... Sunday 23:00 = 167"""
+    days = grid // US_PER_DAY
+    return ((days + EPOCH_WEEKDAY) % 7) * 24 + hour_of_day(grid)
+
+
+def format_times(grid: np.ndarray, tz_suffix: str = "") -> List[str]:
+    """
+    ISO strings for a grid, matching datetime.isoformat
+
+    Seconds precision unless any point has microseconds; `tz_suffix` (e.g.
+    "+00:00") is appended for timezone-aware inputs.
+    """
+    grid = np.asarray(grid, dtype=np.int64)
+    if not grid.shape[0]:
+        return []
+    unit = "s" if not np.any(grid % 1_000_000) else "us"
+    strings = np.datetime_as_string(grid.astype("datetime64[us]"), unit=unit).tolist()
+    return [s + tz_suffix for s in strings] if tz_suffix else strings
+
+
+def tz_suffix(moment: datetime) -> str:
+    """The UTC offset part of moment.isoformat(), or "" for naive datetimes"""
+    if moment.tzinfo is None:
+        return ""
+    return moment.isoformat()[len(moment.replace(tzinfo=None).isoformat()):]
+
+
+def hourly_table(default, windows: Sequence[Tuple[Tuple[int, int], object]]) -> np.ndarray:
+    """
+    24-row lookup table from inclusive hour windows
+
+    A window (22, 5) wraps past midnight. Later windows do not override
+    earlier ones, mirroring the first-match if/elif chains they replace.
+    """
+    table = [None] * 24
+    for (start, end), value in windows:
+        hours = range(start, end + 1) if start <= end else list(range(start, 24)) + list(range(0, end + 1))
+        for hour in hours:
+            if table[hour] is None:
+                table[hour] = value
+    return np.array([default if value is None else value for value in table])
+
+
+# Built-in daily shape: morning peak 6-9, evening peak 16-19, night low 22-5
+DEFAULT_DAILY_MEAN = hourly_table(1.0, [((6, 9), 1.3), ((16, 19), 1.4), ((22, 5), 0.5)])
+DEFAULT_DAILY_STD = hourly_table(0.08, [((6, 9), 0.1), ((16, 19), 0.1), ((22, 5), 0.05)])
+
+
+class SeasonalProfile:
+    """
+    Hour-of-week trend factors stored as lookup arrays
+
+    `mean[h]` / `std[h]` give the multiplier on the current count (and its
+    spread) for hour-of-week h. Holidays, when configured, use a separate
+    24-hour profile indexed by hour of day. Profiles are not modified after
+    construction; `fingerprint` identifies their contents for cache keys.
+    """
+
+    def __init__(self, mean: np.ndarray, std: np.ndarray,
+                 holiday_mean: Optional[np.ndarray] = None, holiday_std: Optional[np.ndarray] = None,
+                 holidays: Iterable[date] = ()):
+        self.mean = np.asarray(mean, dtype=float)
+        self.std = np.asarray(std, dtype=float)
+        if self.mean.shape != (HOURS_PER_WEEK,) or self.std.shape != (HOURS_PER_WEEK,):
+            raise ValueError("Weekly profiles need 168 hourly values")
+        self.holiday_mean = None if holiday_mean is None else np.asarray(holiday_mean, dtype=float)
+        self.holiday_std = None if holiday_std is None else np.asarray(holiday_std, dtype=float)
+        self.holiday_days = np.unique(np.array(
+            [(d - EPOCH.date()).days for d in holidays], dtype=np.int64
+        ))
+        digest = hashlib.sha1()
+        for values in (self.mean, self.std, self.holiday_mean, self.holiday_std, self.holiday_days):
+            digest.update(b"-" if values is None else values.tobytes())
+        self.fingerprint = digest.hexdigest()[:16]
+
+    @classmethod
+    def default(cls) -> "SeasonalProfile":
+        """The built-in daily shape repeated over the week"""
+        return cls(np.tile(DEFAULT_DAILY_MEAN, 7), np.tile(DEFAULT_DAILY_STD, 7))
+
+    def is_holiday(self, grid: np.ndarray) -> np.ndarray:
+        if self.holiday_days.shape[0] == 0:
+            return np.zeros(np.shape(grid), dtype=bool)
+        return np.isin(np.asarray(grid) // US_PER_DAY, self.holiday_days)
+
+    def lookup(self, grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(mean, std) trend factors for every grid point, in one gather each"""
+        index = hour_of_week(grid)
+        mean, std = self.mean[index], self.std[index]
+        if self.holiday_mean is not None and self.holiday_days.shape[0]:
+            holiday = self.is_holiday(grid)
+            hours = hour_of_day(grid)
+            mean = np.where(holiday, self.holiday_mean[hours], mean)
+            std = np.where(holiday, self.holiday_std[hours], std)
+        return mean, std
+
+    @classmethod
+    def learn(cls, times: Sequence[datetime], counts: Sequence[float],
+              holidays: Iterable[date] = (), min_samples: int = 2) -> "SeasonalProfile":
+        """
+        Learn profiles from a count history
+
+        Counts are normalised by the overall mean of non-holiday history, so
+        factors keep the built-in meaning (1.0 = typical level). Hours of
+        week with fewer than `min_samples` observations keep the default.
+        The holiday profile is learned only if holiday history exists.
+        """
+        holidays = list(holidays)
+        grid = np.array([to_epoch_us(t) for t in times], dtype=np.int64)
+        counts = np.asarray(counts, dtype=float)
+        default = cls.default()
+        holiday = cls(default.mean, default.std, holidays=holidays).is_holiday(grid)
+
+        regular = ~holiday
+        level = counts[regular].mean() if regular.any() else counts.mean()
+        ratios = counts / level if level > 0 else np.zeros_like(counts)
+
+        mean, std = _grouped_stats(hour_of_week(grid[regular]), ratios[regular], HOURS_PER_WEEK,
+                                   default.mean, default.std, min_samples)
+        holiday_mean = holiday_std = None
+        if holiday.any():
+            holiday_mean, holiday_std = _grouped_stats(
+                hour_of_day(grid[holiday]), ratios[holiday], 24,
+                DEFAULT_DAILY_MEAN, DEFAULT_DAILY_STD, min_samples
+            )
+        return cls(mean, std, holiday_mean, holiday_std, holidays)
+
+    def save(self, path: str):
+        np.savez(
+            path, mean=self.mean, std=self.std, holiday_days=self.holiday_days,
+            holiday_mean=self.holiday_mean if self.holiday_mean is not None else np.array([]),
+            holiday_std=self.holiday_std if self.holiday_std is not None else np.array([]),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SeasonalProfile":
+        with np.load(path) as data:
+            has_holiday = data["holiday_mean"].shape[0] == 24
+            return cls(
+                data["mean"], data["std"],
+                data["holiday_mean"] if has_holiday else None,
+                data["holiday_std"] if has_holiday else None,
+                [EPOCH.date() + timedelta(days=int(d)) for d in data["holiday_days"]],
+            )
+
+
+def _grouped_stats(index: np.ndarray, values: np.ndarray, size: int,
+                   default_mean: np.ndarray, default_std: np.ndarray, min_samples: int):
+    """Per-bucket mean/std with bincount, falling back to defaults for sparse buckets"""
+    n = np.bincount(index, minlength=size)
+    total = np.bincount(index, weights=values, minlength=size)
+    squares = np.bincount(index, weights=values ** 2, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / n
+        std = np.sqrt(np.maximum(squares / n - mean ** 2, 0.0))
+    enough = n >= min_samples
+    return np.where(enough, mean, default_mean), np.where(enough, std, default_std)
+
+
+_profile = None
+
+
+def get_profile() -> SeasonalProfile:
+    """Active profile: loaded from AIRFLOW_SEASONALITY_PATH if set, else the built-in one"""
+    global _profile
+    if _profile is None:
+        _profile = SeasonalProfile.load(PROFILE_PATH) if PROFILE_PATH else SeasonalProfile.default()
+    return _profile
+
+
+def set_profile(profile: Optional[SeasonalProfile]):
+    """Install a learned profile (None restores the configured default)"""
+    global _profile
+    _profile = profile
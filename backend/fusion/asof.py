@@ -0,0 +1,264 @@
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+import numpy as np
+
+from rules.engine import get_rules
+
+FILL_POLICIES = ("ffill", "interpolate")
+CAMERA_AGGREGATIONS = ("sum", "mean")
+
+
+class SourcePolicy:
+    """
+    How one source is aligned to the fused time grid
+
+    Args:
+        max_staleness: Oldest reading (seconds) still usable for a grid point
+        fill: "ffill" carries the last reading forward, "interpolate" blends
+              linearly towards the next reading when one exists
+        aggregate: How per-camera counts combine (CCTV only): "sum" (default)
+                   when each camera covers its own zone, "mean" (confidence
+                   weighted) when cameras overlap and count the same people
+    """
+    def __init__(self, max_staleness: float, fill: str = "ffill", aggregate: str = "sum"):
+        if fill not in FILL_POLICIES:
+            raise ValueError(f"Unknown fill policy: {fill}")
+        if aggregate not in CAMERA_AGGREGATIONS:
+            raise ValueError(f"Unknown camera aggregation: {aggregate}")
+        self.max_staleness = float(max_staleness)
+        self.fill = fill
+        self.aggregate = aggregate
+
+
+# CCTV counts move quickly; schedules and capacity change rarely
+DEFAULT_POLICIES = {
+    "cctv": SourcePolicy(max_staleness=120, fill="interpolate"),
+    "aodb": SourcePolicy(max_staleness=900, fill="ffill"),
+    "capacity": SourcePolicy(max_staleness=6 * 3600, fill="ffill"),
+}
+
+AODB_FIELDS = ("active_flights", "arriving_flights", "departing_flights")
+
+
+def to_epoch(timestamps: Sequence[Any]) -> np.ndarray:
+    """
+    ISO strings or datetimes to float seconds
+
+    Aware timestamps are converted to UTC; naive ones are taken as-is, so a
+    stream should use one convention throughout.
+    """
+    parsed = []
+    for value in timestamps:
+        moment = datetime.fromisoformat(value) if isinstance(value, str) else value
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        parsed.append(moment)
+    return np.array(parsed, dtype="datetime64[ms]").astype(np.int64) / 1000.0
+
+
+def epoch_to_iso(seconds: np.ndarray) -> List[str]:
+    """Float seconds back to naive ISO strings"""
+    return np.datetime_as_string(np.asarray(seconds * 1000, dtype=np.int64).astype("datetime64[ms]"),
+                                 unit="s").tolist()
+
+
+def asof_join(
+    grid: np.ndarray,
+    times: np.ndarray,
+    values: np.ndarray,
+    policy: SourcePolicy
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Align readings to grid points with one searchsorted call
+
+    Args:
+        grid: Sorted grid times, shape (G,)
+        times: Reading times, shape (N,), any order
+        values: Reading values, shape (N,) or (N, K)
+        policy: Staleness limit and fill policy
+
+    Returns:
+        (aligned values with NaN where no usable reading exists, age in seconds
+         of the reading used - NaN where missing)
+    """
+    order = np.argsort(times, kind="stable")
+    times = np.asarray(times, dtype=float)[order]
+    values = np.asarray(values, dtype=float)[order]
+    squeeze = values.ndim == 1
+    if squeeze:
+        values = values[:, None]
+
+    aligned = np.full((grid.shape[0], values.shape[1]), np.nan)
+    age = np.full(grid.shape[0], np.nan)
+    if times.shape[0] == 0:
+        return (aligned[:, 0] if squeeze else aligned), age
+
+    prev = np.searchsorted(times, grid, side="right") - 1
+    has_prev = prev >= 0
+    prev_safe = np.maximum(prev, 0)
+    age = np.where(has_prev, grid - times[prev_safe], np.nan)
+    usable = has_prev & (age <= policy.max_staleness)
+    aligned[usable] = values[prev_safe[usable]]
+
+    if policy.fill == "interpolate":
+        nxt = np.minimum(prev_safe + 1, times.shape[0] - 1)
+        gap = times[nxt] - times[prev_safe]
+        # Interpolate only between readings close enough to bracket the point
+        between = usable & (nxt > prev) & (gap > 0) & (gap <= 2 * policy.max_staleness)
+        weight = np.where(between, (grid - times[prev_safe]) / np.where(gap > 0, gap, 1), 0.0)[:, None]
+        blended = values[prev_safe] + (values[nxt] - values[prev_safe]) * weight
+        aligned[between] = blended[between]
+
+    age = np.where(usable, age, np.nan)
+    return (aligned[:, 0] if squeeze else aligned), age
+
+
+def aggregate_cameras(
+    readings: List[Dict[str, Any]],
+    grid: np.ndarray,
+    policy: SourcePolicy
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Terminal count from per-camera readings
+
+    Every camera is as-of joined in the same searchsorted pass by offsetting
+    each camera's timeline into its own disjoint range. Cameras whose latest
+    reading is too stale drop out for that grid point. With the default
+    "sum" aggregation the fresh cameras' counts are added up (one camera per
+    zone); "mean" gives their confidence-weighted mean for overlapping cameras.
+
+    Returns:
+        (fused count, mean confidence of contributing cameras, contributing camera count)
+    """
+    if not readings or grid.shape[0] == 0:
+        empty = np.full(grid.shape[0], np.nan)
+        return empty, empty.copy(), np.zeros(grid.shape[0], dtype=np.int64)
+
+    cameras, codes = np.unique(
+        [str(r.get("camera_id", r.get("source", "CCTV"))) for r in readings], return_inverse=True
+    )
+    times = to_epoch([r["timestamp"] for r in readings])
+    counts = np.array([r["count"] for r in readings], dtype=float)
+    confidence = np.array([r.get("confidence", 1.0) for r in readings], dtype=float)
+
+    # Disjoint time range per camera: code * span moves each camera past the others
+    span = max(times.max(), grid.max()) - min(times.min(), grid.min()) + 4 * policy.max_staleness + 1
+    offset_times = times + codes * span
+    offset_grid = (grid[None, :] + np.arange(cameras.shape[0])[:, None] * span).ravel()
+
+    joined, age = asof_join(offset_grid, offset_times, np.column_stack([counts, confidence]), policy)
+    # A join may reach back into the previous camera's range; the staleness limit
+    # rejects that because the ranges are separated by more than max_staleness
+    joined = joined.reshape(cameras.shape[0], grid.shape[0], 2)
+    camera_counts, camera_confidence = joined[..., 0], joined[..., 1]
+
+    valid = ~np.isnan(camera_counts)
+    weights = np.where(valid, camera_confidence, 0.0)
+    total_weight = weights.sum(axis=0)
+    counts = np.where(valid, camera_counts, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if policy.aggregate == "sum":
+            fused = np.where(valid.any(axis=0), counts.sum(axis=0), np.nan)
+        else:
+            fused = np.where(total_weight > 0, (counts * weights).sum(axis=0) / total_weight, np.nan)
+        mean_confidence = np.where(valid.any(axis=0), total_weight / np.maximum(valid.sum(axis=0), 1), np.nan)
+    return fused, mean_confidence, valid.sum(axis=0)
+
+
+def fuse_window(
+    cctv_readings: List[Dict[str, Any]],
+    aodb_readings: List[Dict[str, Any]],
+    capacity_readings: List[Dict[str, Any]],
+    start: Any,
+    end: Any,
+    step_seconds: float = 60,
+    policies: Optional[Dict[str, SourcePolicy]] = None
+) -> Dict[str, Any]:
+    """
+    Fuse asynchronous source streams onto a regular time grid in one pass
+
+    Args:
+        cctv_readings: Per-camera readings with camera_id, timestamp, count, confidence
+        aodb_readings: Flight schedule readings with timestamp and flight counts
+        capacity_readings: Capacity readings with timestamp and terminal_capacity
+        start, end: Window bounds (ISO strings or datetimes), end inclusive
+        step_seconds: Grid spacing
+        policies: Per-source SourcePolicy overrides keyed cctv/aodb/capacity
+
+    Returns:
+        Columnar frame: dict of equal-length arrays plus "timestamp" strings.
+        Rows where a required source is missing or stale have valid=False.
+    """
+    policies = {**DEFAULT_POLICIES, **(policies or {})}
+    bounds = to_epoch([start, end])
+    grid = np.arange(bounds[0], bounds[1] + step_seconds / 2, step_seconds)
+
+    cctv_count, cctv_confidence, cameras = aggregate_cameras(cctv_readings, grid, policies["cctv"])
+
+    if aodb_readings:
+        flights, aodb_age = asof_join(
+            grid,
+            to_epoch([r["timestamp"] for r in aodb_readings]),
+            np.array([[r.get(field, 0) for field in AODB_FIELDS] for r in aodb_readings], dtype=float),
+            policies["aodb"]
+        )
+    else:
+        flights, aodb_age = np.full((grid.shape[0], len(AODB_FIELDS)), np.nan), np.full(grid.shape[0], np.nan)
+
+    if capacity_readings:
+        capacity, capacity_age = asof_join(
+            grid,
+            to_epoch([r["timestamp"] for r in capacity_readings]),
+            np.array([r["terminal_capacity"] for r in capacity_readings], dtype=float),
+            policies["capacity"]
+        )
+    else:
+        capacity, capacity_age = np.full(grid.shape[0], np.nan), np.full(grid.shape[0], np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        utilization = np.where(capacity > 0, cctv_count / capacity * 100, np.nan)
+    valid = ~np.isnan(utilization)
+
+    frame = {
+        "epoch": grid,
+        "timestamp": epoch_to_iso(grid),
+        "cctv_count": cctv_count,
+        "cctv_confidence": cctv_confidence,
+        "cameras_reporting": cameras,
+        "terminal_capacity": capacity,
+        "utilization_rate": utilization,
+        "aodb_age": aodb_age,
+        "capacity_age": capacity_age,
+        "valid": valid,
+    }
+    for i, field in enumerate(AODB_FIELDS):
+        frame[field] = flights[:, i]
+    return frame
+
+
+def frame_snapshot(frame: Dict[str, Any], index: int = -1) -> Optional[Dict[str, Any]]:
+    """
+    One fused row in the merge_data format, ready for forecast_congestion
+
+    Defaults to the latest row; walks back to the most recent valid row and
+    returns None if the window has none.
+    """
+    if len(frame["valid"]) == 0:
+        return None
+    valid_rows = np.flatnonzero(frame["valid"][:index % len(frame["valid"]) + 1])
+    if valid_rows.shape[0] == 0:
+        return None
+    i = int(valid_rows[-1])
+
+    flights = {field: 0 if np.isnan(frame[field][i]) else int(round(frame[field][i])) for field in AODB_FIELDS}
+    utilization = float(frame["utilization_rate"][i])
+    return {
+        "timestamp": frame["timestamp"][i],
+        "cctv_count": int(round(frame["cctv_count"][i])),
+        "terminal_capacity": int(frame["terminal_capacity"][i]),
+        **flights,
+        "utilization_rate": utilization,
+        "congestion_level": get_rules().risk.level(utilization),
+        "flight_density": (flights["arriving_flights"] + flights["departing_flights"]) / 2,
+        "cctv_confidence": round(float(frame["cctv_confidence"][i]), 3),
+    }
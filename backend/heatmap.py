@@ -0,0 +1,237 @@
+import json
+import struct
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from forecasting.probabilistic import simulate_paths
+from forecasting.seasonality import format_times, get_profile
+from rules.engine import get_rules
+from snapshots import as_snapshot
+
+# Terminal zones and their load relative to the terminal average
+# (same multipliers the dashboard heatmap used client-side)
+ZONES = (
+    ("Security Checkpoints", 1.2),
+    ("Check-in Counters", 0.9),
+    ("Departure Gates", 1.0),
+    ("Arrival Hall", 0.7),
+    ("Baggage Claim", 0.8),
+)
+SLOT_MINUTES = 15
+AGGREGATIONS = ("max", "mean")
+DEFAULT_PATHS = 2000
+
+# Binary layout: magic, uint32 header length, JSON header, then each array
+# at a 4-byte aligned offset so it can be viewed as a JS typed array in place
+MAGIC = b"AFHM"
+ALIGNMENT = 4
+ARRAY_DTYPES = {"utilization": "float32", "risk_code": "uint8", "exceedance": "float32"}
+
+
+def state_version(current_data: Mapping[str, Any]) -> str:
+    """Short content hash of the operational state, the active risk scale and the seasonal profile"""
+    snapshot = as_snapshot(current_data)
+    risk = get_rules().risk
+    parts = [
+        str(snapshot.cctv_count), str(snapshot.terminal_capacity), str(snapshot.active_flights),
+        str(snapshot.timestamp), ",".join(map(str, risk.thresholds.tolist())), ",".join(risk.levels.tolist()),
+        get_profile().fingerprint,
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def downsample(values: np.ndarray, factor: int, agg: str = "max") -> np.ndarray:
+    """Aggregate consecutive time slots (last axis); a shorter final window is kept"""
+    if factor <= 1:
+        return values
+    starts = np.arange(0, values.shape[-1], factor)
+    if agg == "max":
+        return np.maximum.reduceat(values, starts, axis=-1)
+    sizes = np.diff(np.append(starts, values.shape[-1]))
+    return np.add.reduceat(values, starts, axis=-1) / sizes
+
+
+def compute_heatmap(
+    current_data: Mapping[str, Any],
+    hours: int = 6,
+    step_minutes: int = SLOT_MINUTES,
+    agg: str = "max",
+    level: str = "HIGH",
+    n_paths: int = DEFAULT_PATHS,
+    zones: Sequence[Tuple[str, float]] = ZONES
+) -> Dict[str, Any]:
+    """
+    Zone x time density matrices for one operational state
+
+    Utilization is the Monte Carlo expected count scaled by each zone's
+    multiplier; exceedance is the probability that a zone is above `level`,
+    counted exactly per sample path by turning the zone threshold into a
+    terminal passenger count. Downsampled windows report the max (or mean)
+    of their slots and the risk code of the aggregated utilization.
+
+    Args:
+        current_data: Operational state (snapshot or merged dict)
+        hours: Forecast horizon
+        step_minutes: Output resolution, a multiple of 15
+        agg: "max" or "mean" over downsampled windows
+        level: Risk level whose exceedance probability is reported
+        n_paths: Monte Carlo sample paths
+        zones: (name, load multiplier) pairs
+
+    Returns:
+        Dict with zones, timestamps and utilization / risk_code / exceedance
+        arrays of shape (zones, slots)
+    """
+    risk = get_rules().risk
+    if step_minutes % SLOT_MINUTES or step_minutes <= 0:
+        raise ValueError(f"step_minutes must be a multiple of {SLOT_MINUTES}")
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {agg}")
+    if level not in risk.rank or risk.rank[level] == 0:
+        raise ValueError(f"Exceedance level must be one of {list(risk.levels[1:])}")
+
+    snapshot = as_snapshot(current_data)
+    capacity = snapshot.terminal_capacity
+    multipliers = np.array([multiplier for _, multiplier in zones], dtype=float)
+
+    # A zone is above the level once the terminal count passes threshold / multiplier
+    threshold = risk.thresholds[risk.rank[level] - 1]
+    paths = simulate_paths(snapshot, threshold * capacity / 100 / multipliers, hours, n_paths)
+
+    terminal_utilization = paths["expected"] / capacity * 100 if capacity > 0 else np.zeros(hours * 4)
+    utilization = np.clip(terminal_utilization[None, :] * multipliers[:, None], 0, 100)
+    exceedance = paths["exceedance"].T
+
+    factor = step_minutes // SLOT_MINUTES
+    utilization = downsample(utilization, factor, agg)
+    exceedance = downsample(exceedance, factor, agg)
+    return {
+        "version": state_version(snapshot),
+        "zones": [name for name, _ in zones],
+        "timestamps": format_times(paths["grid"][::factor], paths["tz_suffix"]),
+        "step_minutes": step_minutes,
+        "aggregation": agg,
+        "levels": risk.levels.tolist(),
+        "exceedance_level": level,
+        "n_paths": n_paths,
+        "utilization": utilization.astype(np.float32),
+        "risk_code": risk.codes(utilization).astype(np.uint8),
+        "exceedance": exceedance.astype(np.float32),
+    }
+
+
+def encode_binary(heatmap: Dict[str, Any]) -> bytes:
+    """
+    Pack a heatmap into the typed-array payload
+
+    Layout: b"AFHM", uint32 little-endian header length, UTF-8 JSON header
+    padded with spaces to 4 bytes, then the data section. Each entry under
+    the header's "arrays" gives dtype, shape and byte offset into the data
+    section, which starts at 8 + header length; arrays are C-order
+    little-endian.
+    """
+    header = {key: value for key, value in heatmap.items() if key not in ARRAY_DTYPES}
+    header["arrays"] = {}
+    blobs = []
+    offset = 0
+    for name, dtype in ARRAY_DTYPES.items():
+        blob = np.ascontiguousarray(heatmap[name], dtype=np.dtype(dtype).newbyteorder("<")).tobytes()
+        blob += b"\0" * (-len(blob) % ALIGNMENT)
+        header["arrays"][name] = {"dtype": dtype, "shape": list(heatmap[name].shape), "offset": offset}
+        blobs.append(blob)
+        offset += len(blob)
+
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    encoded += b" " * (-len(encoded) % ALIGNMENT)
+    return MAGIC + struct.pack("<I", len(encoded)) + encoded + b"".join(blobs)
+
+
+def decode_binary(payload: bytes) -> Dict[str, Any]:
+    """Inverse of encode_binary (used by tests and Python clients)"""
+    if payload[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a heatmap payload")
+    (length,) = struct.unpack_from("<I", payload, len(MAGIC))
+    data_start = len(MAGIC) + 4 + length
+    header = json.loads(payload[len(MAGIC) + 4:data_start])
+    heatmap = {key: value for key, value in header.items() if key != "arrays"}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"]).newbyteorder("<")
+        count = int(np.prod(entry["shape"]))
+        heatmap[name] = np.frombuffer(
+            payload, dtype=dtype, count=count, offset=data_start + entry["offset"]
+        ).reshape(entry["shape"])
+    return heatmap
+
+
+def encode_json(heatmap: Dict[str, Any]) -> Dict[str, Any]:
+    """Nested-list form of the same matrices (rounded) for debugging and simple clients"""
+    return {
+        **{key: value for key, value in heatmap.items() if key not in ARRAY_DTYPES},
+        "utilization": np.round(heatmap["utilization"].astype(float), 2).tolist(),
+        "risk_code": heatmap["risk_code"].tolist(),
+        "exceedance": np.round(heatmap["exceedance"].astype(float), 4).tolist(),
+    }
+
+
+class HeatmapCache:
+    """
+    LRU cache of encoded heatmap payloads keyed by state version and options
+
+    Payloads are deterministic for a given state version (snapshot, risk
+    scale and seasonal profile), so every wallboard showing the same state
+    shares one computation. Changing the rules or installing a new profile
+    changes the version; entries for the old one are never served again
+    and age out of the LRU.
+    """
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+heatmap_cache = HeatmapCache()
+
+
+def payload_tag(version: str, fmt: str, options: Mapping[str, Any]) -> str:
+    """ETag for one state version rendered with one set of options"""
+    key = f"{version}|{fmt}|{sorted(options.items())}"
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def heatmap_payload(
+    current_data: Mapping[str, Any],
+    fmt: str = "binary",
+    **options: Any
+) -> Tuple[str, Any]:
+    """
+    Cached heatmap in the requested format
+
+    Returns:
+        (ETag, payload bytes for "binary" or JSON-ready dict for "json")
+    """
+    tag = payload_tag(state_version(current_data), fmt, options)
+    payload = heatmap_cache.get(tag)
+    if payload is None:
+        heatmap = compute_heatmap(current_data, **options)
+        payload = encode_binary(heatmap) if fmt == "binary" else encode_json(heatmap)
+        heatmap_cache.set(tag, payload)
+    return tag, payload
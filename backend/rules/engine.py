@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "risk_rules.json")
+RULES_PATH = os.getenv("AIRFLOW_RULES_PATH", DEFAULT_RULES_PATH)
+
+TRENDS = ("increasing", "stable", "decreasing")
+
+
+class ThresholdScale:
+    """
+    Utilization thresholds precompiled into a sorted array
+
+    A value strictly above thresholds[i] moves to levels[i + 1], matching
+    the original `utilization > threshold` checks.
+    """
+
+    def __init__(self, thresholds: List[float], levels: List[str],
+                 descriptions: Optional[Dict[str, str]] = None):
+        if len(levels) != len(thresholds) + 1:
+            raise ValueError("A scale needs exactly one more level than thresholds")
+        self.thresholds = np.asarray(thresholds, dtype=float)
+        self._threshold_list = self.thresholds.tolist()
+        if np.any(np.diff(self.thresholds) <= 0):
+            raise ValueError("Scale thresholds must be strictly increasing")
+        self.levels = np.asarray(levels, dtype=object)
+        self.rank = {level: code for code, level in enumerate(levels)}
+        self.descriptions = descriptions or {}
+
+    def codes(self, utilization) -> np.ndarray:
+        """Integer level codes for a scalar or an array of any shape (e.g. zones x horizon)"""
+        return np.searchsorted(self.thresholds, np.asarray(utilization, dtype=float), side="left")
+
+    def classify(self, utilization) -> np.ndarray:
+        """Level names for an array of utilization rates"""
+        return self.levels[self.codes(utilization)]
+
+    def level(self, utilization: float) -> str:
+        """Level name for a single utilization rate"""
+        # bisect_left mirrors searchsorted(side="left") without NumPy scalar overhead
+        return self.levels[bisect.bisect_left(self._threshold_list, utilization)]
+
+
+def _compile_table(entries: List[Dict[str, Any]], scale: ThresholdScale) -> Dict[Tuple[str, str], List[str]]:
+    """
+    Expand first-match protocol rules into a (level, trend) lookup table
+
+    Each rule may restrict `min_level` and/or `trends`; the first rule that
+    matches a combination wins.
+    """
+    table = {}
+    for level in scale.levels:
+        for trend in TRENDS:
+            for entry in entries:
+                min_level = entry.get("min_level")
+                if min_level is not None and scale.rank[level] < scale.rank[min_level]:
+                    continue
+                if "trends" in entry and trend not in entry["trends"]:
+                    continue
+                table[(level, trend)] = list(entry["actions"])
+                break
+            else:
+                table[(level, trend)] = []
+    return table
+
+
+class RuleSet:
+    """Compiled risk rules loaded from a config file"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.risk = ThresholdScale(**config["risk_scale"])
+        self.severity = ThresholdScale(**config["severity_scale"])
+        self.trend_change_pct = float(config.get("trend", {}).get("change_pct", 15))
+
+        self.recommendations = {}
+        for level in self.risk.levels:
+            by_trend = config["recommendations"][level]
+            for trend in TRENDS:
+                self.recommendations[(level, trend)] = list(by_trend.get(trend, by_trend["default"]))
+
+        self.protocols = {
+            name: _compile_table(entries, self.severity)
+            for name, entries in config.get("protocols", {}).items()
+        }
+
+    def trend(self, change_pct: float) -> str:
+        """Classify a percentage change as increasing, decreasing or stable"""
+        if change_pct > self.trend_change_pct:
+            return "increasing"
+        if change_pct < -self.trend_change_pct:
+            return "decreasing"
+        return "stable"
+
+    def get_recommendations(self, risk_level: str, trend: str = "stable") -> List[str]:
+        return list(self.recommendations[(risk_level, trend)])
+
+    def get_protocol(self, name: str, severity_level: str, trend: str = "stable") -> List[str]:
+        return self.protocols[name][(severity_level, trend)]
+
+
+class RuleEngine:
+    """
+    Hot-reloading holder for the active RuleSet
+
+    The config file's modification time is checked at most once per
+    `check_interval` seconds. An invalid edit is reported and the previous
+    rules stay active.
+    """
+
+    def __init__(self, path: str = RULES_PATH, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._mtime = None
+        self._checked_at = 0.0
+        self._rules = None
+        self.reload()
+
+    def reload(self) -> bool:
+        """Load the config file; returns True if new rules were applied"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                rules = RuleSet(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if self._rules is None:
+                raise
+            print(f" Rule reload failed ({e}) - keeping previous rules")
+            try:
+                # Do not retry the same broken file on every check
+                self._mtime = os.path.getmtime(self.path)
+            except OSError:
+                pass
+            return False
+        self._rules = rules
+        self._mtime = mtime
+        return True
+
+    @property
+    def rules(self) -> RuleSet:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            try:
+                changed = os.path.getmtime(self.path) != self._mtime
+            except OSError:
+                changed = False
+            if changed and self.reload():
+                print(f" Risk rules reloaded from {self.path}")
+        return self._rules
+
+
+rule_engine = RuleEngine()
+
+
+def get_rules() -> RuleSet:
+    """Currently active rules"""
+    return rule_engine.rules
@@ -0,0 +1,200 @@
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import replace
+from datetime import datetime, timedelta
+import numpy as np
+
+from fusion.merge import merge_snapshot
+from forecasting.arima import forecast_series
+from forecasting.queueing import DWELL_MINUTES, analytic_queues
+from rules.engine import get_rules
+from schemas import ScenarioBase, ScenarioPerturbation, ScheduledFlight
+
+SLOT = timedelta(minutes=15)
+
+# Passenger load profile around a flight, as (start, end) minutes relative to
+# the scheduled time and the share of seats present in the terminal
+DEPARTURE_WINDOW = (-120, -30)
+ARRIVAL_WINDOW = (0, 30)
+LOAD_FACTOR = 0.85
+
+
+def parse_time(value: str, base_time: datetime) -> datetime:
+    """
+    Parse an ISO timestamp or a wall-clock time such as "15:00"
+
+    Wall-clock times are taken on the base date, rolling over to the next day
+    if they are earlier than the base time.
+    """
+    if len(value) <= 5 and ":" in value:
+        hour, minute = (int(part) for part in value.split(":"))
+        parsed = base_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return parsed + timedelta(days=1) if parsed < base_time else parsed
+    parsed = datetime.fromisoformat(value)
+    if (parsed.tzinfo is None) != (base_time.tzinfo is None):
+        parsed = parsed.replace(tzinfo=base_time.tzinfo)
+    return parsed
+
+
+def slot_index(moment: datetime, base_time: datetime) -> int:
+    """Forecast slot containing a moment (may be outside the horizon)"""
+    return int((moment - base_time) // SLOT)
+
+
+def flight_load(flight: ScheduledFlight, base_time: datetime, steps: int, delay_minutes: int = 0) -> np.ndarray:
+    """Passengers attributable to one flight in each forecast slot"""
+    scheduled = parse_time(flight.scheduled_time, base_time) + timedelta(minutes=delay_minutes)
+    start, end = DEPARTURE_WINDOW if flight.type == "departure" else ARRIVAL_WINDOW
+    first = slot_index(scheduled + timedelta(minutes=start), base_time)
+    last = slot_index(scheduled + timedelta(minutes=end), base_time)
+
+    load = np.zeros(steps)
+    width = max(1, last - first)
+    lo, hi = max(0, first), min(steps, first + width)
+    if lo < hi:
+        load[lo:hi] = flight.passenger_capacity * LOAD_FACTOR / width
+    return load
+
+
+def _scenario_arrays(
+    base: ScenarioBase,
+    perturbation: ScenarioPerturbation,
+    base_counts: np.ndarray,
+    base_time: datetime
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Apply one perturbation to the base forecast; returns (counts, capacity, lanes) per slot"""
+    steps = base_counts.shape[0]
+    counts = base_counts.astype(float)
+    if perturbation.cctv_count is not None and base.cctv_count > 0:
+        counts = counts * (perturbation.cctv_count / base.cctv_count)
+
+    flights = {flight.flight_number: flight for flight in base.flights}
+    for delay in perturbation.flight_delays:
+        flight = flights.get(delay.flight_number)
+        if flight is None:
+            raise ValueError(f"Unknown flight in scenario '{perturbation.name}': {delay.flight_number}")
+        counts += (flight_load(flight, base_time, steps, delay.delay_minutes)
+                   - flight_load(flight, base_time, steps))
+
+    capacity = np.full(steps, float(base.terminal_capacity))
+    lanes = np.full(steps, base.security_lanes_active, dtype=np.int64)
+    for change in perturbation.capacity_changes:
+        start = max(0, slot_index(parse_time(change.at, base_time), base_time))
+        capacity[start:] += change.terminal_capacity_delta
+        lanes[start:] += change.security_lanes_delta
+
+    for override in perturbation.count_overrides:
+        index = slot_index(parse_time(override.at, base_time), base_time)
+        if 0 <= index < steps:
+            counts[index] = override.count
+
+    capacity = np.maximum(capacity, 1)
+    return np.clip(np.round(counts), 0, capacity), capacity, np.maximum(lanes, 0)
+
+
+def evaluate_scenarios(
+    base: ScenarioBase,
+    perturbations: List[ScenarioPerturbation],
+    hours: int = 6,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Evaluate what-if perturbations of one base state side by side
+
+    The base forecast is drawn once with a seeded generator and every
+    scenario is applied to it (common random numbers), so differences come
+    from the perturbations only. All scenarios are stacked as rows and run
+    through risk classification and the M/M/c queue model in single
+    vectorized calls. Scenarios are ranked by critical and high-risk slots,
+    then by total passenger-minutes spent queueing at security.
+
+    Returns:
+        Dict with the base scenario and every perturbation, ranked best first
+    """
+    merged = merge_snapshot(
+        {"count": base.cctv_count, "timestamp": base.timestamp},
+        base.flight_schedule,
+        {"terminal_capacity": base.terminal_capacity}
+    )
+    base_time = datetime.fromisoformat(merged.timestamp)
+
+    # Forecast against the largest capacity any scenario reaches, so added
+    # capacity is not hidden by counts already clipped to the base capacity
+    added = [sum(max(0, c.terminal_capacity_delta) for c in p.capacity_changes) for p in perturbations]
+    ceiling = replace(merged, terminal_capacity=base.terminal_capacity + max(added, default=0))
+    forecast = forecast_series(ceiling, hours=hours, rng=np.random.default_rng(seed))
+    base_counts = forecast.counts.astype(float)
+    timestamps = forecast.timestamps()
+
+    baseline = ScenarioPerturbation(name="baseline")
+    rows = [_scenario_arrays(base, p, base_counts, base_time) for p in [baseline] + list(perturbations)]
+    counts = np.vstack([row[0] for row in rows])
+    capacity = np.vstack([row[1] for row in rows])
+    lanes = np.vstack([row[2] for row in rows])
+
+    rules = get_rules()
+    utilization = counts / capacity * 100
+    risk_codes = rules.risk.codes(utilization)
+    arrivals = counts / DWELL_MINUTES
+    queues = analytic_queues(arrivals, lanes)
+
+    high_code = rules.risk.rank.get("HIGH", len(rules.risk.levels) - 2)
+    critical_code = len(rules.risk.levels) - 1
+    max_wait = np.max(queues["wait_minutes"], axis=1)
+
+    results = []
+    for i, perturbation in enumerate([baseline] + list(perturbations)):
+        peak = int(np.argmax(utilization[i]))
+        results.append({
+            "name": perturbation.name,
+            "peak_utilization": round(float(utilization[i, peak]), 2),
+            "peak_time": timestamps[peak],
+            "peak_risk_level": rules.risk.levels[risk_codes[i, peak]],
+            "critical_slots": int(np.sum(risk_codes[i] >= critical_code)),
+            "high_or_worse_slots": int(np.sum(risk_codes[i] >= high_code)),
+            "max_wait_minutes": round(float(max_wait[i]), 1),
+            "mean_wait_minutes": round(float(np.mean(queues["wait_minutes"][i])), 1),
+            "queue_passenger_minutes": round(float(np.sum(queues["queue_length"][i]) * SLOT.seconds / 60), 0),
+        })
+
+    ranked = sorted(
+        results[1:],
+        key=lambda r: (r["critical_slots"], r["high_or_worse_slots"],
+                       r["queue_passenger_minutes"], r["peak_utilization"])
+    )
+    for rank, result in enumerate(ranked, 1):
+        result["rank"] = rank
+        result["delta_max_wait_minutes"] = round(result["max_wait_minutes"] - results[0]["max_wait_minutes"], 1)
+        result["delta_peak_utilization"] = round(result["peak_utilization"] - results[0]["peak_utilization"], 2)
+
+    return {
+        "base_timestamp": merged.timestamp,
+        "baseline": results[0],
+        "scenarios": ranked,
+    }
+
+
+def build_summary_prompt(comparison: Dict[str, Any], top: int = 3) -> str:
+    """Compact prompt asking for a short comparison of the best options"""
+    lines = [
+        f"- {r['name']}: peak {r['peak_utilization']}% ({r['peak_risk_level']}) at {r['peak_time']}, "
+        f"max wait {r['max_wait_minutes']} min, {r['critical_slots']} critical slots"
+        for r in [comparison["baseline"]] + comparison["scenarios"][:top]
+    ]
+    return (
+        "You are an airport operations analyst. Compare these what-if plans against the baseline "
+        "and recommend one in at most 4 sentences.\n" + "\n".join(lines)
+    )
+
+
+def local_summary(comparison: Dict[str, Any]) -> str:
+    """Rule-based one-paragraph summary used when the LLM is unavailable"""
+    if not comparison["scenarios"]:
+        return "No scenarios were evaluated."
+    best = comparison["scenarios"][0]
+    baseline = comparison["baseline"]
+    return (
+        f"Best option: {best['name']} - peak utilization {best['peak_utilization']}% "
+        f"({best['delta_peak_utilization']:+.2f} vs baseline), max security wait "
+        f"{best['max_wait_minutes']} min ({best['delta_max_wait_minutes']:+.1f} vs baseline "
+        f"{baseline['max_wait_minutes']} min), {best['critical_slots']} critical slots."
+    )
@@ -37,6 +37,35 @@ class CurrentMetrics(BaseModel):
     active_flights: Optional[int] = None
     arriving_flights: Optional[int] = None
     departing_flights: Optional[int] = None
+    congestion_level: Optional[str] = None
+    flight_density: Optional[float] = None
+
+class RiskFactor(BaseModel):
+    """Single risk factor identified in the analysis"""
+    factor: str = Field(description="Short description of the risk")
+    likelihood: str = Field(description="LOW, MEDIUM or HIGH")
+    impact: str = Field(description="LOW, MEDIUM or HIGH")
+
+class PeakWindow(BaseModel):
+    """Forecast window with peak congestion"""
+    start: str = Field(description="ISO timestamp where the peak starts")
+    end: Optional[str] = Field(default=None, description="ISO timestamp where the peak ends")
+    expected_count: Optional[int] = Field(default=None, description="Expected passenger count")
+    risk_level: str
+
+class PrioritizedAction(BaseModel):
+    """Operational action with priority and time horizon"""
+    priority: int = Field(ge=1, description="1 is most urgent")
+    horizon: str = Field(description="immediate, short_term or medium_term")
+    action: str
+
+class StructuredInsights(BaseModel):
+    """Schema-constrained analysis, renderable without parsing prose"""
+    assessment: str
+    risk_factors: List[RiskFactor]
+    peak_windows: List[PeakWindow]
+    actions: List[PrioritizedAction]
+    source: str = "gemini"
 
 class ForecastResponse(BaseModel):
     """Complete analysis response"""
@@ -45,6 +74,63 @@ class ForecastResponse(BaseModel):
     gemini_insights: str
     risk_level: str
     recommendations: List[str]
+    structured_insights: Optional[StructuredInsights] = None
+
+class ProbabilisticForecast(BaseModel):
+    """Monte Carlo forecast with quantile bands"""
+    n_paths: int
+    seed: int
+    quantiles: List[str] = Field(description="Quantile keys present on each point, e.g. p10")
+    points: List[Dict[str, Any]] = Field(
+        description="Per-interval timestamp, expected_count, quantile values and exceedance_probability by risk level"
+    )
+
+class ScheduledFlight(BaseModel):
+    """Flight used to attribute passenger load in what-if scenarios"""
+    flight_number: str
+    type: str = Field(pattern="^(arrival|departure)$")
+    scheduled_time: str = Field(description="ISO timestamp or HH:MM")
+    passenger_capacity: int = Field(default=180, ge=0)
+
+class CapacityChange(BaseModel):
+    """Lane / capacity change applied from a point in time onwards"""
+    at: str = Field(description="ISO timestamp or HH:MM")
+    security_lanes_delta: int = 0
+    terminal_capacity_delta: int = 0
+
+class FlightDelay(BaseModel):
+    """Delay applied to one scheduled flight"""
+    flight_number: str
+    delay_minutes: int
+
+class CountOverride(BaseModel):
+    """Passenger count forced for the forecast slot containing `at`"""
+    at: str = Field(description="ISO timestamp or HH:MM")
+    count: int = Field(ge=0)
+
+class ScenarioPerturbation(BaseModel):
+    """One what-if variant of the base state"""
+    name: str
+    cctv_count: Optional[int] = Field(default=None, ge=0, description="Override of the current count")
+    capacity_changes: List[CapacityChange] = []
+    flight_delays: List[FlightDelay] = []
+    count_overrides: List[CountOverride] = []
+
+class ScenarioBase(BaseModel):
+    """Base operational state shared by all scenarios"""
+    cctv_count: int = Field(ge=0)
+    terminal_capacity: int = Field(gt=0)
+    timestamp: str = Field(description="ISO format timestamp")
+    flight_schedule: Dict[str, Any] = {}
+    security_lanes_active: int = Field(default=10, ge=0)
+    flights: List[ScheduledFlight] = []
+
+class ScenarioRequest(BaseModel):
+    """Batch of what-if scenarios evaluated against one base state"""
+    base: ScenarioBase
+    scenarios: List[ScenarioPerturbation] = Field(min_length=1, max_length=50)
+    seed: Optional[int] = None
+    include_summary: bool = False
 
 class HealthResponse(BaseModel):
     """Health check response"""
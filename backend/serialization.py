@@ -0,0 +1,204 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+import re
+
+import numpy as np
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from schemas import CurrentMetrics, ForecastPoint, ForecastResponse
+from snapshots import ForecastSeries
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _encode_default(obj: Any) -> Any:
+    """
+    Fallback encoder for types orjson cannot handle natively
+
+    Pydantic models are emitted as plain field mappings; callers on the hot
+    path pass dicts so this branch is only hit for ad-hoc payloads.
+    """
+    if isinstance(obj, BaseModel):
+        return dict(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content to JSON bytes with orjson
+
+    NumPy arrays and scalars are encoded directly without converting to lists.
+    """
+    return orjson.dumps(content, default=_encode_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered through the fast encoder, skipping FastAPI's jsonable_encoder"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Field layouts of the typed response models, resolved once at import time
+FORECAST_POINT_FIELDS = tuple(ForecastPoint.model_fields)
+CURRENT_METRICS_FIELDS = tuple(CurrentMetrics.model_fields)
+RESPONSE_FIELDS = tuple(ForecastResponse.model_fields)
+INSIGHT_FIELDS = ("gemini_insights", "structured_insights")
+
+SLOT_MINUTES = 15
+MAX_HORIZON_MINUTES = 24 * 60
+DEFAULT_HORIZON_MINUTES = 6 * 60
+DURATION_PATTERN = re.compile(r"^(?:(\d+)h)?(?:(\d+)m)?$")
+
+
+def parse_minutes(value: str) -> int:
+    """ "2h" -> 120, "30m" -> 30, "1h30m" -> 90, "45" -> 45 """
+    value = value.strip().lower()
+    if value.isdigit():
+        return int(value)
+    match = DURATION_PATTERN.match(value)
+    if not value or not match:
+        raise ValueError(f"Invalid duration: {value!r} (use e.g. 30m, 2h, 1h30m)")
+    return int(match.group(1) or 0) * 60 + int(match.group(2) or 0)
+
+
+class ResponseOptions:
+    """
+    Field projection and forecast resolution requested by a client
+
+    Args:
+        fields: Top-level ForecastResponse fields to return (all when None);
+                "forecast.<field>" selects individual forecast point fields
+        horizon_minutes: Forecast horizon, a multiple of 15 minutes
+        step_minutes: Forecast resolution, a multiple of 15 minutes; each
+                      point is the busiest 15-minute slot of its window
+        include_insights: False skips insight generation (and the LLM) entirely;
+                          the insight fields are then left out of the response
+    """
+    def __init__(self, fields: Optional[Sequence[str]] = None, horizon_minutes: int = DEFAULT_HORIZON_MINUTES,
+                 step_minutes: int = SLOT_MINUTES, include_insights: bool = True):
+        self.fields = None
+        self.point_fields = None
+        if fields is not None:
+            top, points = [], []
+            for field in fields:
+                name, _, sub = field.partition(".")
+                if name not in RESPONSE_FIELDS or (sub and (name != "forecast" or sub not in FORECAST_POINT_FIELDS)):
+                    raise ValueError(f"Unknown response field: {field}")
+                if name not in top:
+                    top.append(name)
+                if sub and sub not in points:
+                    points.append(sub)
+            self.fields = tuple(top)
+            self.point_fields = tuple(points) or None
+        for label, minutes in (("horizon", horizon_minutes), ("step", step_minutes)):
+            if minutes <= 0 or minutes % SLOT_MINUTES:
+                raise ValueError(f"{label} must be a positive multiple of {SLOT_MINUTES} minutes")
+        if horizon_minutes > MAX_HORIZON_MINUTES:
+            raise ValueError(f"horizon is limited to {MAX_HORIZON_MINUTES // 60}h")
+        if step_minutes > horizon_minutes:
+            raise ValueError("step cannot be longer than the horizon")
+        self.horizon_slots = horizon_minutes // SLOT_MINUTES
+        self.step_slots = step_minutes // SLOT_MINUTES
+        self.include_insights = include_insights
+        if not include_insights:
+            if self.fields is not None and any(field in self.fields for field in INSIGHT_FIELDS):
+                raise ValueError("insight fields cannot be requested with include_insights=false")
+            self.fields = self.fields or tuple(field for field in RESPONSE_FIELDS if field not in INSIGHT_FIELDS)
+
+    @classmethod
+    def from_query(cls, fields: Optional[str] = None, horizon: Optional[str] = None,
+                   step: Optional[str] = None, include_insights: bool = True) -> "ResponseOptions":
+        """Parse the fields / horizon / step / include_insights query parameters"""
+        return cls(
+            [field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+            parse_minutes(horizon) if horizon else DEFAULT_HORIZON_MINUTES,
+            parse_minutes(step) if step else SLOT_MINUTES,
+            include_insights,
+        )
+
+    @property
+    def wants_insights(self) -> bool:
+        """Insights are generated only if included and at least one insight field is returned"""
+        if not self.include_insights:
+            return False
+        return self.fields is None or any(field in self.fields for field in INSIGHT_FIELDS)
+
+
+def build_forecast_point(point: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a trusted forecast dict onto the ForecastPoint layout without re-validation"""
+    return {field: point[field] for field in FORECAST_POINT_FIELDS}
+
+
+def build_current_metrics(metrics: Mapping[str, Any]) -> Dict[str, Any]:
+    """Project trusted current metrics onto the CurrentMetrics layout without re-validation"""
+    return {field: metrics.get(field) for field in CURRENT_METRICS_FIELDS}
+
+
+def build_forecast_response(
+    current_metrics: Dict[str, Any],
+    forecast: List[Dict[str, Any]],
+    gemini_insights: str,
+    risk_level: str,
+    recommendations: List[str],
+    structured_insights: Optional[Dict[str, Any]] = None,
+    fields: Optional[Sequence[str]] = None,
+    point_fields: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Assemble a ForecastResponse-shaped payload from internal pipeline output
+
+    The pipeline output is produced by our own merge/forecast code, so the
+    typed models in schemas.py only define the layout and Pydantic
+    validation is skipped entirely. Snapshots and forecast series are
+    converted to plain JSON structures here, at the edge; with `fields`
+    only the requested parts are built at all.
+    """
+    if fields is None:
+        fields = RESPONSE_FIELDS
+    response = {}
+    if "current_metrics" in fields:
+        response["current_metrics"] = build_current_metrics(current_metrics)
+    if "forecast" in fields:
+        if isinstance(forecast, ForecastSeries):
+            points = forecast.to_points(point_fields)  # already in the ForecastPoint layout
+        elif point_fields:
+            points = [{field: point[field] for field in point_fields} for point in forecast]
+        else:
+            points = [build_forecast_point(point) for point in forecast]
+        response["forecast"] = points
+    values = {
+        "gemini_insights": gemini_insights,
+        "risk_level": risk_level,
+        "recommendations": recommendations,
+        "structured_insights": structured_insights,
+    }
+    for field, value in values.items():
+        if field in fields:
+            response[field] = value
+    return response
+
+
+def forecast_json_response(
+    current_metrics: Dict[str, Any],
+    forecast: List[Dict[str, Any]],
+    gemini_insights: str,
+    risk_level: str,
+    recommendations: List[str],
+    structured_insights: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    fields: Optional[Sequence[str]] = None,
+    point_fields: Optional[Sequence[str]] = None,
+) -> FastJSONResponse:
+    """Build and encode a forecast response on the fast serialization path"""
+    response = build_forecast_response(
+        current_metrics, forecast, gemini_insights, risk_level, recommendations,
+        structured_insights, fields, point_fields,
+    )
+    return FastJSONResponse(content=response, headers=headers)
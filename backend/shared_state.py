@@ -0,0 +1,338 @@
+import os
+import mmap
+import time
+import queue
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Tuple
+
+import numpy as np
+
+from snapshots import ForecastSeries, OperationalSnapshot, as_snapshot
+
+try:
+    import fcntl
+except ImportError:  # not on POSIX: single-process fallback
+    fcntl = None
+
+# Shared state across uvicorn/gunicorn workers. On by default when more than
+# one worker is configured; otherwise state stays in a private in-memory region
+_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+SHARED_STATE_ENABLED = os.getenv("AIRFLOW_SHARED_STATE", "1" if _WORKERS > 1 else "0") == "1"
+SHARED_STATE_DIR = os.getenv(
+    "AIRFLOW_SHARED_STATE_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+)
+SHARED_STATE_PATH = os.path.join(SHARED_STATE_DIR, "airflow-ai-state.bin")
+SHARED_CACHE_PATH = os.path.join(SHARED_STATE_DIR, "airflow-ai-cache.sqlite3")
+
+MAGIC = b"AFSTATE1"
+MAX_SLOTS = 96  # 24h of 15-minute slots
+READ_RETRIES = 100
+STORE_BUSY_TIMEOUT = 0.05  # seconds a shared cache read may wait for a lock
+
+# Fixed layout of the shared region. `seq` is the seqlock counter (odd while
+# a write is in progress); `version` counts published states
+STATE_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("seq", "<u8"),
+    ("version", "<u8"),
+    ("updated_at", "<f8"),
+    ("writer_pid", "<i8"),
+    ("timestamp", "S48"),
+    ("cctv_count", "<i8"),
+    ("terminal_capacity", "<i8"),
+    ("active_flights", "<i8"),
+    ("arriving_flights", "<i8"),
+    ("departing_flights", "<i8"),
+    ("tz_suffix", "S8"),
+    ("slots", "<i8"),
+    ("grid", "<i8", (MAX_SLOTS,)),
+    ("counts", "<i8", (MAX_SLOTS,)),
+])
+
+
+@dataclass(frozen=True)
+class SharedReading:
+    """One consistent copy of the published state"""
+    version: int
+    updated_at: float
+    writer_pid: int
+    snapshot: OperationalSnapshot
+    forecast: ForecastSeries
+
+
+class SharedState:
+    """
+    Latest fused snapshot and forecast arrays in a memory-mapped file
+
+    Every worker maps the same file (under /dev/shm, so it never touches
+    disk). Writers serialize on an flock and bracket each update with the
+    seqlock counter; readers take no lock at all: they copy the fixed-size
+    record straight out of the mapping and retry only if a write overlapped.
+    Derived fields (utilization, risk levels) are recomputed from the raw
+    values on read, so every worker applies its own active rules.
+
+    Args:
+        path: Backing file, or None for a private anonymous mapping
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.retries = 0
+        self._thread_lock = threading.Lock()
+        self._fd = None
+        if path is None:
+            self._map = mmap.mmap(-1, STATE_DTYPE.itemsize)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            with self._write_lock():
+                if os.fstat(self._fd).st_size < STATE_DTYPE.itemsize:
+                    os.ftruncate(self._fd, STATE_DTYPE.itemsize)
+            self._map = mmap.mmap(self._fd, STATE_DTYPE.itemsize)
+        # Structured view over the mapping: field access reads shared memory directly
+        self.record = np.ndarray((), dtype=STATE_DTYPE, buffer=self._map)
+        if self.record["magic"] != MAGIC:
+            with self._write_lock():
+                if self.record["magic"] != MAGIC:
+                    self.record["magic"] = MAGIC
+
+    @contextmanager
+    def _write_lock(self):
+        with self._thread_lock:
+            if self._fd is not None and fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if self._fd is not None and fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @property
+    def version(self) -> int:
+        """Version of the latest published state (0 before the first publish)"""
+        return int(self.record["version"])
+
+    def publish(self, current_data: Mapping[str, Any], forecast: Optional[ForecastSeries] = None) -> int:
+        """
+        Make a snapshot (and its forecast) the latest state for all workers
+
+        Args:
+            current_data: Operational state (snapshot or merged dict)
+            forecast: Forecast series for that state, at most 24h of slots
+
+        Returns:
+            The new version number
+        """
+        snapshot = as_snapshot(current_data)
+        slots = len(forecast) if forecast is not None else 0
+        if slots > MAX_SLOTS:
+            raise ValueError(f"Forecast longer than {MAX_SLOTS} slots cannot be shared")
+        record = self.record
+        with self._write_lock():
+            record["seq"] += 1  # odd: readers retry
+            record["updated_at"] = time.time()
+            record["writer_pid"] = os.getpid()
+            record["timestamp"] = str(snapshot.timestamp).encode("utf-8")[:STATE_DTYPE["timestamp"].itemsize]
+            for name in ("cctv_count", "terminal_capacity", "active_flights", "arriving_flights", "departing_flights"):
+                record[name] = getattr(snapshot, name)
+            record["slots"] = slots
+            if forecast is not None:
+                record["tz_suffix"] = forecast.tz_suffix.encode("ascii")
+                record["grid"][:slots] = forecast.grid
+                record["counts"][:slots] = forecast.counts
+            record["version"] += 1
+            record["seq"] += 1  # even: consistent again
+            return int(record["version"])
+
+    def _copy(self) -> np.ndarray:
+        """Consistent copy of the record (lock-free; retries while a write overlaps)"""
+        record = self.record
+        for _ in range(READ_RETRIES):
+            before = int(record["seq"])
+            if before % 2 == 0:
+                copy = record.copy()
+                if int(record["seq"]) == before:
+                    return copy
+            self.retries += 1
+            time.sleep(0)
+        # A writer died mid-update or is starving us: wait for the writer lock instead
+        with self._write_lock():
+            return record.copy()
+
+    def read(self, since: Optional[int] = None) -> Optional[SharedReading]:
+        """
+        Latest published state
+
+        Args:
+            since: Version the caller already has; None is returned if it is still current
+
+        Returns:
+            SharedReading, or None if nothing (newer) has been published
+        """
+        version = self.version
+        if version == 0 or (since is not None and version == since):
+            return None
+        copy = self._copy()
+        slots = int(copy["slots"])
+        snapshot = OperationalSnapshot(
+            timestamp=copy["timestamp"].item().decode("utf-8"),
+            cctv_count=int(copy["cctv_count"]),
+            terminal_capacity=int(copy["terminal_capacity"]),
+            active_flights=int(copy["active_flights"]),
+            arriving_flights=int(copy["arriving_flights"]),
+            departing_flights=int(copy["departing_flights"]),
+        )
+        forecast = ForecastSeries(copy["grid"][:slots], copy["counts"][:slots],
+                                  snapshot.terminal_capacity, copy["tz_suffix"].item().decode("ascii"))
+        return SharedReading(int(copy["version"]), float(copy["updated_at"]), int(copy["writer_pid"]),
+                             snapshot, forecast)
+
+    def close(self):
+        self.record = None
+        self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class SharedStore:
+    """
+    Small key/value store in a local SQLite file shared by all workers
+
+    WAL mode lets every worker read while another writes. Values carry the
+    time they were stored so each reader applies its own TTL; expired rows
+    are pruned on write. A worker about to compute a value claims its key
+    first, so the others wait for its answer instead of repeating the work.
+    Reads run on the caller's thread but give up after
+    `busy_timeout` and fail open (a miss), so a locked database never stalls
+    the event loop; writes only go on a bounded queue drained by a
+    background writer thread, like the analysis log.
+
+    Args:
+        path: SQLite database file
+        prune_every: Writes between pruning passes
+        busy_timeout: Longest a read waits for a lock, in seconds
+        queue_size: Writes waiting for the writer; more are dropped
+    """
+    def __init__(self, path: str = SHARED_CACHE_PATH, prune_every: int = 100,
+                 busy_timeout: float = STORE_BUSY_TIMEOUT, queue_size: int = 256):
+        self.path = path
+        self.prune_every = prune_every
+        self.busy_timeout = busy_timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.writes = 0
+        self.dropped = 0
+        self.errors = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _connection(self, timeout: float) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, claimed_at REAL NOT NULL, pid INTEGER NOT NULL)"
+            )
+            connection.commit()
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str, ttl: float) -> Optional[Tuple[float, str]]:
+        """(stored_at, value) if present and younger than `ttl` seconds; None on a miss or a busy database"""
+        try:
+            row = self._connection(self.busy_timeout).execute(
+                "SELECT stored_at, value FROM entries WHERE key = ? AND stored_at >= ?", (key, time.time() - ttl)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f" Shared cache read failed: {e}")
+            return None
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Queue a write (never blocks); False if the queue is full and the write was dropped"""
+        return self._submit(("set", key, value, ttl, time.time()))
+
+    def claim(self, key: str, lease: float) -> bool:
+        """
+        Claim `key` for this worker until it is set, released or `lease` seconds pass
+
+        Blocking (run it with asyncio.to_thread); fails open, so a busy or
+        broken database lets every worker go ahead.
+
+        Returns:
+            True if this worker should produce the value, False if another one is
+        """
+        try:
+            connection = self._connection(self.busy_timeout)
+            with connection:
+                connection.execute("DELETE FROM claims WHERE key = ? AND claimed_at < ?", (key, time.time() - lease))
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO claims (key, claimed_at, pid) VALUES (?, ?, ?)", (key, time.time(), os.getpid())
+                ).rowcount
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f" Shared cache claim failed: {e}")
+            return True
+        return inserted == 1
+
+    def release(self, key: str) -> bool:
+        """Queue dropping this worker's claim on `key` so others stop waiting for it"""
+        return self._submit(("release", key))
+
+    def _submit(self, operation: Tuple) -> bool:
+        if self.thread is None or not self.thread.is_alive():
+            with self._lock:
+                if self.thread is None or not self.thread.is_alive():
+                    self.thread = threading.Thread(target=self._run, name="shared-store-writer", daemon=True)
+                    self.thread.start()
+        try:
+            self.queue.put_nowait(operation)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self):
+        """Wait until every queued write has been applied"""
+        if self.thread is not None:
+            self.queue.join()
+
+    def _run(self):
+        connection = self._connection(timeout=5.0)
+        while True:
+            operation = self.queue.get()
+            try:
+                with connection:
+                    self._apply(connection, operation)
+            except sqlite3.Error as e:
+                self.errors += 1
+                print(f" Shared cache write failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _apply(self, connection: sqlite3.Connection, operation: Tuple):
+        kind, key = operation[0], operation[1]
+        if kind == "set":
+            _, _, value, ttl, stored_at = operation
+            connection.execute("INSERT OR REPLACE INTO entries (key, stored_at, value) VALUES (?, ?, ?)",
+                               (key, stored_at, value))
+            connection.execute("DELETE FROM claims WHERE key = ?", (key,))
+            self.writes += 1
+            if ttl is not None and self.writes % self.prune_every == 0:
+                connection.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - ttl,))
+        elif kind == "release":
+            connection.execute("DELETE FROM claims WHERE key = ? AND pid = ?", (key, os.getpid()))
+
+
+shared_state = SharedState(SHARED_STATE_PATH if SHARED_STATE_ENABLED else None)
@@ -0,0 +1,208 @@
+import collections.abc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from forecasting.seasonality import format_times
+from rules.engine import get_rules
+
+# Single default used whenever a state arrives without a capacity
+DEFAULT_CAPACITY = 1000
+SNAPSHOT_FIELDS = (
+    "timestamp", "cctv_count", "terminal_capacity", "active_flights", "arriving_flights",
+    "departing_flights", "utilization_rate", "congestion_level", "flight_density",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class OperationalSnapshot:
+    """
+    Immutable fused operational state
+
+    Utilization, congestion level and flight density are derived once at
+    construction; every later stage reads them instead of recomputing.
+    `get` / item access keep it usable where a merged dict was expected.
+    """
+    timestamp: str
+    cctv_count: int
+    terminal_capacity: int = DEFAULT_CAPACITY
+    active_flights: int = 0
+    arriving_flights: int = 0
+    departing_flights: int = 0
+    utilization_rate: float = field(init=False)
+    congestion_level: str = field(init=False)
+    flight_density: float = field(init=False)
+
+    def __post_init__(self):
+        utilization = (self.cctv_count / self.terminal_capacity) * 100 if self.terminal_capacity > 0 else 0.0
+        object.__setattr__(self, "utilization_rate", utilization)
+        object.__setattr__(self, "congestion_level", get_rules().risk.level(utilization))
+        object.__setattr__(
+            self, "flight_density",
+            (self.arriving_flights + self.departing_flights) / 2 if self.terminal_capacity > 0 else 0
+        )
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "OperationalSnapshot":
+        """Build from a merged-state dict (derived fields are recomputed; missing or None values take defaults)"""
+        def value(key: str, default: Any) -> Any:
+            found = data.get(key)
+            return default if found is None else found
+
+        return cls(
+            timestamp=data.get("timestamp") or datetime.now().isoformat(),
+            cctv_count=value("cctv_count", 0),
+            terminal_capacity=value("terminal_capacity", DEFAULT_CAPACITY),
+            active_flights=value("active_flights", 0),
+            arriving_flights=value("arriving_flights", 0),
+            departing_flights=value("departing_flights", 0),
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in SNAPSHOT_FIELDS else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in SNAPSHOT_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in SNAPSHOT_FIELDS}
+
+
+def as_snapshot(data: Union[OperationalSnapshot, Mapping[str, Any]]) -> OperationalSnapshot:
+    """Accept either a snapshot or a legacy merged-state dict"""
+    return data if isinstance(data, OperationalSnapshot) else OperationalSnapshot.from_mapping(data)
+
+
+class ForecastSeries(collections.abc.Sequence):
+    """
+    Array-backed forecast on a regular epoch time grid
+
+    Counts, utilization and risk codes live in NumPy arrays; per-point dicts
+    and ISO timestamps are only built when the series is serialized or
+    indexed like the old list of point dicts.
+    """
+    __slots__ = ("grid", "tz_suffix", "capacity", "counts", "utilization", "risk_codes")
+
+    def __init__(self, grid: np.ndarray, counts: np.ndarray, capacity: int, tz_suffix: str = ""):
+        self.grid = np.asarray(grid, dtype=np.int64)  # epoch microseconds, wall-clock
+        self.tz_suffix = tz_suffix
+        self.capacity = capacity
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.utilization = (self.counts / capacity) * 100 if capacity > 0 else np.zeros(self.counts.shape)
+        self.risk_codes = get_rules().risk.codes(self.utilization)
+
+    def __len__(self) -> int:
+        return self.counts.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_points()[index]
+        return self._point(self.timestamp(index), self.counts[index].item(),
+                           self.utilization[index].item(), get_rules().risk.levels[self.risk_codes[index]])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_points())
+
+    @property
+    def risk_levels(self) -> np.ndarray:
+        return get_rules().risk.levels[self.risk_codes]
+
+    def timestamps(self) -> List[str]:
+        return format_times(self.grid, self.tz_suffix)
+
+    def timestamp(self, index: int) -> str:
+        return format_times(self.grid[[index]], self.tz_suffix)[0]
+
+    def _point(self, timestamp: str, count: int, util: float, risk: str) -> Dict[str, Any]:
+        return {
+            "timestamp": timestamp,
+            "predicted_count": count,
+            "utilization_rate": round(util, 2),
+            "risk_level": risk,
+            "confidence_interval": {
+                "lower": max(0, count - int(count * 0.15)),
+                "upper": min(self.capacity, count + int(count * 0.15))
+            }
+        }
+
+    def to_points(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Legacy list-of-dicts form used at the JSON edge
+
+        With `fields`, points carry only those keys and the other columns
+        (e.g. timestamps or confidence intervals) are never built.
+        """
+        if fields is None:
+            return [
+                self._point(*values)
+                for values in zip(
+                    self.timestamps(), self.counts.tolist(), self.utilization.tolist(), self.risk_levels.tolist()
+                )
+            ]
+        columns = [self._column(field) for field in fields]
+        return [dict(zip(fields, values)) for values in zip(*columns)]
+
+    def points_at(self, indices: Sequence[int], timestamps: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Point dicts for selected slots only, with their timestamps formatted in one pass
+
+        `timestamps`, when the caller already holds the formatted grid, is
+        indexed instead of formatting again.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        if timestamps is None:
+            selected = format_times(self.grid[indices], self.tz_suffix)
+        else:
+            selected = [timestamps[i] for i in indices.tolist()]
+        return [
+            self._point(*values)
+            for values in zip(
+                selected, self.counts[indices].tolist(),
+                self.utilization[indices].tolist(), self.risk_levels[indices].tolist()
+            )
+        ]
+
+    def _column(self, field: str) -> List[Any]:
+        if field == "timestamp":
+            return self.timestamps()
+        if field == "predicted_count":
+            return self.counts.tolist()
+        if field == "utilization_rate":
+            return [round(util, 2) for util in self.utilization.tolist()]
+        if field == "risk_level":
+            return self.risk_levels.tolist()
+        if field == "confidence_interval":
+            return [
+                {"lower": max(0, count - int(count * 0.15)), "upper": min(self.capacity, count + int(count * 0.15))}
+                for count in self.counts.tolist()
+            ]
+        raise KeyError(field)
+
+    def resample(self, factor: int) -> "ForecastSeries":
+        """
+        Coarser series with one point per `factor` slots
+
+        Each point keeps the window's start time and its busiest slot, so a
+        30-minute or hourly timeline never hides a 15-minute peak.
+        """
+        if factor <= 1:
+            return self
+        starts = np.arange(0, len(self), factor)
+        return ForecastSeries(self.grid[starts], np.maximum.reduceat(self.counts, starts),
+                              self.capacity, self.tz_suffix)
+
+
+def forecast_counts(forecast: Union[ForecastSeries, Sequence[Dict[str, Any]]]) -> List[int]:
+    """Predicted counts from either forecast representation"""
+    if isinstance(forecast, ForecastSeries):
+        return forecast.counts.tolist()
+    return [point.get("predicted_count", 0) for point in forecast]
+
+
+def forecast_points(forecast: Union[ForecastSeries, Sequence[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Point dicts from either forecast representation"""
+    return forecast.to_points() if isinstance(forecast, ForecastSeries) else list(forecast)
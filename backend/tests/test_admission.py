@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+from admission import AdmissionController
+
+def test_saturated_endpoint_degrades_after_deadline():
+    """Requests that cannot get a slot in time are admitted in degraded mode"""
+    controller = AdmissionController({"analyze": (1, 4)}, {"operations": 0.05, "public": 0.01})
+
+    async def scenario():
+        async with controller.admit("analyze", "operations") as first:
+            async with controller.admit("analyze", "public") as second:
+                return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.granted
+    assert second.degraded
+    assert second.headers()["X-Degradation"] == "fallback-insights"
+    assert second.headers()["X-Degradation-Reason"] == "deadline-exceeded"
+
+def test_operations_served_before_public():
+    """Released slots go to the operations console ahead of public dashboards"""
+    controller = AdmissionController({"analyze": (1, 4)}, {"operations": 1.0, "public": 1.0})
+    order = []
+
+    async def worker(name, priority, delay):
+        await asyncio.sleep(delay)
+        async with controller.admit("analyze", priority) as ticket:
+            order.append((name, ticket.granted))
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(
+            worker("holder", "public", 0),
+            worker("public", "public", 0.001),
+            worker("ops", "operations", 0.002),
+        )
+
+    asyncio.run(scenario())
+    assert order == [("holder", True), ("ops", True), ("public", True)]
+
+def test_full_queue_sheds_lowest_priority():
+    """A full queue refuses public callers but lets operations displace them"""
+    controller = AdmissionController({"analyze": (1, 1)}, {"operations": 0.2, "public": 0.2})
+
+    async def _enter(ctrl, priority):
+        async with ctrl.admit("analyze", priority) as ticket:
+            return ticket
+
+    async def scenario():
+        async with controller.admit("analyze", "public"):
+            queued = asyncio.create_task(_enter(controller, "public"))
+            await asyncio.sleep(0.01)
+            refused = await _enter(controller, "public")
+            ops = asyncio.create_task(_enter(controller, "operations"))
+            await asyncio.sleep(0.01)
+            shed = await queued
+        return refused, shed, await ops
+
+    refused, shed, ops = asyncio.run(scenario())
+    assert refused.reason == "queue-full"
+    assert shed.reason == "shed-by-priority"
+    assert ops.granted
@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import app as app_module
+from ai import anomaly_detection
+from ai.anomaly_detection import detect_anomalies_with_gemini, explain_incident, extract_urgency
+from alerting import AlertBus, AlertEngine
+
+def reading(utilization, minute=0):
+    return {"cctv_count": int(utilization * 10), "terminal_capacity": 1000,
+            "timestamp": f"2024-02-05T15:{minute:02d}:00"}
+
+def feed(engine, utilizations, zone="T1"):
+    return [[(a.kind, a.level) for a in engine.observe(reading(u), zone=zone)] for u in utilizations]
+
+def test_hysteresis_and_debounce_ignore_flapping():
+    """Crossings must hold for two readings and stepping down needs 5 points of margin"""
+    engine = AlertEngine(AlertBus(), debounce=2, hysteresis=5, dedupe_window=0, explain=None)
+    assert feed(engine, [60, 45, 60, 60]) == [[], [], [], [("changed", "MEDIUM")]]
+    # Flapping around the 75 threshold never holds for two readings
+    assert feed(engine, [76, 74, 76, 74]) == [[], [], [], []]
+    assert feed(engine, [80, 95, 80]) == [[], [("raised", "HIGH")], []]
+    # 72 is within the hysteresis band of the 75 threshold: still HIGH
+    assert feed(engine, [72, 72, 72]) == [[], [], []]
+    assert feed(engine, [68, 69]) == [[], [("resolved", "MEDIUM")]]
+    assert engine.open_incidents() == []
+    assert engine.get_status()["zones"] == {"T1": "MEDIUM"}
+
+def test_one_escalation_per_incident_and_subscriber_delivery():
+    """Re-raised incidents are reopened and announced; only the first raise asks the explainer"""
+    calls = []
+
+    async def explain(zone, level, snapshot, forecast):
+        calls.append((zone, level))
+        return {"explanation": f"{zone} is busy", "source": "gemini"}
+
+    async def scenario():
+        bus = AlertBus()
+        engine = AlertEngine(bus, debounce=1, hysteresis=5, dedupe_window=300, explain=explain)
+        t1, everything = bus.subscribe(["T1"]), bus.subscribe(maxsize=3)
+        feed(engine, [80])
+        await asyncio.sleep(0)
+        feed(engine, [60, 80, 95, 95, 80, 80])
+        feed(engine, [80], zone="T2")
+        await asyncio.sleep(0)
+        received = []
+        while not t1.queue.empty():
+            received.append((await t1.get()).kind)
+        return engine, bus, received, everything
+
+    engine, bus, received, everything = asyncio.run(scenario())
+    assert calls == [("T1", "HIGH"), ("T2", "HIGH")]
+    assert received == ["raised", "explanation", "resolved", "reopened", "escalated", "deescalated"]
+    assert engine.suppressed == 0
+    incident = next(i for i in engine.open_incidents() if i.zone == "T1")
+    assert incident.id == 1 and incident.level == "CRITICAL" and incident.explanation == "T1 is busy"
+    assert everything.queue.qsize() == 3 and everything.dropped == len(bus.history) - 3
+
+    # Reversals are never deduplicated: the last alert always matches the zone's level
+    engine = AlertEngine(AlertBus(), debounce=1, hysteresis=5, dedupe_window=300, explain=None)
+    published = [alerts for alerts in feed(engine, [50, 85, 60, 85, 95, 85, 95, 50]) if alerts]
+    assert [alerts[0] for alerts in published] == [
+        ("raised", "HIGH"), ("resolved", "MEDIUM"), ("reopened", "HIGH"), ("escalated", "CRITICAL"),
+        ("deescalated", "HIGH"), ("escalated", "CRITICAL"), ("resolved", "MEDIUM"),
+    ]
+    assert engine.get_status()["zones"]["T1"] == "MEDIUM"
+
+    # Zone names come from clients: idle zones are forgotten first, open incidents are kept
+    engine = AlertEngine(AlertBus(), debounce=1, dedupe_window=0, explain=None, max_zones=2)
+    for zone, utilization in (("busy", 95), ("idle", 40), ("new", 40)):
+        feed(engine, [utilization], zone=zone)
+    assert list(engine.get_status()["zones"]) == ["busy", "new"] and engine.evicted == 1
+
+def test_forecast_breach_alerts_and_endpoints(monkeypatch):
+    """A predicted breach is announced once; /analyze readings feed the engine and /alerts lists them"""
+    engine = AlertEngine(AlertBus(), debounce=2, dedupe_window=0, explain=None)
+    forecast = [{"timestamp": "2024-02-05T16:00:00", "predicted_count": 600, "risk_level": "MEDIUM"},
+                {"timestamp": "2024-02-05T16:15:00", "predicted_count": 800, "risk_level": "HIGH"}]
+    first = engine.observe(reading(40), forecast, "T1")
+    assert [(a.kind, a.detail) for a in first] == [("predicted", "HIGH expected from 2024-02-05T16:15:00")]
+    assert engine.observe(reading(40), forecast, "T1") == []
+
+    monkeypatch.setattr(app_module, "alert_engine", AlertEngine(app_module.alert_bus, debounce=2, dedupe_window=0))
+    client = TestClient(app_module.app)
+    body = {"cctv_count": 960, "terminal_capacity": 1000, "flight_schedule": {},
+            "timestamp": "2024-02-05T16:30:00", "terminal_id": "T-ALERT"}
+    for _ in range(2):
+        assert client.post("/analyze", json=body).status_code == 200
+    listed = client.get("/alerts?zone=T-ALERT").json()
+    kinds = [alert["kind"] for alert in listed["alerts"]]
+    assert "raised" in kinds and listed["incidents"][0]["level"] == "CRITICAL"
+    assert listed["status"]["zones"]["T-ALERT"] == "CRITICAL"
+    # Demo data never reaches the detector
+    readings = listed["status"]["readings"]
+    client.get("/simulate?include_insights=false")
+    assert client.get("/alerts").json()["status"]["readings"] == readings
+
+    # Without a client the LLM is never reached: local explanation and no anomaly verdict
+    monkeypatch.setattr(anomaly_detection, "client_ready", lambda: None)
+    explained = asyncio.run(explain_incident("T1", "HIGH", reading(80)))
+    assert explained["source"] == "fallback" and "80.0%" in explained["explanation"]
+    assert asyncio.run(detect_anomalies_with_gemini(reading(80), {"mean": 500}))["is_anomaly"] is False
+    assert [extract_urgency(t) for t in ("Urgency: 7", "I'd say 12/10", "no rating")] == [7, 10, None]
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import app as app_module
+from analysis_log import AnalysisLog
+
+STATE = {"cctv_count": 640, "terminal_capacity": 1000, "utilization_rate": 64.0}
+
+def test_rows_are_written_in_batches_and_queryable(tmp_path):
+    """Queued rows land in batched transactions and can be filtered by terminal and time"""
+    log = AnalysisLog(str(tmp_path / "log.sqlite3"), batch_size=4, flush_interval=0.2)
+    log.start()
+    for hour in range(10):
+        state = {**STATE, "timestamp": f"2024-02-05T{hour:02d}:00:00"}
+        terminal = "T1" if hour % 2 else "T2"
+        assert log.record("analyze", state, "MEDIUM", b'{"hour": %d}' % hour, terminal, "fallback")
+    log.stop()
+
+    assert log.written == 10 and log.batches < 10
+    t1 = log.query(terminal_id="T1", start="2024-02-05T03:00:00", end="2024-02-05T07:00:00")
+    assert [row["state_time"] for row in t1] == ["2024-02-05T07:00:00", "2024-02-05T05:00:00", "2024-02-05T03:00:00"]
+    assert t1[0]["insights_source"] == "fallback" and t1[0]["utilization_rate"] == 64.0
+    latest = log.query(limit=1, include_response=True)[0]
+    assert latest["response"] == {"hour": 9}
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    """record never waits: once the queue is full rows are counted as dropped"""
+    log = AnalysisLog(str(tmp_path / "log.sqlite3"), queue_size=2)
+    release = threading.Event()
+    log.thread = threading.Thread(target=release.wait, daemon=True)  # stalled writer
+    log.thread.start()
+    started = time.perf_counter()
+    results = [log.record("simulate", {**STATE, "timestamp": "2024-02-05T10:00:00"}, "LOW", b"{}") for _ in range(5)]
+    assert time.perf_counter() - started < 0.05
+    assert results == [True, True, False, False, False]
+    assert log.get_status()["dropped"] == 3
+    release.set()
+
+def test_analyze_responses_are_logged_and_served_back(tmp_path, monkeypatch):
+    """A served analysis can be listed by terminal and fetched back byte-for-byte"""
+    log = AnalysisLog(str(tmp_path / "log.sqlite3"), flush_interval=0.05)
+    monkeypatch.setattr(app_module, "analysis_log", log)
+    log.start()
+    client = TestClient(app_module.app)
+    body = {"cctv_count": 820, "terminal_capacity": 1000, "flight_schedule": {},
+            "timestamp": "2024-02-05T16:30:00", "terminal_id": "T3"}
+    served = client.post("/analyze", json=body)
+    assert served.status_code == 200
+    log.stop()
+
+    listed = client.get("/analyses?terminal_id=T3").json()
+    assert listed["count"] == 1
+    entry = listed["analyses"][0]
+    assert entry["endpoint"] == "analyze" and entry["risk_level"] == "HIGH"
+    assert client.get(f"/analyses/{entry['id']}").content == served.content
+    assert client.get("/analyses/999999").status_code == 404
+    assert client.get("/analyses?terminal_id=T9").json()["count"] == 0
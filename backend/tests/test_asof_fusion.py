@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from fusion.asof import SourcePolicy, asof_join, fuse_window, frame_snapshot, to_epoch
+from forecasting.arima import forecast_congestion
+
+def test_asof_join_respects_staleness_and_fill_policy():
+    """Forward fill stops at the staleness limit; interpolation blends bracketing readings"""
+    times = np.array([0.0, 60.0, 600.0])
+    values = np.array([100.0, 160.0, 400.0])
+    grid = np.array([-10.0, 30.0, 90.0, 300.0])
+
+    ffill, age = asof_join(grid, times, values, SourcePolicy(120, "ffill"))
+    assert np.isnan(ffill[0]) and np.isnan(ffill[3])
+    assert ffill[1:3].tolist() == [100.0, 160.0]
+    assert age[2] == 30.0
+
+    interp, _ = asof_join(grid, times, values, SourcePolicy(120, "interpolate"))
+    assert interp[1] == 130.0
+    assert interp[2] == 160.0  # next reading is too far away to bracket
+
+def test_fuse_window_sums_fresh_cameras():
+    """Fresh cameras add up (or are confidence weighted when overlapping); a stale camera drops out"""
+    cctv = [
+        {"camera_id": "CAM_001", "timestamp": "2024-01-15T14:00:00", "count": 400, "confidence": 0.9},
+        {"camera_id": "CAM_002", "timestamp": "2024-01-15T14:00:30", "count": 500, "confidence": 0.3},
+        {"camera_id": "CAM_001", "timestamp": "2024-01-15T14:03:00", "count": 420, "confidence": 0.9},
+    ]
+    aodb = [{"timestamp": "2024-01-15T13:55:00", "active_flights": 12, "arriving_flights": 5, "departing_flights": 7}]
+    capacity = [{"timestamp": "2024-01-15T12:00:00", "terminal_capacity": 1000}]
+
+    frame = fuse_window(cctv, aodb, capacity, "2024-01-15T14:01:00", "2024-01-15T14:04:00",
+                        step_seconds=60, policies={"cctv": SourcePolicy(120, "ffill")})
+    assert frame["timestamp"][0] == "2024-01-15T14:01:00"
+    assert frame["cameras_reporting"].tolist() == [2, 2, 1, 1]
+    assert frame["cctv_count"].tolist() == [900, 900, 420, 420]
+    assert frame["valid"].all()
+    overlapping = fuse_window(cctv, aodb, capacity, "2024-01-15T14:01:00", "2024-01-15T14:04:00",
+                              step_seconds=60, policies={"cctv": SourcePolicy(120, "ffill", aggregate="mean")})
+    assert np.isclose(overlapping["cctv_count"][0], (400 * 0.9 + 500 * 0.3) / 1.2)
+
+    snapshot = frame_snapshot(frame)
+    assert snapshot["cctv_count"] == 420
+    assert snapshot["utilization_rate"] == 42.0
+    assert snapshot["departing_flights"] == 7
+    assert len(forecast_congestion(snapshot, hours=1, rng=np.random.default_rng(0))) == 4
+
+def test_fuse_window_marks_stale_sources_invalid():
+    """Rows without a fresh count or capacity are flagged, not silently filled"""
+    cctv = [{"camera_id": "CAM_001", "timestamp": "2024-01-15T14:00:00", "count": 300, "confidence": 0.9}]
+    capacity = [{"timestamp": "2024-01-15T14:00:00", "terminal_capacity": 1000}]
+    frame = fuse_window(cctv, [], capacity, "2024-01-15T14:00:00", "2024-01-15T14:10:00", step_seconds=300)
+    assert frame["valid"].tolist() == [True, False, False]
+    assert frame_snapshot(frame)["timestamp"] == "2024-01-15T14:00:00"
+    empty = fuse_window(cctv, [], capacity, "2024-01-15T14:10:00", "2024-01-15T14:00:00")
+    assert len(empty["valid"]) == 0 and frame_snapshot(empty) is None
+    assert to_epoch(["2024-01-15T14:00:00+01:00"])[0] == to_epoch(["2024-01-15T13:00:00"])[0]
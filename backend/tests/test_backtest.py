@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pytest
+
+from forecasting.backtest import backtest, synthetic_series, pinball_loss, format_report
+
+def test_seasonal_naive_is_exact_on_a_periodic_series():
+    """A series that repeats daily is forecast perfectly by yesterday's values"""
+    times, _ = synthetic_series(days=3)
+    day = np.round(400 + 200 * np.sin(np.arange(96) / 96 * 2 * np.pi))
+    counts = np.tile(day, 3)
+    report = backtest(times, counts, variants=["seasonal_naive", "persistence"], hours=2, stride=8)
+    summary = report["variants"]["seasonal_naive"]["summary"]
+    assert summary["mae"] == 0 and summary["risk_hit_rate"] == 1.0
+    assert report["variants"]["persistence"]["summary"]["mae"] > 0
+    assert len(report["variants"]["seasonal_naive"]["horizon"]["mae"]) == 8
+    assert "seasonal_naive" in format_report(report)
+
+def test_results_do_not_depend_on_process_count():
+    """Per-origin generators make parallel runs reproduce the serial metrics"""
+    times, counts = synthetic_series(days=2, seed=5)
+    serial = backtest(times, counts, variants=["arima"], hours=1, stride=6, chunk_size=5)
+    parallel = backtest(times, counts, variants=["arima"], hours=1, stride=6, chunk_size=5, workers=2)
+    assert serial["variants"]["arima"]["horizon"] == parallel["variants"]["arima"]["horizon"]
+    assert serial["variants"]["arima"]["summary"]["quantiles"] == [0.1, 0.5, 0.9]
+
+def test_pinball_loss_and_validation():
+    """Pinball loss weights under- and over-prediction by the quantile"""
+    assert pinball_loss(np.array([10.0]), np.array([0.0]), 0.9)[0] == pytest.approx(9.0)
+    assert pinball_loss(np.array([0.0]), np.array([10.0]), 0.9)[0] == pytest.approx(1.0)
+    times, counts = synthetic_series(days=1)
+    with pytest.raises(ValueError):
+        backtest(times, counts, variants=["prophet"])
+    with pytest.raises(ValueError):
+        backtest(times, counts, hours=6)
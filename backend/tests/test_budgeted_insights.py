@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+from ai import gemini_reasoning
+
+CURRENT = {"cctv_count": 500, "terminal_capacity": 1000, "timestamp": "2024-01-01T10:00:00"}
+FORECAST = [{"predicted_count": 520, "timestamp": "2024-01-01T10:00:00", "risk_level": "MEDIUM"}]
+
+def test_slow_gemini_returns_fallback_and_fills_cache(monkeypatch):
+    """A slow model answer is served from cache to the next caller"""
+    async def slow_call(prompt):
+        await asyncio.sleep(0.05)
+        return "LLM insights"
+
+    monkeypatch.setattr(gemini_reasoning, "client", object())
+    monkeypatch.setattr(gemini_reasoning, "call_gemini", slow_call)
+    monkeypatch.setattr(gemini_reasoning, "insights_cache", gemini_reasoning.InsightsCache())
+
+    async def scenario():
+        first = await gemini_reasoning.generate_budgeted_insights(CURRENT, FORECAST, budget=0.01)
+        await asyncio.sleep(0.1)
+        second = await gemini_reasoning.generate_budgeted_insights(CURRENT, FORECAST, budget=0.01)
+        return first, second
+
+    (first_text, first_source), (second_text, second_source) = asyncio.run(scenario())
+    assert first_source == "fallback"
+    assert "LOCAL INTELLIGENCE MODE" in first_text
+    assert (second_text, second_source) == ("LLM insights", "cache")
+
+def test_hedged_request_respects_rate_cap(monkeypatch):
+    """Only one hedge is sent when the rate cap allows a single request"""
+    calls = []
+
+    async def call(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.01)
+        return f"answer {len(calls)}"
+
+    tracker = gemini_reasoning.LatencyTracker()
+    for latency in [0.05] * 15 + [0.5] * 5:
+        tracker.record(latency)
+    monkeypatch.setattr(gemini_reasoning, "client", object())
+    monkeypatch.setattr(gemini_reasoning, "call_gemini", call)
+    monkeypatch.setattr(gemini_reasoning, "latency_tracker", tracker)
+    monkeypatch.setattr(gemini_reasoning, "hedge_rate_cap", gemini_reasoning.RateCap(1))
+    monkeypatch.setattr(gemini_reasoning, "BUDGET_PERCENTILE", 100)
+    monkeypatch.setattr(gemini_reasoning, "insights_cache", gemini_reasoning.InsightsCache())
+
+    text, source = asyncio.run(gemini_reasoning.generate_budgeted_insights(CURRENT, FORECAST, budget=1.0))
+    assert (text, source) == ("answer 2", "gemini")
+    assert not gemini_reasoning.hedge_rate_cap.try_acquire()
+
+def test_identical_requests_share_one_call_and_outstanding_calls_are_capped(monkeypatch):
+    """Concurrent misses for one situation await one call; past the cap new situations fall back"""
+    calls = []
+
+    async def slow_call(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return "LLM insights"
+
+    monkeypatch.setattr(gemini_reasoning, "client", object())
+    monkeypatch.setattr(gemini_reasoning, "call_gemini", slow_call)
+    monkeypatch.setattr(gemini_reasoning, "insights_cache", gemini_reasoning.InsightsCache())
+    monkeypatch.setattr(gemini_reasoning, "MAX_BACKGROUND_CALLS", 1)
+
+    async def scenario():
+        same = [gemini_reasoning.generate_budgeted_insights(CURRENT, FORECAST, budget=0.01) for _ in range(5)]
+        other = gemini_reasoning.generate_budgeted_insights({**CURRENT, "cctv_count": 900}, FORECAST, budget=1.0)
+        results = await asyncio.gather(*same, other)
+        await asyncio.sleep(0.1)
+        # Same 15-minute slot: a later reading of the same state is served from cache
+        later = {**CURRENT, "timestamp": "2024-01-01T10:07:30"}
+        return results, await gemini_reasoning.generate_budgeted_insights(later, FORECAST, budget=0.01)
+
+    results, later = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [source for _, source in results] == ["fallback"] * 6
+    assert later == ("LLM insights", "cache")
+    assert gemini_reasoning._inflight_calls == {}
@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ai.gemini_reasoning import generate_fallback_insights, generate_fallback_report
+
+CURRENT = {"cctv_count": 900, "terminal_capacity": 1000, "active_flights": 30,
+           "timestamp": "2024-02-05T16:30:00"}
+FORECAST = [{"predicted_count": c, "timestamp": f"2024-02-05T{10 + i:02d}:00:00"}
+            for i, c in enumerate([300, 320, 400, 900, 950, 350])]
+
+def test_structured_report_matches_text():
+    """Structured output carries the same content as the text report"""
+    text = generate_fallback_insights(CURRENT, FORECAST)
+    report = generate_fallback_report(CURRENT, FORECAST)
+    assert report["risk_level"] == "SEVERE"
+    assert report["peak_periods"] == ["2024-02-05T13:00:00", "2024-02-05T14:00:00"]
+    for action in report["actions"]["immediate"] + report["resource_allocation"]:
+        assert f"• {action}\n" in text
+    for factor in report["risk_factors"]:
+        assert factor in text
+
+def test_text_report_layout():
+    """Rendered report keeps its section order and trimmed edges"""
+    text = generate_fallback_insights(CURRENT, [])
+    assert text.startswith("═")
+    assert text.endswith("is available when API services are operational.")
+    sections = ["SITUATION ASSESSMENT", "RISK ANALYSIS", "PEAK CONGESTION FORECAST",
+                "IMMEDIATE ACTIONS", "SHORT-TERM ACTIONS", "MEDIUM-TERM PREPARATIONS",
+                "RESOURCE ALLOCATION STRATEGY"]
+    positions = [text.index(section) for section in sections]
+    assert positions == sorted(positions)
+    assert "No significant peaks forecasted" in text
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app import app
+from forecasting.seasonality import SeasonalProfile, set_profile
+from heatmap import ZONES, compute_heatmap, decode_binary, encode_binary, encode_json, heatmap_cache
+
+STATE = {"cctv_count": 800, "terminal_capacity": 1000, "timestamp": "2024-02-05T15:00:00"}
+BODY = {"cctv_count": 800, "terminal_capacity": 1000, "flight_schedule": {}, "timestamp": "2024-02-05T15:00:00"}
+
+def test_binary_payload_round_trips_and_is_smaller_than_json():
+    """Typed-array payload decodes to the same matrices as the JSON form"""
+    heatmap = compute_heatmap(STATE, n_paths=500)
+    payload = encode_binary(heatmap)
+    decoded = decode_binary(payload)
+    assert decoded["utilization"].shape == (len(ZONES), 24)
+    for name in ("utilization", "risk_code", "exceedance"):
+        assert np.array_equal(decoded[name], heatmap[name])
+    assert decoded["timestamps"] == heatmap["timestamps"]
+    as_json = encode_json(heatmap)
+    assert np.allclose(as_json["utilization"], decoded["utilization"], atol=0.01)
+    assert len(payload) < len(str(as_json))
+
+def test_zone_matrices_and_downsampling():
+    """Busier zones exceed sooner; downsampled windows keep the peak or the mean"""
+    heatmap = compute_heatmap(STATE, n_paths=1000)
+    utilization, exceedance = heatmap["utilization"], heatmap["exceedance"]
+    order = np.argsort([multiplier for _, multiplier in ZONES])
+    assert (np.diff(utilization[order], axis=0) >= 0).all()
+    assert (np.diff(exceedance[order], axis=0) >= -1e-9).all()
+    assert ((exceedance >= 0) & (exceedance <= 1)).all()
+
+    hourly_max = compute_heatmap(STATE, n_paths=1000, step_minutes=60)
+    hourly_mean = compute_heatmap(STATE, n_paths=1000, step_minutes=60, agg="mean")
+    assert hourly_max["utilization"].shape == (len(ZONES), 6)
+    assert np.allclose(hourly_max["utilization"], utilization.reshape(len(ZONES), 6, 4).max(axis=2))
+    assert np.allclose(hourly_mean["utilization"], utilization.reshape(len(ZONES), 6, 4).mean(axis=2), atol=1e-4)
+    assert hourly_max["timestamps"] == heatmap["timestamps"][::4]
+
+def test_heatmap_endpoint_caches_per_state_version():
+    """Repeated requests hit the cache, If-None-Match returns 304 and a new state changes the ETag"""
+    client = TestClient(app)
+    first = client.post("/heatmap?paths=500", json=BODY)
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "application/octet-stream"
+    hits = heatmap_cache.hits
+    again = client.post("/heatmap?paths=500", json=BODY)
+    assert again.content == first.content and heatmap_cache.hits == hits + 1
+
+    tag = first.headers["etag"]
+    assert client.post("/heatmap?paths=500", json=BODY, headers={"If-None-Match": tag}).status_code == 304
+    changed = client.post("/heatmap?paths=500", json={**BODY, "cctv_count": 300})
+    assert changed.headers["etag"] != tag
+    # A new seasonal profile changes the forecast, so cached payloads are not served for it
+    default = SeasonalProfile.default()
+    set_profile(SeasonalProfile(default.mean * 1.5, default.std))
+    try:
+        relearned = client.post("/heatmap?paths=500", json=BODY, headers={"If-None-Match": tag})
+        assert relearned.status_code == 200 and relearned.headers["etag"] != tag
+        assert relearned.content != first.content
+    finally:
+        set_profile(None)
+    assert client.post("/heatmap?paths=500", json=BODY).headers["etag"] == tag
+
+    as_json = client.post("/heatmap?paths=500&format=json&step=30", json=BODY).json()
+    assert len(as_json["utilization"][0]) == 12 and as_json["zones"][0] == ZONES[0][0]
+    assert client.post("/heatmap?level=LOW", json=BODY).status_code == 422
+    assert client.post("/heatmap?step=20", json=BODY).status_code == 422
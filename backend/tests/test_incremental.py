@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app import app
+from forecasting.arima import forecast_series
+from forecasting.incremental import IncrementalForecaster
+
+STATE = {"cctv_count": 600, "terminal_capacity": 1000, "timestamp": "2024-02-05T12:00:00"}
+
+def test_shift_reuses_horizon_and_draws_only_new_slots():
+    """First update matches forecast_series; a later slot with the same level only adds the tail"""
+    forecaster = IncrementalForecaster(rng=np.random.default_rng(7))
+    first, diff = forecaster.update(STATE)
+    assert diff.full and diff.version == 1
+    assert first.counts.tolist() == forecast_series(STATE, rng=np.random.default_rng(7)).counts.tolist()
+
+    second, diff = forecaster.update({**STATE, "timestamp": "2024-02-05T12:30:00"})
+    assert not diff.full and diff.shift == 2
+    assert forecaster.points_drawn == 24 + 2
+    assert second.counts[:22].tolist() == first.counts[2:].tolist()
+    assert second.timestamps()[:22] == first.timestamps()[2:]
+    assert second.timestamp(23) == "2024-02-05T18:15:00"
+    assert diff.dropped == ["2024-02-05T12:00:00", "2024-02-05T12:15:00"]
+    assert [p["timestamp"] for p in diff.added] == ["2024-02-05T18:00:00", "2024-02-05T18:15:00"]
+    assert diff.changed == [] and diff.transitions == []
+
+    # Same slot, same reading: nothing to react to
+    _, diff = forecaster.update({**STATE, "timestamp": "2024-02-05T12:40:00"})
+    assert diff.shift == 0 and diff.empty
+
+def test_level_change_reports_changed_points_and_risk_transitions():
+    """A new reading rescales the kept slots; risk moves are listed even below the count tolerance"""
+    summarised = IncrementalForecaster(rng=np.random.default_rng(3))
+    summarised.update(STATE)
+    _, scaled = summarised.update({**STATE, "cctv_count": 780, "timestamp": "2024-02-05T12:15:00"})
+    assert scaled.rescaled and scaled.scale == 1.3 and scaled.changed == [] and len(scaled.added) == 1
+
+    forecaster = IncrementalForecaster(rng=np.random.default_rng(3), tolerance=5)
+    before, _ = forecaster.update(STATE)
+    after, diff = forecaster.update({**STATE, "cctv_count": 780, "timestamp": "2024-02-05T12:15:00"})
+    assert len(diff.changed) == 23 and diff.changed[0]["previous_count"] == before.counts[1]
+    expected = np.flatnonzero(after.risk_codes[:23] != before.risk_codes[1:])
+    assert [t["timestamp"] for t in diff.transitions] == [after.timestamp(i) for i in expected]
+    assert all(t["from"] != t["to"] for t in diff.transitions) and diff.transitions
+    assert scaled.transitions == diff.transitions
+
+    _, small = forecaster.update({**STATE, "cctv_count": 781, "timestamp": "2024-02-05T12:15:00"})
+    assert small.changed == []
+
+    smoothed = IncrementalForecaster(rng=np.random.default_rng(3), smoothing=0.5)
+    smoothed.update(STATE)
+    smoothed.update({**STATE, "cctv_count": 800, "timestamp": "2024-02-05T12:15:00"})
+    assert smoothed.horizons["MAIN"].level == 700
+
+    # A gap longer than the horizon (or going back in time) starts over
+    _, jump = forecaster.update({**STATE, "timestamp": "2024-02-06T12:00:00"})
+    _, back = forecaster.update({**STATE, "timestamp": "2024-02-06T11:00:00"})
+    assert jump.full and back.full and forecaster.full_updates == 3
+
+def test_incremental_endpoint_keeps_state_per_zone():
+    """Zones keep separate horizons; only the first call (or include_forecast) returns the full forecast"""
+    client = TestClient(app)
+    body = {"cctv_count": 500, "terminal_capacity": 1000, "flight_schedule": {},
+            "timestamp": "2024-03-01T09:00:00", "terminal_id": "T-INC"}
+    first = client.post("/forecast/incremental", json=body).json()
+    assert first["diff"]["full"] and len(first["forecast"]) == 24
+
+    later = client.post("/forecast/incremental", json={**body, "timestamp": "2024-03-01T09:15:00"}).json()
+    assert not later["diff"]["full"] and later["forecast"] is None
+    assert later["version"] == first["version"] + 1 and len(later["diff"]["added"]) == 1
+
+    other = client.post("/forecast/incremental?include_forecast=true",
+                        json={**body, "terminal_id": "T-OTHER", "timestamp": "2024-03-01T09:15:00"}).json()
+    assert other["diff"]["full"] and other["version"] == 1
+
+    # Terminal ids come from clients: only the most recently updated zones are kept
+    bounded = IncrementalForecaster(rng=np.random.default_rng(0), max_zones=2)
+    for zone in ("A", "B", "A", "C"):
+        bounded.update(STATE, zone)
+    assert list(bounded.horizons) == ["A", "C"] and bounded.evicted == 1
+    assert bounded.update(STATE, "B")[1].full
@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import json
+
+from ai import gemini_reasoning
+
+FORECAST = [{"predicted_count": 520, "timestamp": "2024-01-01T10:00:00", "risk_level": "MEDIUM"}]
+
+def state(count):
+    return {"cctv_count": count, "terminal_capacity": 1000, "timestamp": "2024-01-01T10:00:00"}
+
+def test_concurrent_requests_share_one_call_with_partial_fallback(monkeypatch):
+    """Three callers in one window make one call; an item missing from the answer falls back"""
+    calls = []
+
+    async def batched_call(prompt, config=None):
+        calls.append((prompt, config))
+        items = [{"id": "0", "analysis": "analysis for 0"}, {"id": "[2]", "analysis": "analysis for 2"}]
+        return json.dumps({"items": items})
+
+    monkeypatch.setattr(gemini_reasoning, "client", object())
+    monkeypatch.setattr(gemini_reasoning, "call_gemini", batched_call)
+    monkeypatch.setattr(gemini_reasoning, "BATCHING_ENABLED", True)
+    monkeypatch.setattr(gemini_reasoning, "insights_batcher", gemini_reasoning.MicroBatcher(max_size=8, max_delay=0.02))
+
+    async def scenario():
+        return await asyncio.gather(*(
+            gemini_reasoning.generate_gemini_insights(state(count), FORECAST) for count in (300, 600, 900)
+        ))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    prompt, config = calls[0]
+    assert "[0]" in prompt and "[2]" in prompt and "count=600" in prompt
+    assert config["response_schema"] is gemini_reasoning.BatchInsights
+    assert results[0] == "analysis for 0"
+    assert results[2] == "analysis for 2"
+    assert "LOCAL INTELLIGENCE MODE" in results[1]
+
+def test_batch_size_bound_and_invalid_response(monkeypatch):
+    """A full batch flushes immediately; an unparseable answer falls back for every item"""
+    calls = []
+
+    async def broken_call(prompt, config=None):
+        calls.append(prompt)
+        return "not json"
+
+    batcher = gemini_reasoning.MicroBatcher(max_size=2, max_delay=5.0)
+    monkeypatch.setattr(gemini_reasoning, "call_gemini", broken_call)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(
+            batcher.submit(state(100), FORECAST), batcher.submit(state(200), FORECAST)
+        ), timeout=1.0)
+
+    assert asyncio.run(scenario()) == [None, None]
+    assert len(calls) == 1 and batcher.batches_sent == 1
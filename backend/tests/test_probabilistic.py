@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from forecasting.probabilistic import probabilistic_forecast
+
+STATE = {"cctv_count": 700, "terminal_capacity": 1000, "timestamp": "2024-02-05T14:00:00"}
+
+def test_probabilistic_forecast_is_reproducible_and_chunk_independent():
+    """Same inputs give the same bands regardless of chunk size"""
+    small_chunks = probabilistic_forecast(STATE, n_paths=3000, chunk_size=128)
+    one_chunk = probabilistic_forecast(STATE, n_paths=3000, chunk_size=3000)
+    assert small_chunks == one_chunk
+    assert small_chunks == probabilistic_forecast(STATE, n_paths=3000, chunk_size=128)
+
+def test_quantile_bands_and_exceedance_are_ordered():
+    """P10 <= P50 <= P90 and exceedance falls for higher thresholds"""
+    result = probabilistic_forecast(STATE, n_paths=2000)
+    assert len(result["points"]) == 24
+    for point in result["points"]:
+        assert 0 <= point["p10"] <= point["p50"] <= point["p90"] <= 1000
+        p = point["exceedance_probability"]
+        assert 1 >= p["MEDIUM"] >= p["HIGH"] >= p["CRITICAL"] >= 0
+    with pytest.raises(ValueError):
+        probabilistic_forecast({**STATE, "terminal_capacity": -1}, n_paths=100)
+
+def test_probabilistic_endpoint():
+    """Endpoint honours custom quantiles and rejects invalid ones"""
+    client = TestClient(app)
+    body = {"cctv_count": 450, "terminal_capacity": 1000, "flight_schedule": {},
+            "timestamp": "2024-02-05T10:30:00"}
+    response = client.post("/forecast/probabilistic?paths=500&quantiles=5,50,95", json=body)
+    assert response.status_code == 200
+    assert response.json()["quantiles"] == ["p5", "p50", "p95"]
+    assert client.post("/forecast/probabilistic?quantiles=150", json=body).status_code == 422
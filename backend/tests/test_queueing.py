@@ -0,0 +1,59 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import app as app_module
+from forecasting.queueing import analytic_queues, discrete_queues, queue_forecast
+
+def test_analytic_matches_mm1_and_carries_backlog():
+    """M/M/1 wait matches theory; overload carries a backlog into later slots"""
+    single = analytic_queues([1.0], 1, service_rate=2.0)
+    assert np.isclose(single["wait_minutes"][0, 0], 0.5)
+
+    result = analytic_queues([[10.0, 30.0, 10.0]], 10, service_rate=2.5)
+    mean_backlog_during_overload = (30.0 - 25.0) * 15 / 2
+    assert result["queue_length"][0, 1] >= mean_backlog_during_overload
+    assert result["queue_length"][0, 2] > result["queue_length"][0, 0]
+
+def test_discrete_mode_is_reproducible_across_workers():
+    """Zone blocks use their own generators, so worker count does not change results"""
+    arrivals = np.random.default_rng(0).uniform(5, 20, (12, 8))
+    serial = discrete_queues(arrivals, 10, replications=50, seed=7)
+    threaded = discrete_queues(arrivals, 10, replications=50, seed=7, workers=3)
+    assert np.array_equal(serial["wait_minutes"], threaded["wait_minutes"])
+    assert serial["wait_p90_minutes"].shape == (12, 8)
+
+def test_queue_forecast_uses_active_lanes():
+    """Fewer active lanes mean longer predicted waits"""
+    forecast = [{"timestamp": f"t{i}", "predicted_count": 1300} for i in range(8)]
+    busy = queue_forecast(forecast, {"security_lanes_active": 9})
+    relaxed = queue_forecast(forecast, {"security_lanes_active": 12})
+    assert busy[-1]["lanes_active"] == 9
+    assert busy[-1]["wait_minutes"] > relaxed[-1]["wait_minutes"]
+
+def test_queue_endpoint_passes_workers_and_runs_off_the_loop(monkeypatch):
+    """workers reaches the discrete model, which runs in a worker thread; out-of-range values are rejected"""
+    calls = []
+    real = app_module.zone_queue_forecasts
+
+    def recording(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop = True
+        except RuntimeError:
+            on_loop = False
+        calls.append((kwargs.get("workers"), on_loop))
+        return real(*args, **kwargs)
+    monkeypatch.setattr(app_module, "zone_queue_forecasts", recording)
+
+    client = TestClient(app_module.app)
+    response = client.get("/simulate/queues?mode=discrete&zones=3&replications=20&seed=1&workers=3")
+    assert response.status_code == 200 and len(response.json()["zones"]) == 3
+    assert client.get("/simulate/queues").status_code == 200
+    assert calls == [(3, False), (None, False)]
+    assert client.get("/simulate/queues?workers=64").status_code == 422
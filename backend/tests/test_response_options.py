@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from forecasting.arima import forecast_series
+from serialization import ResponseOptions, parse_minutes
+
+BODY = {"cctv_count": 640, "terminal_capacity": 1000, "flight_schedule": {}, "timestamp": "2024-02-05T15:00:00"}
+
+def test_options_parse_and_validate():
+    """Durations, nested point fields and invalid combinations"""
+    assert [parse_minutes(v) for v in ("2h", "30m", "1h30m", "45")] == [120, 30, 90, 45]
+    options = ResponseOptions.from_query("forecast.timestamp,forecast.risk_level,risk_level", "2h", "30m")
+    assert options.fields == ("forecast", "risk_level")
+    assert options.point_fields == ("timestamp", "risk_level")
+    assert (options.horizon_slots, options.step_slots) == (8, 2)
+    assert not options.wants_insights
+    assert ResponseOptions.from_query("gemini_insights").wants_insights
+    assert not ResponseOptions.from_query(include_insights=False).wants_insights
+    with pytest.raises(ValueError):
+        ResponseOptions.from_query("gemini_insights", include_insights=False)
+    for fields, horizon, step in (("bogus", None, None), ("risk_level.x", None, None),
+                                  (None, "20m", None), (None, "1h", "2h"), (None, "25h", None), (None, "soon", None)):
+        with pytest.raises(ValueError):
+            ResponseOptions.from_query(fields, horizon, step)
+
+def test_resampled_points_keep_window_peaks():
+    """Coarser points carry the window start and its busiest slot; projected points match full ones"""
+    series = forecast_series({**BODY}, steps=8, rng=np.random.default_rng(2))
+    hourly = series.resample(4)
+    assert len(hourly) == 2
+    assert hourly.counts.tolist() == [max(series.counts[:4]), max(series.counts[4:])]
+    assert hourly.timestamps() == [series.timestamp(0), series.timestamp(4)]
+    full = series.to_points()
+    assert series.to_points(["timestamp", "confidence_interval"]) == [
+        {"timestamp": p["timestamp"], "confidence_interval": p["confidence_interval"]} for p in full
+    ]
+
+def test_lightweight_request_skips_llm_and_shrinks_payload(monkeypatch):
+    """Projected requests never reach the insights path and return only what was asked for"""
+    client = TestClient(app_module.app)
+    full = client.post("/analyze", json=BODY)
+
+    async def no_insights(*args, **kwargs):
+        raise AssertionError("insights must not be generated")
+    monkeypatch.setattr(app_module, "admitted_insights", no_insights)
+
+    light = client.post("/analyze?fields=forecast.timestamp,forecast.risk_level,risk_level&horizon=2h&step=30m",
+                        json=BODY)
+    assert light.status_code == 200
+    assert light.headers["X-Insights-Source"] == "skipped"
+    payload = light.json()
+    assert set(payload) == {"forecast", "risk_level"}
+    assert len(payload["forecast"]) == 4 and set(payload["forecast"][0]) == {"timestamp", "risk_level"}
+    assert len(light.content) * 10 < len(full.content)
+
+    no_text = client.get("/simulate?include_insights=false").json()
+    assert "gemini_insights" not in no_text and "structured_insights" not in no_text
+    assert len(no_text["forecast"]) == 24 and no_text["recommendations"]
+    assert client.post("/analyze?step=20m", json=BODY).status_code == 422
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import numpy as np
+
+from rules.engine import RuleEngine, DEFAULT_RULES_PATH
+
+def test_risk_scale_matches_strict_thresholds():
+    """Values equal to a threshold stay in the lower level"""
+    risk = RuleEngine().rules.risk
+    assert [risk.level(u) for u in (10, 50, 50.01, 75, 90, 90.5)] == [
+        "LOW", "LOW", "MEDIUM", "MEDIUM", "HIGH", "CRITICAL"
+    ]
+
+def test_scale_classifies_zone_by_horizon_arrays():
+    """Whole zone x horizon matrices are classified in one call"""
+    severity = RuleEngine().rules.severity
+    levels = severity.classify(np.array([[40.0, 71.0], [86.0, 99.0]]))
+    assert levels.tolist() == [["LOW", "ELEVATED"], ["SEVERE", "CRITICAL"]]
+
+def test_rules_hot_reload(tmp_path):
+    """Edited rule files apply without a restart; broken edits are ignored"""
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        config = json.load(f)
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(config))
+    engine = RuleEngine(str(path), check_interval=0)
+    assert engine.rules.risk.level(60) == "MEDIUM"
+
+    config["risk_scale"]["thresholds"] = [70, 80, 90]
+    path.write_text(json.dumps(config))
+    os.utime(path, (1, 1))
+    assert engine.rules.risk.level(60) == "LOW"
+
+    path.write_text("{not json")
+    os.utime(path, (2, 2))
+    assert engine.rules.risk.level(60) == "LOW"
@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from scenarios import LOAD_FACTOR, _scenario_arrays, evaluate_scenarios
+from schemas import ScenarioBase, ScenarioPerturbation
+
+BASE = ScenarioBase(
+    cctv_count=900,
+    terminal_capacity=1600,
+    timestamp="2024-01-15T14:00:00",
+    security_lanes_active=8,
+    flights=[{"flight_number": "FL1234", "type": "departure", "scheduled_time": "16:30",
+              "passenger_capacity": 300}],
+)
+
+def test_extra_lanes_rank_first_and_baseline_is_shared():
+    """Opening lanes cuts waits; every scenario is compared to the same seeded baseline"""
+    scenarios = [
+        ScenarioPerturbation(name="no change"),
+        ScenarioPerturbation(name="two lanes at 15:00",
+                             capacity_changes=[{"at": "15:00", "security_lanes_delta": 2}]),
+        ScenarioPerturbation(name="close a lane",
+                             capacity_changes=[{"at": "14:00", "security_lanes_delta": -1}]),
+    ]
+    first = evaluate_scenarios(BASE, scenarios, seed=3)
+    again = evaluate_scenarios(BASE, scenarios, seed=3)
+    assert first == again
+
+    ranked = [s["name"] for s in first["scenarios"]]
+    assert ranked[0] == "two lanes at 15:00"
+    assert ranked[-1] == "close a lane"
+    unchanged = next(s for s in first["scenarios"] if s["name"] == "no change")
+    assert unchanged["delta_max_wait_minutes"] == 0
+
+def test_flight_delay_moves_load_and_overrides_apply():
+    """Delaying a departure shifts its passengers; count overrides replace one slot"""
+    scenarios = [
+        ScenarioPerturbation(name="delay", flight_delays=[{"flight_number": "FL1234", "delay_minutes": 90}]),
+        ScenarioPerturbation(name="surge", count_overrides=[{"at": "2024-01-15T15:00:00", "count": 1600}]),
+    ]
+    result = evaluate_scenarios(BASE, scenarios, seed=3)
+    surge = next(s for s in result["scenarios"] if s["name"] == "surge")
+    assert surge["peak_utilization"] == 100.0
+    assert surge["peak_time"] == "2024-01-15T15:00:00"
+
+    # FL1234 (16:30) loads the terminal 14:30-16:00, slots 2-7; 90 minutes later that is slots 8-13
+    flat = np.full(24, 500.0)
+    base_time = datetime.fromisoformat(BASE.timestamp)
+    baseline = _scenario_arrays(BASE, ScenarioPerturbation(name="baseline"), flat, base_time)[0]
+    delayed = _scenario_arrays(BASE, scenarios[0], flat, base_time)[0]
+    per_slot = 300 * LOAD_FACTOR / 6
+    moved = delayed - baseline
+    assert np.allclose(moved[2:8], -per_slot, atol=1) and np.allclose(moved[8:14], per_slot, atol=1)
+    assert not moved[:2].any() and not moved[14:].any()
+
+    with pytest.raises(ValueError):
+        evaluate_scenarios(BASE, [ScenarioPerturbation(
+            name="bad", flight_delays=[{"flight_number": "XX1", "delay_minutes": 10}])])
+
+def test_scenarios_endpoint_summary_falls_back_without_llm(monkeypatch):
+    """One optional summary call; a failed call yields the local summary"""
+    calls = []
+
+    async def failing_gemini(prompt, config=None):
+        calls.append(prompt)
+        return None
+
+    monkeypatch.setattr(app_module, "call_gemini", failing_gemini)
+    client = TestClient(app_module.app)
+    response = client.post("/scenarios", json={
+        "base": BASE.model_dump(),
+        "scenarios": [{"name": "two lanes", "capacity_changes": [{"at": "15:00", "security_lanes_delta": 2}]},
+                      {"name": "delay", "flight_delays": [{"flight_number": "FL1234", "delay_minutes": 90}]}],
+        "seed": 1,
+        "include_summary": True,
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert len(calls) == 1
+    assert body["summary_source"] == "fallback"
+    assert body["summary"].startswith("Best option:")
+    assert [s["rank"] for s in body["scenarios"]] == [1, 2]
+
+    bad = client.post("/scenarios", json={"base": BASE.model_dump(), "scenarios": [
+        {"name": "bad", "flight_delays": [{"flight_number": "XX1", "delay_minutes": 10}]}]})
+    assert bad.status_code == 422
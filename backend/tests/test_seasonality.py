@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from forecasting.seasonality import (
+    SeasonalProfile, format_times, get_profile, hour_of_week, set_profile, time_grid, tz_suffix
+)
+from forecasting.arima import forecast_congestion
+
+def test_default_profile_matches_daily_trend_table():
+    """Built-in profile reproduces the old hour-of-day branches for every hour of the week"""
+    grid = time_grid(datetime(2024, 1, 1), 168 * 4)
+    mean, std = SeasonalProfile.default().lookup(grid)
+    for moment, m, s in zip([datetime(2024, 1, 1) + timedelta(minutes=15 * i) for i in range(168 * 4)], mean, std):
+        hour = moment.hour
+        if 6 <= hour <= 9:
+            expected = (1.3, 0.1)
+        elif 16 <= hour <= 19:
+            expected = (1.4, 0.1)
+        elif 22 <= hour or hour <= 5:
+            expected = (0.5, 0.05)
+        else:
+            expected = (1.0, 0.08)
+        assert (m, s) == expected
+    # 2024-01-01 was a Monday
+    assert hour_of_week(time_grid(datetime(2024, 1, 1, 0), 1))[0] == 0
+    assert hour_of_week(time_grid(datetime(2024, 1, 7, 23), 1))[0] == 167
+
+def test_learned_profile_separates_weekends_and_holidays(tmp_path):
+    """Learning recovers weekday/weekend levels and a holiday profile, and survives a save/load round trip"""
+    start = datetime(2024, 1, 1)
+    times = [start + timedelta(hours=i) for i in range(28 * 24)]
+    holidays = [date(2024, 1, 10), date(2024, 1, 17)]
+    counts = [
+        100 if t.date() in holidays else (300 if t.weekday() >= 5 else 600)
+        for t in times
+    ]
+    profile = SeasonalProfile.learn(times, counts, holidays=holidays)
+    path = str(tmp_path / "profile.npz")
+    profile.save(path)
+    loaded = SeasonalProfile.load(path)
+
+    mean, std = loaded.lookup(time_grid(datetime(2024, 2, 5, 12), 1, step_minutes=0))
+    weekend, _ = loaded.lookup(time_grid(datetime(2024, 2, 10, 12), 1, step_minutes=0))
+    on_holiday, _ = loaded.lookup(time_grid(datetime(2024, 1, 10, 12), 1, step_minutes=0))
+    assert std[0] == 0.0
+    assert mean[0] / weekend[0] == 2.0
+    assert on_holiday[0] / mean[0] < 0.2
+
+    try:
+        set_profile(loaded)
+        state = {"cctv_count": 500, "terminal_capacity": 1000, "timestamp": "2024-02-10T10:00:00"}
+        saturday = forecast_congestion(state, hours=1, rng=np.random.default_rng(0))
+        assert all(point["predicted_count"] < 500 for point in saturday)
+    finally:
+        set_profile(None)
+    assert get_profile().holiday_mean is None
+
+def test_format_times_matches_isoformat():
+    """Lazily formatted grid timestamps equal datetime.isoformat, including microseconds and offsets"""
+    for start in (
+        datetime(2024, 3, 10, 23, 59, 59),
+        datetime(2024, 3, 10, 23, 59, 59, 123456),
+        datetime(2024, 6, 1, 5, 30, tzinfo=timezone(timedelta(hours=-5, minutes=-30))),
+    ):
+        expected = [(start + timedelta(minutes=15 * i)).isoformat() for i in range(8)]
+        assert format_times(time_grid(start, 8), tz_suffix(start)) == expected
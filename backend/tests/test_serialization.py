@@ -0,0 +1,30 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import numpy as np
+
+from serialization import dumps, build_forecast_response
+
+def test_dumps_encodes_numpy_arrays():
+    """NumPy arrays and scalars encode directly"""
+    payload = {"counts": np.array([1, 2, 3]), "rate": np.float64(0.5)}
+    assert json.loads(dumps(payload)) == {"counts": [1, 2, 3], "rate": 0.5}
+
+def test_forecast_response_follows_typed_layout():
+    """Fast path keeps the ForecastResponse field layout"""
+    point = {
+        "timestamp": "2024-02-05T10:30:00",
+        "predicted_count": 500,
+        "utilization_rate": 50.0,
+        "risk_level": "LOW",
+        "confidence_interval": {"lower": 425, "upper": 575},
+        "internal_only": True,
+    }
+    metrics = {"cctv_count": 500, "terminal_capacity": 1000, "utilization_rate": 50.0,
+               "timestamp": "2024-02-05T10:30:00"}
+    result = json.loads(dumps(build_forecast_response(metrics, [point], "ok", "LOW", [])))
+    assert "internal_only" not in result["forecast"][0]
+    assert result["current_metrics"]["active_flights"] is None
+    assert result["forecast"][0]["confidence_interval"]["upper"] == 575
@@ -0,0 +1,146 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import sqlite3
+import asyncio
+import multiprocessing
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import app as app_module
+from ai import gemini_reasoning
+from ai.gemini_reasoning import SharedInsightsCache
+from forecasting.arima import forecast_series
+from shared_state import SharedState, SharedStore
+
+STATE = {"cctv_count": 640, "terminal_capacity": 1000, "active_flights": 12, "timestamp": "2024-02-05T15:00:00"}
+
+def _publish_versions(path, count):
+    """Writer worker: every published forecast has all counts equal to its cctv_count"""
+    state = SharedState(path)
+    series = forecast_series(STATE, steps=96, rng=np.random.default_rng(0))
+    for i in range(count):
+        series.counts[:] = i
+        state.publish({**STATE, "cctv_count": i}, series)
+    state.close()
+
+def test_other_process_sees_consistent_versions(tmp_path):
+    """Reads racing a writer in another process are never torn and versions only move forward"""
+    path = str(tmp_path / "state.bin")
+    reader = SharedState(path)
+    assert reader.read() is None
+    writer = multiprocessing.get_context("fork").Process(target=_publish_versions, args=(path, 3000))
+    writer.start()
+    versions = []
+    while writer.is_alive() or not versions:
+        reading = reader.read()
+        if reading is not None:
+            assert (reading.forecast.counts == reading.snapshot.cctv_count).all()
+            versions.append(reading.version)
+    writer.join()
+    assert writer.exitcode == 0
+    assert versions == sorted(versions)
+    final = reader.read()
+    assert final.version == 3000 and final.snapshot.cctv_count == 2999 and len(final.forecast) == 96
+    assert reader.read(since=final.version) is None
+
+def test_insights_cache_is_shared_between_workers(tmp_path):
+    """An answer stored by one worker's cache is served by another and keeps its original expiry"""
+    store_path = str(tmp_path / "cache.sqlite3")
+    first = SharedInsightsCache(SharedStore(store_path), ttl=60)
+    second = SharedInsightsCache(SharedStore(store_path), ttl=60)
+    assert second.get("situation") is None
+    first.set("situation", "Deploy two more lanes")
+    first.store.flush()
+    assert second.get("situation") == "Deploy two more lanes"
+    assert "situation" in second.entries
+
+    # On the event loop a miss reads the store in a worker thread
+    third = SharedInsightsCache(SharedStore(store_path), ttl=60)
+    loops = []
+    read = third.store.get
+
+    def recording_get(key, ttl):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return read(key, ttl)
+    third.store.get = recording_get
+    assert asyncio.run(third.fetch("situation")) == "Deploy two more lanes"
+    assert asyncio.run(third.fetch("situation")) == "Deploy two more lanes"
+    assert loops == [None]
+
+    stale = SharedInsightsCache(SharedStore(store_path), ttl=60)
+    stale.store.set("old", "expired answer")
+    stale.ttl = 0
+    assert stale.get("old") is None
+
+def test_only_one_worker_generates_a_situation(tmp_path, monkeypatch):
+    """The first worker to miss claims the key; the other waits for its answer instead of calling Gemini"""
+    store_path = str(tmp_path / "cache.sqlite3")
+    first, second = SharedStore(store_path), SharedStore(store_path)
+    assert first.claim("situation", lease=30) is True
+    assert second.claim("situation", lease=30) is False
+    assert second.claim("situation", lease=0) is True  # an expired lease is taken over
+    second.release("situation")
+    second.flush()
+    assert first.claim("situation", lease=30) is True
+
+    calls = []
+
+    async def call_gemini(prompt, **kwargs):
+        calls.append(prompt)
+        await asyncio.sleep(0.2)
+        return "Open lanes 4 and 5"
+
+    async def race():
+        return await asyncio.gather(*(gemini_reasoning.generate_gemini_insights(STATE, []) for _ in range(2)))
+
+    monkeypatch.setattr(gemini_reasoning, "insights_cache", SharedInsightsCache(SharedStore(str(tmp_path / "race.sqlite3"))))
+    monkeypatch.setattr(gemini_reasoning, "SHARED_STATE_ENABLED", True)
+    monkeypatch.setattr(gemini_reasoning, "BATCHING_ENABLED", False)
+    monkeypatch.setattr(gemini_reasoning, "client_ready", lambda: object())
+    monkeypatch.setattr(gemini_reasoning, "call_gemini", call_gemini)
+    assert asyncio.run(race()) == ["Open lanes 4 and 5", "Open lanes 4 and 5"]
+    assert len(calls) == 1
+
+def test_locked_store_fails_open_quickly(tmp_path):
+    """A worker holding the write lock never stalls readers or writers on the event loop"""
+    store_path = str(tmp_path / "cache.sqlite3")
+    locker = sqlite3.connect(store_path)
+    locker.execute("BEGIN EXCLUSIVE")
+    store = SharedStore(store_path, busy_timeout=0.01)
+    started = time.perf_counter()
+    assert store.get("situation", ttl=60) is None
+    assert store.set("situation", "queued while locked") is True
+    assert time.perf_counter() - started < 1.0 and store.errors == 1
+    locker.rollback()
+    locker.close()
+    store.flush()
+    assert SharedStore(store_path).get("situation", ttl=60)[1] == "queued while locked"
+
+def test_state_endpoint_serves_latest_published_analysis(tmp_path, monkeypatch):
+    """Any worker can serve the state another one published; pollers get 304 until it changes"""
+    monkeypatch.setattr(app_module, "shared_state", SharedState(str(tmp_path / "state.bin")))
+    client = TestClient(app_module.app)
+    assert client.get("/state").status_code == 404
+
+    body = {"cctv_count": 820, "terminal_capacity": 1000, "flight_schedule": {}, "timestamp": "2024-02-05T16:30:00"}
+    served = client.post("/analyze", json=body).json()
+    other_worker = SharedState(str(tmp_path / "state.bin"))
+    assert other_worker.read().forecast.counts.tolist() == [p["predicted_count"] for p in served["forecast"]]
+
+    latest = client.get("/state")
+    assert latest.status_code == 200
+    state = latest.json()
+    assert state["version"] == 1 and state["risk_level"] == served["risk_level"]
+    assert state["forecast"] == served["forecast"]
+    assert client.get("/state", headers={"If-None-Match": latest.headers["etag"]}).status_code == 304
+    assert client.get("/state?since=1").status_code == 304
+
+    client.post("/analyze?horizon=2h", json={**body, "cctv_count": 300})
+    assert client.get("/state?since=1").json()["current_metrics"]["cctv_count"] == 300
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import dataclasses
+
+import numpy as np
+import pytest
+
+from fusion.merge import merge_data, merge_snapshot
+from forecasting.arima import forecast_congestion, forecast_series
+from ai.gemini_reasoning import generate_fallback_insights
+from snapshots import DEFAULT_CAPACITY, as_snapshot
+
+CCTV = {"count": 820, "timestamp": "2024-02-05T16:30:00"}
+AODB = {"active_flights": 25, "arriving_flights": 15, "departing_flights": 10}
+
+def test_snapshot_derives_metrics_once_and_is_immutable():
+    """Utilization and level are computed at merge time; the snapshot cannot be mutated"""
+    snapshot = merge_snapshot(CCTV, AODB, {"terminal_capacity": 1000})
+    assert snapshot.utilization_rate == 82.0
+    assert snapshot.congestion_level == "HIGH"
+    assert snapshot.flight_density == 12.5
+    assert snapshot.to_dict() == merge_data(CCTV, AODB, {"terminal_capacity": 1000})
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.cctv_count = 1
+    assert not hasattr(snapshot, "__dict__")
+
+def test_missing_capacity_uses_one_default_everywhere():
+    """A state without capacity is treated as 1000 in merge, forecast and insights alike"""
+    state = {"cctv_count": 500, "timestamp": "2024-02-05T12:00:00"}
+    assert as_snapshot(state).utilization_rate == 50.0
+    assert merge_snapshot({"count": 500}, {}, {}).terminal_capacity == 1000
+    assert "50.0%" in generate_fallback_insights(state, [])
+    nulls = as_snapshot({**state, "terminal_capacity": None, "active_flights": None})
+    assert nulls.terminal_capacity == DEFAULT_CAPACITY and nulls.active_flights == 0
+
+def test_forecast_series_matches_point_dicts():
+    """The array-backed series serializes to exactly the legacy forecast points"""
+    snapshot = merge_snapshot(CCTV, AODB, {"terminal_capacity": 1000})
+    series = forecast_series(snapshot, rng=np.random.default_rng(4))
+    points = forecast_congestion(snapshot.to_dict(), rng=np.random.default_rng(4))
+    assert series.to_points() == points
+    assert series[-1] == points[-1] and len(series) == 24
+    assert generate_fallback_insights(snapshot, series) == generate_fallback_insights(snapshot.to_dict(), points)
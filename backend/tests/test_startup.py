@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import time
+import asyncio
+import subprocess
+
+from fastapi.testclient import TestClient
+
+import ai.gemini_reasoning as gemini_reasoning
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def test_app_import_defers_gemini_sdk():
+    """Importing the app neither loads google.genai nor builds a client, within the import budget"""
+    probe = (
+        "import sys, time, json; started = time.perf_counter(); import app; import ai.gemini_reasoning; "
+        "print(json.dumps({'ms': (time.perf_counter() - started) * 1000, "
+        "'genai': 'google.genai' in sys.modules, 'client': ai.gemini_reasoning.client}))"
+    )
+    env = dict(os.environ, GEMINI_API_KEY="test-key")
+    output = subprocess.run([sys.executable, "-c", probe], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result["genai"] is False
+    assert result["client"] is None
+    assert result["ms"] < float(os.getenv("STARTUP_BUDGET_MS", "3000"))
+
+def test_lifespan_warms_client_in_background(monkeypatch):
+    """Startup schedules the client build without blocking /health"""
+    import app as app_module
+    built = []
+
+    async def fake_warm_up():
+        built.append(True)
+        return True
+
+    monkeypatch.setattr(app_module, "WARM_UP_CLIENT", True)
+    monkeypatch.setattr(app_module, "warm_up_client", fake_warm_up)
+
+    with TestClient(app_module.app) as client:
+        assert client.get("/health").status_code == 200
+    assert built == [True]
+
+def test_get_client_without_key_is_none(monkeypatch):
+    """Without an API key the client stays None and callers use the fallback"""
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(gemini_reasoning, "client", None)
+    monkeypatch.setattr(gemini_reasoning, "_client_initialized", False)
+    assert gemini_reasoning.get_client() is None
+    assert gemini_reasoning._client_initialized
+
+def test_client_ready_never_waits_for_the_build(monkeypatch):
+    """While the client is being built (lock held) callers get None at once and fall back"""
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(gemini_reasoning, "client", None)
+    monkeypatch.setattr(gemini_reasoning, "_client_initialized", False)
+    monkeypatch.setattr(gemini_reasoning, "_client_build", None)
+    with gemini_reasoning._client_lock:  # a warm-up build in progress
+        started = time.perf_counter()
+        assert gemini_reasoning.client_ready() is None
+        assert asyncio.run(gemini_reasoning.call_gemini("prompt")) is None
+        assert time.perf_counter() - started < 0.05
+    gemini_reasoning._client_build.join(1.0)
+    assert gemini_reasoning._client_initialized
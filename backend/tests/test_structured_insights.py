@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import asyncio
+
+from ai import gemini_reasoning
+
+CURRENT = {"cctv_count": 800, "terminal_capacity": 1000, "active_flights": 30,
+           "timestamp": "2024-02-05T16:00:00"}
+FORECAST = [{"predicted_count": 820, "timestamp": "2024-02-05T16:00:00", "risk_level": "HIGH"}]
+
+def test_structured_output_is_parsed_with_token_budget(monkeypatch):
+    """Schema-constrained JSON is parsed into typed models"""
+    seen = {}
+
+    async def fake_call(prompt, config=None):
+        seen.update(config)
+        return json.dumps({
+            "assessment": "Busy but stable.",
+            "risk_factors": [{"factor": "High volume", "likelihood": "HIGH", "impact": "MEDIUM"}],
+            "peak_windows": [{"start": "2024-02-05T17:00:00", "risk_level": "HIGH"}],
+            "actions": [{"priority": 2, "horizon": "short_term", "action": "Open lane 5"},
+                        {"priority": 1, "horizon": "immediate", "action": "Move staff"}],
+        })
+
+    monkeypatch.setattr(gemini_reasoning, "client", object())
+    monkeypatch.setattr(gemini_reasoning, "call_gemini", fake_call)
+    insights = asyncio.run(gemini_reasoning.generate_structured_insights(CURRENT, FORECAST))
+
+    assert insights.source == "gemini"
+    assert seen["response_schema"] is gemini_reasoning.StructuredInsights
+    assert seen["max_output_tokens"] == sum(gemini_reasoning.STRUCTURED_TOKEN_BUDGETS.values())
+    text = gemini_reasoning.render_structured_insights(insights)
+    assert text.index("1. [IMMEDIATE] Move staff") < text.index("2. [SHORT_TERM] Open lane 5")
+
+def test_invalid_structured_output_falls_back(monkeypatch):
+    """Output that breaks the schema is replaced by the local structured report"""
+    async def fake_call(prompt, config=None):
+        return '{"assessment": "truncated'
+
+    monkeypatch.setattr(gemini_reasoning, "client", object())
+    monkeypatch.setattr(gemini_reasoning, "call_gemini", fake_call)
+    insights = asyncio.run(gemini_reasoning.generate_structured_insights(CURRENT, FORECAST))
+
+    assert insights.source == "fallback"
+    assert insights.actions[0].priority == 1
+    assert insights.actions[0].horizon == "immediate"
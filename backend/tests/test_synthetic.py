@@ -0,0 +1,68 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+
+import numpy as np
+
+from data_ingestion.synthetic import Event, generate
+from forecasting.seasonality import format_times
+from fusion.asof import fuse_window, frame_snapshot
+
+def test_same_seed_reproduces_dataset():
+    """A seed fixes every stream; a different seed changes them"""
+    a = generate(days=1, zones=6, terminals=2, seed=7, surges_per_day=2, incidents_per_day=1)
+    b = generate(days=1, zones=6, terminals=2, seed=7, surges_per_day=2, incidents_per_day=1)
+    c = generate(days=1, zones=6, terminals=2, seed=8)
+    assert np.array_equal(a.counts, b.counts) and np.array_equal(a.capacity, b.capacity)
+    assert np.array_equal(a.flights["estimated_us"], b.flights["estimated_us"])
+    assert [e.to_dict() for e in a.events] == [e.to_dict() for e in b.events]
+    assert not np.array_equal(a.counts, c.counts)
+    assert a.counts.shape == (6, 24 * 60)
+    assert set(a.flights["status"].tolist()) <= {"on_time", "delayed", "cancelled"}
+
+def test_injected_incident_raises_counts_cuts_capacity_and_delays_flights():
+    """An incident on one terminal scales its counts and capacity and only its flights"""
+    incident = Event("2024-01-01T12:00:00", 60, kind="incident", magnitude=2.0,
+                     capacity_factor=0.5, terminals=[1])
+    base = generate(days=1, zones=4, terminals=2, seed=3)
+    hit = generate(days=1, zones=4, terminals=2, seed=3, events=[incident])
+
+    window = slice(12 * 60, 13 * 60)
+    zones = hit.zone_terminal == 1
+    assert np.allclose(hit.counts[zones, window], np.rint(base.counts[zones, window] * 2.0), atol=1)
+    assert np.array_equal(hit.counts[~zones], base.counts[~zones])
+    assert (hit.capacity[1, window] == 500).all() and (hit.capacity[0] == 1000).all()
+    assert (hit.lanes[1, window] == 5).all()
+    capacity = [r for chunk in hit.iter_records("capacity") for r in chunk]
+    assert {(r["timestamp"], r["terminal_id"], r["terminal_capacity"]) for r in capacity} == {
+        ("2024-01-01T00:00:00", "T1", 1000), ("2024-01-01T00:00:00", "T2", 1000),
+        ("2024-01-01T12:00:00", "T2", 500), ("2024-01-01T13:00:00", "T2", 1000),
+    }
+    assert hit.flights["delayed"].sum() >= base.flights["delayed"].sum()
+
+def test_jsonl_stream_feeds_asof_fusion(tmp_path):
+    """Streamed records round-trip through JSON lines and fuse into a valid snapshot"""
+    dataset = generate(days=0.25, zones=3, seed=1, step_minutes=1)
+    written = dataset.write_jsonl(str(tmp_path), chunk_size=100)
+    assert written == dataset.sizes()
+
+    records = {}
+    for kind in written:
+        with open(tmp_path / f"{kind}.jsonl", "r", encoding="utf-8") as f:
+            records[kind] = [json.loads(line) for line in f]
+        assert len(records[kind]) == written[kind]
+
+    frame = fuse_window(records["cctv"], records["aodb"], records["capacity"],
+                        "2024-01-01T05:00:00", "2024-01-01T05:30:00")
+    assert frame["valid"].all()
+    assert (frame["cameras_reporting"] == 3).all()
+    # Each camera covers one zone, so the terminal count is the sum of the zone counts
+    times = format_times(dataset.grid)
+    zone_totals = dataset.counts.sum(axis=0)
+    expected = [zone_totals[times.index(t)] for t in frame["timestamp"]]
+    assert np.allclose(frame["cctv_count"], expected, atol=0.5)
+    snapshot = frame_snapshot(frame)
+    assert snapshot["terminal_capacity"] == 1000
+    assert snapshot["cctv_count"] == zone_totals[times.index(snapshot["timestamp"])]
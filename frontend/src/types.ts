@@ -21,12 +21,40 @@ export interface ForecastPoint {
   confidence_interval: ConfidenceInterval;
 }
 
+export interface RiskFactor {
+  factor: string;
+  likelihood: string;
+  impact: string;
+}
+
+export interface PeakWindow {
+  start: string;
+  end?: string | null;
+  expected_count?: number | null;
+  risk_level: string;
+}
+
+export interface PrioritizedAction {
+  priority: number;
+  horizon: 'immediate' | 'short_term' | 'medium_term';
+  action: string;
+}
+
+export interface StructuredInsights {
+  assessment: string;
+  risk_factors: RiskFactor[];
+  peak_windows: PeakWindow[];
+  actions: PrioritizedAction[];
+  source: string;
+}
+
 export interface AnalysisResponse {
   current_metrics: CurrentMetrics;
   forecast: ForecastPoint[];
   gemini_insights: string;
   risk_level: 'LOW' | 'MEDIUM' | 'HIGH' | 'CRITICAL';
   recommendations: string[];
+  structured_insights?: StructuredInsights | null;
 }
 
 export interface ManualDataInput {